@@ -1,4 +1,6 @@
+from core.logger import setup_logging
 from core.ui_base import run_app
 
 if __name__ == "__main__":
+    setup_logging()
     run_app()
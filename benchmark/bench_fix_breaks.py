@@ -0,0 +1,140 @@
+"""
+fix_breaks 断点检测的基准测试
+
+生成带术语的合成中文字幕（部分术语被故意切在两条字幕之间），对比：
+- 专有名词：逐词逐位置扫描的旧实现 vs 字典树索引（校验结果一致）
+- jieba 分词：每个断点单独分词窗口 vs 整篇分词一次
+
+用法：
+    python -m benchmark.bench_fix_breaks
+    python -m benchmark.bench_fix_breaks --cues 20000 --repeat 5
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import jieba
+
+from fix_breaks import SubtitleBreakFixer, DocumentSegmentation, BOUNDARY_CHARS, check_broken_token
+
+FILLER = "我们现在要去那里看看他说的东西然后再回来这一次真的不一样了吧"
+
+
+def naive_find_vocab_word(vocab, text1, text2):
+    """旧实现：遍历每个词和每个切分位置"""
+    for vocab_word in vocab:
+        if len(vocab_word) < 2:
+            continue
+        for i in range(1, len(vocab_word)):
+            part1 = vocab_word[:i]
+            part2 = vocab_word[i:]
+            if text1.endswith(part1) and text2.startswith(part2):
+                prefix_ok = (len(text1) == len(part1) or
+                             text1[-(len(part1)+1)] in BOUNDARY_CHARS)
+                suffix_ok = (len(text2) == len(part2) or
+                             text2[len(part2)] in BOUNDARY_CHARS)
+                if prefix_ok or suffix_ok:
+                    return vocab_word, part1
+    return None, None
+
+
+def naive_jieba_window(text1, text2):
+    """旧实现：每个断点对前后各 30 个字完整分词"""
+    window_size = 30
+    boundary = text1[-window_size:] + text2[:window_size]
+    split_pos = len(text1[-window_size:])
+    char_pos = 0
+    for token in list(jieba.cut(boundary)):
+        if char_pos < split_pos < char_pos + len(token):
+            return check_broken_token(token, split_pos - char_pos, text1, text2)
+        char_pos += len(token)
+    return False, None, None
+
+
+def generate_pairs(vocab, count, seed=1, broken_ratio=0.2):
+    """生成 count 条字幕的中文首行，返回相邻字幕对"""
+    rng = random.Random(seed)
+    chinese_terms = [w for w in vocab if not w.isascii()] or vocab
+    lines = []
+    carry = ""
+    for _ in range(count):
+        words = [FILLER[rng.randrange(len(FILLER) - 4):][:rng.randint(2, 4)] for _ in range(rng.randint(2, 5))]
+        words.insert(rng.randrange(len(words) + 1), rng.choice(chinese_terms))
+        text = carry + "，".join(words)
+        carry = ""
+        # 把一个术语切在两条字幕之间
+        if rng.random() < broken_ratio:
+            term = rng.choice([t for t in chinese_terms if len(t) >= 2])
+            cut = rng.randint(1, len(term) - 1)
+            text += "，" + term[:cut]
+            carry = term[cut:]
+        lines.append(text)
+    return list(zip(lines, lines[1:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fix_breaks 断点检测基准测试")
+    parser.add_argument("--cues", type=int, default=5000, help="字幕条数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快一次）")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    fixer = SubtitleBreakFixer()
+    vocab = fixer.custom_vocab
+    pairs = generate_pairs(vocab, args.cues, args.seed)
+    print(f"词汇表: {len(vocab)} 个术语，字幕对: {len(pairs)}\n")
+
+    def best_of(fn):
+        best = None
+        results = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = [fn(text1, text2) for text1, text2 in pairs]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, results
+
+    naive_seconds, naive_results = best_of(lambda t1, t2: naive_find_vocab_word(vocab, t1, t2))
+    trie_seconds, trie_results = best_of(fixer.find_vocab_word)
+
+    mismatches = sum(1 for a, b in zip(naive_results, trie_results) if a != b)
+    found = sum(1 for word, _ in trie_results if word)
+
+    print(f"{'实现':<10} {'耗时(s)':>10} {'每对(µs)':>10}")
+    print("-" * 32)
+    for name, seconds in (("逐词扫描", naive_seconds), ("字典树", trie_seconds)):
+        print(f"{name:<10} {seconds:>10.4f} {seconds / len(pairs) * 1e6:>10.1f}")
+    print(f"\n加速: {naive_seconds / trie_seconds:.1f}x，检测到 {found} 处断词，结果不一致: {mismatches}")
+
+    # jieba 分词检测
+    lines = [text1 for text1, _ in pairs] + [pairs[-1][1]]
+
+    def document_segmentation():
+        segmentation = DocumentSegmentation(lines)
+        return [segmentation.find_broken_word(i) for i in range(len(pairs))]
+
+    window_seconds, window_results = best_of(naive_jieba_window)
+    document_seconds = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        document_results = document_segmentation()
+        elapsed = time.perf_counter() - start
+        document_seconds = elapsed if document_seconds is None else min(document_seconds, elapsed)
+
+    # 窗口截断会让少数断点的分词结果不同
+    differences = sum(1 for a, b in zip(window_results, document_results) if a != b)
+    print(f"\n{'jieba':<10} {'耗时(s)':>10} {'每对(µs)':>10}")
+    print("-" * 32)
+    for name, seconds in (("逐断点窗口", window_seconds), ("整篇分词", document_seconds)):
+        print(f"{name:<10} {seconds:>10.4f} {seconds / len(pairs) * 1e6:>10.1f}")
+    print(f"\n加速: {window_seconds / document_seconds:.1f}x，结果不同的断点: {differences}")
+
+
+if __name__ == "__main__":
+    main()
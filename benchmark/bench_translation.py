@@ -0,0 +1,152 @@
+"""
+翻译流程的离线基准测试
+
+启动本地模拟 LLM 服务器，生成不同规模的合成字幕，用真实的 Translator +
+SmartSubtitleTranslator 跑两种翻译模式和不同并发数，输出吞吐、请求延迟百分位和内存。
+
+用法：
+    python -m benchmark.bench_translation
+    python -m benchmark.bench_translation --sizes 1000 --modes grouped --concurrency 1,8,32 \\
+        --latency lognormal:0.2,0.5 --error-rate 0.01 --output bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from core.logger import setup_logging
+from core.translator import Translator
+from core.subtitle_translator import SmartSubtitleTranslator
+from benchmark.mock_llm_server import MockLLMServer
+from benchmark.synth_srt import write_srt
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """进程的峰值常驻内存（MB），不支持的平台返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_once(server, srt_path, mode, concurrency, retry_delay, trace_memory):
+    translator = Translator({
+        'base_url': server.base_url,
+        'api_key': 'benchmark',
+        'model': 'mock-model',
+    })
+    subtitle_translator = SmartSubtitleTranslator(translator=translator, max_workers=concurrency)
+    subtitle_translator.TIMEOUT_RETRY_DELAY = retry_delay
+    subtitle_translator.ERROR_RETRY_DELAY = retry_delay
+    subtitle_translator.GROUP_RETRY_DELAY = retry_delay
+
+    server.reset_attempts()
+    before = server.stats()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "grouped":
+        subtitle_translator.process_subtitle_file_grouped(srt_path, "Chinese")
+    else:
+        subtitle_translator.process_subtitle_file(srt_path, "Chinese")
+    wall = time.perf_counter() - start
+    traced_peak = None
+    if trace_memory:
+        traced_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+    after = server.stats()
+
+    report = subtitle_translator.run_report.summary()
+    kind = "group" if mode == "grouped" else "line"
+    latency = report["requests"]["by_kind"].get(kind, {}).get("latency", {})
+    queue_wait = report["requests"]["by_kind"].get(kind, {}).get("queue_wait", {})
+    cues = report["info"]["subtitles"]
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "cues": cues,
+        "wall_seconds": round(wall, 3),
+        "cues_per_second": round(cues / wall, 1) if wall else None,
+        "requests": after["requests"] - before["requests"],
+        "server_errors": after["errors"] - before["errors"],
+        "latency_p50": latency.get("p50"),
+        "latency_p95": latency.get("p95"),
+        "latency_p99": latency.get("p99"),
+        "queue_wait_p50": queue_wait.get("p50"),
+        "stages": {name: s.get("total") for name, s in report["stages"].items()},
+        "traced_peak_mb": traced_peak,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_table(results):
+    header = f"{'mode':<8} {'conc':>4} {'cues':>6} {'wall(s)':>9} {'cues/s':>8} {'reqs':>6} " \
+             f"{'err':>4} {'p50':>7} {'p95':>7} {'p99':>7} {'rss MB':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        def fmt(v):
+            return f"{v:.3f}" if isinstance(v, float) else str(v)
+        print(f"{r['mode']:<8} {r['concurrency']:>4} {r['cues']:>6} {r['wall_seconds']:>9.2f} "
+              f"{r['cues_per_second']:>8} {r['requests']:>6} {r['server_errors']:>4} "
+              f"{fmt(r['latency_p50']):>7} {fmt(r['latency_p95']):>7} {fmt(r['latency_p99']):>7} "
+              f"{str(r['peak_rss_mb']):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕翻译流程离线基准测试")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="字幕条数，逗号分隔")
+    parser.add_argument("--modes", default="grouped,context", help="grouped / context")
+    parser.add_argument("--concurrency", default="1,4,16", help="并发数，逗号分隔")
+    parser.add_argument("--latency", default="fixed:0.02", help="模拟服务器延迟分布")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--retry-delay", type=float, default=0.0, help="重试前等待秒数（真实默认为 10/60）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--trace-memory", action="store_true", help="用 tracemalloc 统计 Python 内存峰值（较慢）")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--log-level", default="ERROR", help="翻译流程的日志级别")
+    args = parser.parse_args()
+    setup_logging(level=args.log_level)
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    modes = args.modes.split(',')
+    concurrencies = [int(c) for c in args.concurrency.split(',')]
+
+    results = []
+    with MockLLMServer(latency=args.latency, error_rate=args.error_rate,
+                       tokens_per_second=args.tokens_per_second, seed=args.seed) as server:
+        print(f"模拟服务器: {server.base_url}  延迟={args.latency}  错误率={args.error_rate}\n")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size in sizes:
+                srt_path = write_srt(os.path.join(tmp_dir, f"synthetic_{size}.srt"), size, args.seed)
+                for mode in modes:
+                    for concurrency in concurrencies:
+                        print(f"运行: {size} 条 / {mode} / 并发 {concurrency} ...", flush=True)
+                        results.append(run_once(server, srt_path, mode, concurrency,
+                                                args.retry_delay, args.trace_memory))
+
+    print()
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
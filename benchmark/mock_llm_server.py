@@ -0,0 +1,231 @@
+"""
+离线基准测试用的 OpenAI 兼容模拟服务器
+
+POST /v1/chat/completions（或 /chat/completions）返回逐行加上 "译文：" 前缀的用户消息，
+保持行数不变，因此分组翻译的拆分逻辑与真实 API 一致。
+POST /api/chat 以 Ollama 原生格式返回同样的内容。
+
+延迟、错误和输出速度由模型名、最后一条用户消息（待翻译的文本）、该消息第几次被请求（重试）
+和随机种子共同决定，不看系统提示词：逐条上下文翻译的提示词里带有之前的译文，
+内容取决于完成顺序，若按整个请求取随机数，不同并发下的错误数会不同。
+因此每条不同的待翻译文本在任意并发下得到同样的延迟和错误序列；
+相同文本的多个请求（如重复的台词）共用重试计数，它们之间的先后仍取决于到达顺序。
+
+用法：
+    python -m benchmark.mock_llm_server --port 8765 --latency lognormal:0.2,0.5 --error-rate 0.01
+"""
+
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec):
+    """
+    解析延迟分布，返回 f(rng) -> 秒
+        fixed:0.05              固定延迟
+        uniform:0.02,0.2        均匀分布
+        lognormal:0.2,0.5       对数正态分布（中位数, sigma）
+        exponential:0.1         指数分布（均值）
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(',') if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1 / values[0])
+    raise ValueError(f"未知的延迟分布: {spec}")
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class MockLLMServer:
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0.02", error_rate=0.0,
+                 tokens_per_second=0.0, seed=42):
+        """
+        Args:
+            latency: 首 token 前的延迟分布，格式见 parse_latency
+            error_rate: 返回 HTTP 500 的概率
+            tokens_per_second: 输出速度，0 表示不额外等待
+            seed: 随机种子
+        """
+        self.latency_spec = latency
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.tokens_per_second = tokens_per_second
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._attempts = {}
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0
+        self.last_payload = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                path = self.path.rstrip('/')
+                if not (path.endswith("/chat/completions") or path.endswith("/api/chat")):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                status, body = server.handle(payload)
+                if path.endswith("/api/chat") and status == 200:
+                    body = server.to_ollama(body)
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _rng_for(self, payload):
+        # 稳定的请求键：不包含系统提示词（其中的上下文随完成顺序变化）
+        messages = payload.get("messages", [])
+        user_text = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        key = json.dumps([payload.get("model"), user_text], ensure_ascii=False)
+        digest = hashlib.sha256(f"{self.seed}:{key}".encode('utf-8')).digest()
+        # 同一请求的重试使用不同的随机序列，否则出错的请求会一直出错
+        with self._lock:
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return random.Random(int.from_bytes(digest[:8], 'big') + attempt)
+
+    def handle(self, payload):
+        messages = payload.get("messages", [])
+        user_text = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        prompt_text = "\n".join(m.get("content", "") for m in messages)
+        rng = self._rng_for(payload)
+
+        with self._lock:
+            self.last_payload = payload
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(max(0.0, self.latency(rng)))
+
+            if rng.random() < self.error_rate:
+                with self._lock:
+                    self.errors += 1
+                return 500, {"error": {"message": "mock server error", "type": "server_error"}}
+
+            content = "\n".join(f"译文：{line}" for line in user_text.split('\n'))
+            completion_tokens = estimate_tokens(content)
+            if self.tokens_per_second > 0:
+                time.sleep(completion_tokens / self.tokens_per_second)
+
+            return 200, {
+                "id": f"mock-{rng.getrandbits(32):08x}",
+                "object": "chat.completion",
+                "model": payload.get("model", "mock-model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": estimate_tokens(prompt_text),
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": estimate_tokens(prompt_text) + completion_tokens,
+                },
+            }
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def to_ollama(body):
+        """OpenAI 格式的响应转换为 Ollama /api/chat 格式"""
+        return {
+            "model": body["model"],
+            "message": body["choices"][0]["message"],
+            "done": True,
+            "prompt_eval_count": body["usage"]["prompt_tokens"],
+            "eval_count": body["usage"]["completion_tokens"],
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_attempts(self):
+        """清空重试计数：每次基准运行前调用，各次运行从相同的随机序列开始"""
+        with self._lock:
+            self._attempts.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors,
+                    "max_in_flight": self.max_in_flight}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的模拟 LLM 服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0.02", help="延迟分布，如 lognormal:0.2,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.error_rate,
+                           args.tokens_per_second, args.seed)
+    print(f"模拟服务器运行中: {server.base_url}（Ctrl+C 退出）")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
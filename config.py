@@ -1,6 +1,7 @@
 import os
 import json
 import hashlib
+import threading
 from typing import List, Dict, Any
 
 class ConfigManager:
@@ -41,7 +42,16 @@ class ConfigManager:
                 "target_lang": "Chinese",
                 "max_tokens": 4096,
                 "last_used_api": "OpenAI"  # 新增最后使用的API记录
-            }
+            },
+            # 预算上限：max_cost（美元）/ max_tokens 为 null 表示只统计不限制
+            # action: stop / pause / downgrade
+            "budget": {
+                "max_cost": None,
+                "max_tokens": None,
+                "action": "stop"
+            },
+            # 自定义价格（每百万 token 美元）：{"模型名": [输入价, 输出价]}
+            "pricing": {}
         }
 
         # 如果配置文件不存在，创建它
@@ -126,5 +136,27 @@ class ConfigManager:
     def get_last_used_api(self) -> str:
         return self.config['default_settings'].get('last_used_api', 'OpenAI')
 
-# 全局配置管理器
-config_manager = ConfigManager()
+    def get_budget_settings(self) -> Dict[str, Any]:
+        return self.config.get('budget', {})
+
+    def get_pricing(self) -> Dict[str, List[float]]:
+        return self.config.get('pricing', {})
+
+# 全局配置管理器：第一次访问 config.config_manager 时才读取（或创建）config.json，
+# 导入本模块本身不读写磁盘
+_config_manager = None
+_config_lock = threading.Lock()
+
+def get_config_manager() -> ConfigManager:
+    global _config_manager
+    if _config_manager is None:
+        with _config_lock:
+            if _config_manager is None:
+                _config_manager = ConfigManager()
+    return _config_manager
+
+def __getattr__(name):
+    # 兼容 from config import config_manager
+    if name == "config_manager":
+        return get_config_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,18 +2,86 @@
 """
 YouTube Thumbnail to 4:3 Converter
 Expands canvas to 4:3 ratio while keeping original image unchanged
+
+Usage:
+    python convert_thumbnail_4x3.py                     # latest jpg in current directory
+    python convert_thumbnail_4x3.py thumb.jpg --blur
+    python convert_thumbnail_4x3.py thumbnails/ --blur -j 8
 """
 
 import sys
 import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from PIL import Image, ImageFilter
 
-def expand_to_43(input_file):
+BLUR_RADIUS = 40
+# Fast blur works at 1/BLUR_SCALE resolution; a radius-40 blur removes all detail
+# finer than that anyway, so the upsampled background looks the same
+BLUR_SCALE = 8
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+OUTPUT_SUFFIXES = ('_4x3', '_4x3_blur')
+
+def output_path(input_file, suffix):
+    root, ext = os.path.splitext(input_file)
+    return f"{root}{suffix}{ext}"
+
+def blurred_background(img, size, fast=True):
+    """
+    Stretch img to size and blur it
+
+    The fast path shrinks straight to 1/BLUR_SCALE of the canvas, blurs with a
+    proportionally smaller radius and scales back up, instead of resizing to the
+    full canvas with LANCZOS and blurring every full-resolution pixel.
+    """
+    if not fast:
+        bg = img.resize(size, Image.Resampling.LANCZOS)
+        return bg.filter(ImageFilter.GaussianBlur(radius=BLUR_RADIUS))
+
+    small_size = (max(1, size[0] // BLUR_SCALE), max(1, size[1] // BLUR_SCALE))
+    bg = img.resize(small_size, Image.Resampling.BOX)
+    bg = bg.filter(ImageFilter.GaussianBlur(radius=BLUR_RADIUS / BLUR_SCALE))
+    return bg.resize(size, Image.Resampling.BILINEAR)
+
+def convert_image(input_file, blur=False, fast_blur=True):
+    """
+    Decode input_file once and write the 4:3 versions built from it
+
+    Returns:
+        List of created file paths
+    """
+    with Image.open(input_file) as src:
+        img = src.convert('RGB')
+    canvas_width = img.width
+    canvas_height = int(img.width * 3 / 4)
+    pad_top = (canvas_height - img.height) // 2
+
+    created_files = []
+
+    canvas_black = Image.new('RGB', (canvas_width, canvas_height), (0, 0, 0))
+    canvas_black.paste(img, (0, pad_top))
+    output_black = output_path(input_file, '_4x3')
+    canvas_black.save(output_black, quality=95)
+    created_files.append(output_black)
+
+    if blur:
+        bg = blurred_background(img, (canvas_width, canvas_height), fast=fast_blur)
+        # Paste original sharp image centered
+        bg.paste(img, (0, pad_top))
+        output_blur = output_path(input_file, '_4x3_blur')
+        bg.save(output_blur, quality=95)
+        created_files.append(output_blur)
+
+    return created_files
+
+def expand_to_43(input_file, blur=None, fast_blur=True):
     """
     Expand image canvas to 4:3 ratio by adding padding
     
     Args:
         input_file: Path to input image (typically 1280x720 YouTube thumbnail)
+        blur: Also create the blurred-background version (None: ask)
+        fast_blur: Blur at reduced resolution (see blurred_background)
     
     Returns:
         List of created file paths
@@ -23,8 +91,8 @@ def expand_to_43(input_file):
         return []
     
     try:
-        img = Image.open(input_file)
-        orig_width, orig_height = img.size
+        with Image.open(input_file) as img:
+            orig_width, orig_height = img.size
         print(f"\n{'='*60}")
         print(f"Original image: {orig_width}x{orig_height}")
         print(f"{'='*60}")
@@ -42,38 +110,19 @@ def expand_to_43(input_file):
         print(f"Original image will be centered (unchanged)")
         print(f"{'='*60}\n")
         
-        created_files = []
-        
-        # Method 1: Black borders
-        print("Creating version with black borders...")
-        output_black = input_file.replace('.jpg', '_4x3.jpg')
-        canvas_black = Image.new('RGB', (canvas_width, canvas_height), (0, 0, 0))
-        canvas_black.paste(img, (0, pad_top))
-        canvas_black.save(output_black, quality=95)
-        print(f"✓ Created: {os.path.basename(output_black)}")
-        created_files.append(output_black)
-        
-        # Method 2: Blurred background (optional)
-        print("\n" + "="*60)
-        print("Blurred background creates a more aesthetic look")
-        print("(The original image remains sharp and centered)")
-        print("="*60)
-        
-        choice = input("\nCreate blurred version? (y/n, default: n): ").strip().lower()
-        
-        if choice == 'y':
-            print("\nCreating version with blurred background...")
-            output_blur = input_file.replace('.jpg', '_4x3_blur.jpg')
+        if blur is None:
+            # Method 2: Blurred background (optional)
+            print("="*60)
+            print("Blurred background creates a more aesthetic look")
+            print("(The original image remains sharp and centered)")
+            print("="*60)
             
-            # Create blurred background by stretching original
-            bg = img.resize((canvas_width, canvas_height), Image.Resampling.LANCZOS)
-            bg = bg.filter(ImageFilter.GaussianBlur(radius=40))
-            
-            # Paste original sharp image centered
-            bg.paste(img, (0, pad_top))
-            bg.save(output_blur, quality=95)
-            print(f"✓ Created: {os.path.basename(output_blur)}")
-            created_files.append(output_blur)
+            choice = input("\nCreate blurred version? (y/n, default: n): ").strip().lower()
+            blur = choice == 'y'
+        
+        created_files = convert_image(input_file, blur=blur, fast_blur=fast_blur)
+        for f in created_files:
+            print(f"✓ Created: {os.path.basename(f)}")
         
         print(f"\n{'='*60}")
         print(f"Conversion complete! Created {len(created_files)} file(s)")
@@ -87,38 +136,91 @@ def expand_to_43(input_file):
         traceback.print_exc()
         return []
 
+def list_thumbnails(folder):
+    """JPEG files in folder, skipping outputs of earlier runs"""
+    files = []
+    for name in sorted(os.listdir(folder)):
+        root, ext = os.path.splitext(name)
+        if ext.lower() in IMAGE_EXTENSIONS and not root.endswith(OUTPUT_SUFFIXES):
+            files.append(os.path.join(folder, name))
+    return files
+
+def convert_folder(folder, blur=False, fast_blur=True, jobs=None):
+    """
+    Convert every thumbnail in folder with a process pool
+
+    Each worker decodes its image once and writes both versions from it.
+
+    Returns:
+        (list of created file paths, list of (input file, error) for failures)
+    """
+    files = list_thumbnails(folder)
+    created, failed = [], []
+    if not files:
+        return created, failed
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(convert_image, f, blur, fast_blur): f for f in files}
+        for n, future in enumerate(as_completed(futures), 1):
+            input_file = futures[future]
+            try:
+                created.extend(future.result())
+                print(f"[{n}/{len(files)}] ✓ {os.path.basename(input_file)}")
+            except Exception as e:
+                failed.append((input_file, e))
+                print(f"[{n}/{len(files)}] ✗ {os.path.basename(input_file)}: {e}")
+    return created, failed
+
+def find_latest_jpg():
+    # 如果没有提供参数，自动查找当前目录最新的 jpg 文件
+    print("\n" + "="*60)
+    print("No filename provided, searching for latest jpg...")
+    print("="*60)
+    
+    import glob
+    
+    jpg_files = glob.glob("*.jpg")
+    if not jpg_files:
+        print("Error: No jpg files found in current directory")
+        sys.exit(1)
+    
+    # 按修改时间排序，取最新的
+    jpg_files.sort(key=os.path.getmtime, reverse=True)
+    print(f"Found latest file: {jpg_files[0]}\n")
+    return jpg_files[0]
+
 def main():
     """Main entry point"""
-    
-    # 如果没有提供参数，自动查找当前目录最新的 jpg 文件
-    if len(sys.argv) < 2:
-        print("\n" + "="*60)
-        print("No filename provided, searching for latest jpg...")
-        print("="*60)
-        
-        import glob
-        import time
-        
-        jpg_files = glob.glob("*.jpg")
-        if not jpg_files:
-            print("Error: No jpg files found in current directory")
-            sys.exit(1)
-        
-        # 按修改时间排序，取最新的
-        jpg_files.sort(key=os.path.getmtime, reverse=True)
-        input_file = jpg_files[0]
-        print(f"Found latest file: {input_file}\n")
-    else:
-        input_file = sys.argv[1]
-        # Handle quoted paths
-        input_file = input_file.strip('"')
+    parser = argparse.ArgumentParser(description="Expand thumbnails to 4:3")
+    parser.add_argument("input", nargs="?", help="Image file or folder (default: latest jpg here)")
+    blur_group = parser.add_mutually_exclusive_group()
+    blur_group.add_argument("--blur", dest="blur", action="store_true", default=None,
+                            help="Also create the blurred-background version")
+    blur_group.add_argument("--no-blur", dest="blur", action="store_false",
+                            help="Only create the black-border version")
+    parser.add_argument("--exact-blur", action="store_true",
+                        help="Blur at full resolution (slow, original behaviour)")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes for a folder (default: CPU count)")
+    args = parser.parse_args()
+
+    # Handle quoted paths
+    input_path = args.input.strip('"') if args.input else find_latest_jpg()
+    fast_blur = not args.exact_blur
     
     print("\n" + "="*60)
     print("YouTube Thumbnail to 4:3 Converter")
     print("="*60)
-    print(f"Input: {input_file}")
+    print(f"Input: {input_path}")
+
+    if os.path.isdir(input_path):
+        created, failed = convert_folder(input_path, blur=bool(args.blur), fast_blur=fast_blur,
+                                         jobs=args.jobs)
+        print(f"\nConversion complete! Created {len(created)} file(s), {len(failed)} failed")
+        if failed or not created:
+            sys.exit(1)
+        return
     
-    created = expand_to_43(input_file)
+    created = expand_to_43(input_path, blur=args.blur, fast_blur=fast_blur)
     
     if created:
         print("\nOutput files:")
@@ -129,4 +231,4 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,271 @@
+"""
+Token 与费用预算管理
+
+- 优先使用 API 返回的 usage 统计 token，没有 usage 时用 tiktoken 估算
+- 按文件、按服务商（api_type / 模型）、按整次运行分别累计 token 和估算费用
+- 可设置上限（费用或 token），达到上限后：
+    stop       抛出 BudgetExceededError，停止后续请求
+    pause      阻塞后续请求，直到调用 resume() 提高上限，或 cancel() 放弃（界面会弹窗询问）
+    downgrade  达到 downgrade_ratio 时切换到配置中更便宜的模型，达到上限后停止
+"""
+
+import json
+import time
+import threading
+
+from core.logger import get_logger
+
+logger = get_logger("budget")
+
+# 每百万 token 的美元价格 (输入, 输出)，仅用于估算；可在 config.json 的 "pricing" 中覆盖
+DEFAULT_PRICES = {
+    "gpt-5": (1.25, 10.0),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4": (30.0, 60.0),
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "deepseek-chat": (0.27, 1.1),
+    "deepseek-reasoner": (0.55, 2.19),
+}
+
+BUDGET_ACTIONS = ("stop", "pause", "downgrade")
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+class BudgetExceededError(Exception):
+    """预算已用完"""
+
+
+def estimate_tokens(text):
+    """用 tiktoken 估算 token 数；tiktoken 不可用时按字符粗略估算"""
+    global _tokenizer
+    if not text:
+        return 0
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                try:
+                    import tiktoken
+                    _tokenizer = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    logger.warning("tiktoken 不可用，使用字符数估算 token: %s", e)
+                    _tokenizer = False
+    if _tokenizer:
+        return len(_tokenizer.encode(text))
+    # 中日韩字符约 1 token/字，其余约 4 字符/token
+    cjk = sum(1 for c in text if '　' <= c <= '鿿' or '가' <= c <= '힯')
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _new_totals():
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "estimated_requests": 0, "cost": 0.0}
+
+
+class BudgetManager:
+    def __init__(self, max_cost=None, max_tokens=None, action="stop", prices=None,
+                 models=None, downgrade_ratio=0.8, on_pause=None):
+        """
+        Args:
+            max_cost: 整次运行的费用上限（美元），None 表示不限
+            max_tokens: 整次运行的 token 上限，None 表示不限
+            action: 达到上限时的处理方式，见模块说明
+            prices: 额外的价格表 {模型: (输入价, 输出价)}，覆盖默认价格
+            models: 当前 API 配置的模型列表，用于 downgrade
+            downgrade_ratio: downgrade 模式下，用量达到上限的该比例时切换模型
+            on_pause: pause 模式下开始暂停时调用（无参数，在请求线程中调用，不应阻塞），
+                      调用方据此让用户选择 resume() 或 cancel()
+        """
+        if action not in BUDGET_ACTIONS:
+            raise ValueError(f"未知的预算动作: {action}，可选 {BUDGET_ACTIONS}")
+        self.max_cost = max_cost
+        self.max_tokens = max_tokens
+        self.action = action
+        self.prices = dict(DEFAULT_PRICES)
+        self.prices.update({k: tuple(v) for k, v in (prices or {}).items()})
+        self.models = list(models or [])
+        self.downgrade_ratio = downgrade_ratio
+        self.on_pause = on_pause
+
+        self._lock = threading.Lock()
+        self._resume = threading.Event()
+        self._resume.set()
+        self.started_at = time.time()
+        self.current_file = None
+        self.run = _new_totals()
+        self.files = {}
+        self.providers = {}
+        self.downgrades = []
+        # downgrade 后使用的模型（None 表示未降级）
+        self.downgraded_model = None
+        self.exceeded = False
+        self.cancelled = False
+
+    @classmethod
+    def from_settings(cls, settings, pricing=None, models=None, on_pause=None):
+        """从 config.json 的 budget 设置创建，settings 为空时只统计不限制"""
+        settings = settings or {}
+        return cls(
+            max_cost=settings.get("max_cost"),
+            max_tokens=settings.get("max_tokens"),
+            action=settings.get("action", "stop"),
+            prices=pricing,
+            models=models,
+            downgrade_ratio=settings.get("downgrade_ratio", 0.8),
+            on_pause=on_pause,
+        )
+
+    def price_of(self, model):
+        """模型价格；价格表中没有的模型按最长前缀匹配，仍找不到则返回 None（费用计为 0）"""
+        if model in self.prices:
+            return self.prices[model]
+        matches = [name for name in self.prices if model and model.startswith(name)]
+        if matches:
+            return self.prices[max(matches, key=len)]
+        return None
+
+    def cost_of(self, model, prompt_tokens, completion_tokens):
+        price = self.price_of(model)
+        if price is None:
+            return 0.0
+        return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+    def start_file(self, name):
+        """开始统计一个新文件"""
+        with self._lock:
+            self.current_file = name
+            self.files.setdefault(name, _new_totals())
+
+    def record(self, provider, model, prompt_tokens, completion_tokens, estimated=False):
+        """记录一次请求的用量"""
+        cost = self.cost_of(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            buckets = [self.run, self.providers.setdefault(f"{provider}/{model}", _new_totals())]
+            if self.current_file is not None:
+                buckets.append(self.files.setdefault(self.current_file, _new_totals()))
+            for totals in buckets:
+                totals["requests"] += 1
+                totals["prompt_tokens"] += prompt_tokens
+                totals["completion_tokens"] += completion_tokens
+                totals["cost"] += cost
+                if estimated:
+                    totals["estimated_requests"] += 1
+        return cost
+
+    def record_response(self, translator, prompt_text, response_text, model=None):
+        """根据翻译器的 last_usage 记录用量，没有 usage 时估算；model 为这次请求实际使用的模型"""
+        provider = getattr(translator, 'api_type', 'unknown')
+        model = model or getattr(translator, 'model', None)
+        usage = getattr(translator, 'last_usage', None)
+        if usage:
+            return self.record(provider, model, usage.get('prompt_tokens', 0),
+                               usage.get('completion_tokens', 0))
+        return self.record(provider, model, estimate_tokens(prompt_text),
+                           estimate_tokens(response_text or ""), estimated=True)
+
+    def _usage_ratio(self):
+        ratios = []
+        if self.max_cost:
+            ratios.append(self.run["cost"] / self.max_cost)
+        if self.max_tokens:
+            ratios.append((self.run["prompt_tokens"] + self.run["completion_tokens"]) / self.max_tokens)
+        return max(ratios) if ratios else 0.0
+
+    def _cheaper_model(self, current):
+        current_price = self.price_of(current)
+        if current_price is None:
+            return None
+        candidates = [
+            (sum(self.price_of(m)), m) for m in self.models
+            if m != current and self.price_of(m) is not None
+            and sum(self.price_of(m)) < sum(current_price)
+        ]
+        return min(candidates)[1] if candidates else None
+
+    def before_request(self, translator=None):
+        """
+        每次请求 API 前调用。超出预算时按 action 处理：
+        抛出 BudgetExceededError、阻塞等待 resume()，或降级到更便宜的模型。
+
+        Returns:
+            这次请求应使用的模型；没有降级时为 None（使用 translator.model）。
+            降级只记录在预算管理器中，不修改多个线程共用的 translator.model，
+            已经发出的请求不受影响。
+        """
+        while True:
+            self._resume.wait()
+            paused = False
+            with self._lock:
+                if self.cancelled:
+                    raise BudgetExceededError("已达到预算上限，翻译已取消")
+                ratio = self._usage_ratio()
+
+                if self.action == "downgrade" and translator is not None and ratio >= self.downgrade_ratio:
+                    current = self.downgraded_model or getattr(translator, 'model', None)
+                    cheaper = self._cheaper_model(current)
+                    if cheaper:
+                        logger.warning("预算已用 %.0f%%，模型从 %s 切换到 %s",
+                                       ratio * 100, current, cheaper)
+                        self.downgrades.append({"from": current, "to": cheaper,
+                                                "usage_ratio": round(ratio, 4)})
+                        self.downgraded_model = cheaper
+
+                if ratio < 1:
+                    return self.downgraded_model
+
+                self.exceeded = True
+                if self.action != "pause":
+                    raise BudgetExceededError(
+                        f"已达到预算上限（费用 ${self.run['cost']:.4f}，"
+                        f"token {self.run['prompt_tokens'] + self.run['completion_tokens']}）"
+                    )
+                if self._resume.is_set():
+                    logger.warning("已达到预算上限，暂停后续请求，等待 resume()")
+                    self._resume.clear()
+                    paused = True
+            # 在锁外通知，回调里可以直接调用 resume() / cancel()
+            if paused and self.on_pause:
+                try:
+                    self.on_pause()
+                except Exception as e:
+                    logger.warning("预算暂停回调出错: %s", e)
+
+    def resume(self, max_cost=None, max_tokens=None):
+        """提高上限并恢复被 pause 阻塞的请求"""
+        with self._lock:
+            if max_cost is not None:
+                self.max_cost = max_cost
+            if max_tokens is not None:
+                self.max_tokens = max_tokens
+            self.exceeded = False
+        self._resume.set()
+
+    def cancel(self):
+        """放弃被 pause 阻塞的请求：等待中的和之后的请求都抛出 BudgetExceededError"""
+        with self._lock:
+            self.cancelled = True
+        self._resume.set()
+
+    def summary(self):
+        def rounded(totals):
+            return dict(totals, cost=round(totals["cost"], 6))
+
+        with self._lock:
+            return {
+                "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+                "limits": {"max_cost": self.max_cost, "max_tokens": self.max_tokens,
+                           "action": self.action},
+                "exceeded": self.exceeded,
+                "run": rounded(self.run),
+                "files": {name: rounded(t) for name, t in self.files.items()},
+                "providers": {name: rounded(t) for name, t in self.providers.items()},
+                "downgrades": list(self.downgrades),
+                "note": "费用按价格表估算，仅供参考",
+            }
+
+    def write_summary(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return path
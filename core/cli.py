@@ -0,0 +1,171 @@
+"""
+无界面命令行入口
+
+与界面翻译使用同一套 SmartSubtitleTranslator，界面上的设置都可以用参数指定，
+不导入 tkinter / customtkinter，可在没有显示器的服务器上运行，
+多个进程可以由任务调度器并行启动（每个进程处理自己的文件列表）。
+
+用法：
+    python -m core.cli translate a.srt b.srt --api DeepSeek --model deepseek-chat
+    python -m core.cli translate season/ --mode context --workers 8 --vocab 术语列表.txt --max-cost 2
+
+退出码：0 全部成功；1 有文件失败或达到预算上限；2 参数错误
+"""
+
+import os
+import sys
+import argparse
+
+from core.logger import get_logger, setup_logging
+
+logger = get_logger("cli")
+
+MODES = ("grouped", "context")
+
+def expand_inputs(paths):
+    """展开输入：文件原样保留，目录取其中的 .srt 文件（按文件名排序）"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith('.srt'))
+        else:
+            files.append(path)
+    return files
+
+def load_vocab(vocab_file):
+    """读取专用词汇文件，每行一条（与界面“添加专用词汇”的格式相同），# 开头为注释"""
+    with open(vocab_file, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def print_progress(stage, current, total, extra_info=""):
+    """进度回调：只输出阶段变化和完成信息，逐条进度交给日志采样"""
+    if stage in ("content_analysis", "translation_start", "rebuilding", "completed", "error"):
+        logger.info("%s %s", stage, extra_info or (f"{current}/{total}" if total else ""))
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core.cli", description="字幕翻译（无界面）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("translate", help="翻译 SRT 文件")
+    p.add_argument("inputs", nargs="+", help="SRT 文件或包含 SRT 文件的目录")
+    p.add_argument("--config", help="配置文件路径（默认为当前目录的 config.json）")
+    p.add_argument("--api", help="config.json 中的 API 名称（默认为上次使用的 API）")
+    p.add_argument("--model", help="模型（默认为该 API 的第一个模型）")
+    p.add_argument("--api-key", help="API Key（默认读取环境变量 SRT_API_KEY，其次为 config.json）")
+    p.add_argument("--base-url", help="覆盖 config.json 中的基础 URL")
+    p.add_argument("--source", default="English", help="源语言")
+    p.add_argument("--target", default="Chinese", help="目标语言")
+    p.add_argument("--mode", choices=MODES, default="grouped",
+                   help="grouped：按说话人分组（默认）；context：逐条上下文翻译")
+    p.add_argument("--workers", type=int, default=5, help="并发数")
+    p.add_argument("--temperature", type=float, default=0.7, help="温度")
+    p.add_argument("--vocab", help="专用词汇文件，每行一条")
+    p.add_argument("--term", action="append", default=[], help="专用词汇（可重复，如 --term '连姆 LIAM'）")
+    p.add_argument("--fix-breaks", action="store_true", help="翻译后修复专有名词断句")
+    p.add_argument("--max-cost", type=float, help="费用上限（美元），覆盖 config.json")
+    p.add_argument("--max-tokens", type=int, help="token 上限，覆盖 config.json")
+    p.add_argument("--budget-action", choices=["stop", "downgrade"],
+                   help="达到上限时的处理方式，覆盖 config.json（无界面时 pause 按 stop 处理）")
+    p.add_argument("--summary", help="费用汇总输出路径（默认为第一个文件所在目录的 translation_cost_summary.json）")
+    p.add_argument("--log-level", default=None, help="日志级别（默认读取 SRT_LOG_LEVEL）")
+    p.set_defaults(func=run_translate)
+    return parser
+
+def run_translate(args, parser):
+    # 翻译相关模块在解析参数之后再导入，--help 和参数错误不需要加载它们
+    from config import ConfigManager, config_manager
+    from core.translator import Translator
+    from core.subtitle_translator import SmartSubtitleTranslator
+    from core.metrics import get_default_metrics
+    from core.budget import BudgetManager, BudgetExceededError
+
+    config = ConfigManager(args.config) if args.config else config_manager
+    api_name = args.api or config.get_last_used_api()
+    api_config = next((api for api in config.get_apis() if api['name'] == api_name), None)
+    if not api_config:
+        parser.error(f"未找到 API 配置: {api_name}")
+
+    files = expand_inputs(args.inputs)
+    missing = [path for path in files if not os.path.isfile(path)]
+    if missing:
+        parser.error(f"文件不存在: {', '.join(missing)}")
+    if not files:
+        parser.error("没有找到 SRT 文件")
+
+    api_key = args.api_key or os.environ.get("SRT_API_KEY") or api_config.get('api_key', '')
+    translator = Translator({
+        'base_url': args.base_url or api_config['base_url'],
+        'api_key': api_key,
+        'api_type': api_config['api_type'],
+        'model': args.model or api_config['models'][0],
+    })
+
+    custom_vocab = (load_vocab(args.vocab) if args.vocab else []) + args.term
+    break_fixer = None
+    if args.fix_breaks:
+        from fix_breaks import SubtitleBreakFixer
+        break_fixer = SubtitleBreakFixer(custom_vocab=custom_vocab or None)
+
+    budget_settings = dict(config.get_budget_settings())
+    for key in ("max_cost", "max_tokens"):
+        if getattr(args, key) is not None:
+            budget_settings[key] = getattr(args, key)
+    if args.budget_action:
+        budget_settings["action"] = args.budget_action
+    if budget_settings.get("action") == "pause":
+        # 没有界面可以提高上限，pause 会一直阻塞
+        logger.warning("无界面运行不支持 pause，达到预算上限时停止")
+        budget_settings["action"] = "stop"
+    budget = BudgetManager.from_settings(
+        budget_settings,
+        pricing=config.get_pricing(),
+        models=api_config.get('models', [])
+    )
+
+    subtitle_translator = SmartSubtitleTranslator(
+        translator=translator,
+        max_workers=args.workers,
+        custom_vocab=custom_vocab,
+        progress_callback=print_progress,
+        temperature=args.temperature,
+        metrics=get_default_metrics(),
+        budget=budget,
+        break_fixer=break_fixer,
+    )
+    subtitle_translator.source_language = args.source
+
+    failed = 0
+    for index, file_path in enumerate(files, 1):
+        logger.info("处理文件 %d/%d: %s", index, len(files), file_path)
+        try:
+            if args.mode == "grouped":
+                output_path, _ = subtitle_translator.process_subtitle_file_grouped(file_path, args.target)
+            else:
+                output_path, _ = subtitle_translator.process_subtitle_file(file_path, args.target)
+            print(output_path)
+        except BudgetExceededError as e:
+            failed += len(files) - index + 1
+            logger.error("%s，剩余 %d 个文件未处理", e, len(files) - index)
+            break
+        except Exception as e:
+            failed += 1
+            logger.error("处理 %s 时出错: %s", file_path, e)
+
+    summary_path = args.summary or os.path.join(
+        os.path.dirname(os.path.abspath(files[0])), "translation_cost_summary.json"
+    )
+    budget.write_summary(summary_path)
+    run_cost = budget.summary()["run"]
+    logger.info("完成 %d/%d 个文件，token: %d，估算费用: $%.4f", len(files) - failed, len(files),
+                run_cost['prompt_tokens'] + run_cost['completion_tokens'], run_cost['cost'])
+    return 1 if failed else 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    setup_logging(args.log_level)
+    return args.func(args, parser)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,11 @@
 import os
 import json
-import chardet
-import tkinter as tk
-from tkinter import filedialog
 
 class FileHandler:
     @staticmethod
     def detect_encoding(file_path):
+        import chardet
+
         with open(file_path, 'rb') as file:
             raw_data = file.read()
             result = chardet.detect(raw_data)
@@ -33,6 +32,10 @@ class FileHandler:
 
     @staticmethod
     def select_files():
+        # 只有选择文件时才需要 tkinter，命令行使用时不导入
+        import tkinter as tk
+        from tkinter import filedialog
+
         root = tk.Tk()
         root.withdraw()
         file_paths = filedialog.askopenfilenames(
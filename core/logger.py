@@ -0,0 +1,175 @@
+"""
+结构化日志模块
+
+- 所有模块通过 get_logger() 获取 "srt_translator" 命名空间下的 logger
+- setup_logging() 在入口处调用一次：日志记录只入队（QueueHandler），
+  格式化与写入由后台 QueueListener 线程完成，翻译线程不会阻塞在 stdout 上
+- 逐条请求的明细日志带 extra={'sampled': True}，按采样率输出
+- 完整的请求/响应内容只在 DEBUG 级别输出
+
+环境变量（作为 setup_logging 的默认值）：
+    SRT_LOG_LEVEL   日志级别，默认 INFO
+    SRT_LOG_SAMPLE  明细日志采样率（0~1），默认 0.05
+    SRT_LOG_FORMAT  text 或 json，默认 text
+    SRT_LOG_FILE    额外写入的日志文件路径（可选）
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import itertools
+import threading
+import logging.handlers
+
+LOGGER_NAME = "srt_translator"
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+def get_logger(name=None):
+    """获取项目 logger，name 为子模块名（如 "translator"）"""
+    if not name:
+        return logging.getLogger(LOGGER_NAME)
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+class SamplingFilter(logging.Filter):
+    """
+    对标记了 sampled=True 的记录按固定间隔采样，其余记录全部放行。
+    DEBUG 级别下不采样，便于排查问题。
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self._interval = max(1, int(round(1 / rate))) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False):
+            return True
+        if record.levelno <= logging.DEBUG or self.rate >= 1:
+            return True
+        if self._interval == 0:
+            return False
+        return next(self._counter) % self._interval == 0
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    输出 "时间 级别 模块: 消息 key=value ..." 或单行 JSON。
+    结构化字段通过 extra={'fields': {...}} 传入。
+    """
+
+    def __init__(self, json_format=False):
+        super().__init__()
+        self.json_format = json_format
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        message = record.getMessage()
+
+        if self.json_format:
+            entry = {
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "thread": record.threadName,
+                "msg": message,
+            }
+            entry.update(fields)
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, ensure_ascii=False, default=str)
+
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        line = f"{timestamp} {record.levelname:<7} {record.name}: {message}"
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def setup_logging(level=None, sample_rate=None, json_format=None, log_file=None):
+    """
+    配置非阻塞日志。可重复调用，后一次调用会替换之前的配置。
+
+    Args:
+        level: 日志级别（名称或数值）
+        sample_rate: 逐条请求明细的采样率，1 表示全部输出，0 表示全部丢弃
+        json_format: 是否输出 JSON 行
+        log_file: 额外写入的日志文件
+    """
+    global _listener, _queue_handler
+
+    if level is None:
+        level = os.environ.get("SRT_LOG_LEVEL", "INFO")
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+    if sample_rate is None:
+        try:
+            sample_rate = float(os.environ.get("SRT_LOG_SAMPLE", "0.05"))
+        except ValueError:
+            sample_rate = 0.05
+    if json_format is None:
+        json_format = os.environ.get("SRT_LOG_FORMAT", "text").lower() == "json"
+    if log_file is None:
+        log_file = os.environ.get("SRT_LOG_FILE") or None
+
+    with _setup_lock:
+        shutdown_logging()
+
+        formatter = StructuredFormatter(json_format=json_format)
+        handlers = []
+
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+        if log_file:
+            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        # 采样在入队前完成，被丢弃的记录不占用队列
+        _queue_handler.addFilter(SamplingFilter(sample_rate))
+
+        logger = get_logger()
+        logger.setLevel(level)
+        logger.addHandler(_queue_handler)
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+
+    return get_logger()
+
+
+def shutdown_logging():
+    """停止后台日志线程并刷新剩余记录"""
+    global _listener, _queue_handler
+
+    if _queue_handler is not None:
+        get_logger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
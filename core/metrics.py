@@ -0,0 +1,305 @@
+"""
+Prometheus/OpenMetrics 指标导出（无第三方依赖）
+
+两种导出方式，可同时使用：
+- 文本文件：每处理完一个文件写一次，供 node_exporter 的 textfile collector 采集
+- HTTP：在本地端口提供 /metrics
+
+批量任务中通过环境变量开启（未设置则不采集）：
+    SRT_METRICS_PORT      HTTP 端口，如 9108
+    SRT_METRICS_ADDR      HTTP 监听地址，默认 127.0.0.1
+    SRT_METRICS_TEXTFILE  文本文件路径，如 /var/lib/node_exporter/srt_translator.prom
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.logger import get_logger
+
+logger = get_logger("metrics")
+
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ([0] * len(self.buckets), 0.0))
+            return counts[-1]
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表，负责渲染和导出"""
+
+    def __init__(self):
+        self._metrics = []
+        self._server = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Prometheus 文本格式（0.0.4）"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """原子写入文本文件，避免采集到写了一半的内容"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+        return path
+
+    def start_http_server(self, port, addr="127.0.0.1"):
+        """在后台线程中提供 /metrics，返回 HTTP 服务器对象"""
+        if self._server is not None:
+            return self._server
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((addr, port), MetricsHandler)
+        thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+        logger.info("指标服务已启动: http://%s:%d/metrics", addr, self._server.server_address[1])
+        return self._server
+
+    def stop_http_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class TranslationMetrics:
+    """字幕翻译流程使用的指标集合"""
+
+    def __init__(self, registry=None, textfile=None):
+        self.registry = registry or MetricsRegistry()
+        self.textfile = textfile
+        r = self.registry
+
+        self.requests = r.counter(
+            "srt_translator_requests_total", "翻译请求数（含分析请求）", ("kind", "status"))
+        self.request_duration = r.histogram(
+            "srt_translator_request_duration_seconds", "单个请求（含重试）的耗时", ("kind",))
+        self.tokens = r.counter(
+            "srt_translator_tokens_total", "API 返回的 token 用量", ("provider", "type"))
+        self.errors = r.counter(
+            "srt_translator_errors_total", "翻译接口调用异常数", ("type",))
+        self.retries = r.counter(
+            "srt_translator_retries_total", "请求重试次数", ("kind",))
+        self.in_flight = r.gauge(
+            "srt_translator_in_flight_requests", "正在等待 API 响应的请求数")
+        self.files = r.counter(
+            "srt_translator_files_total", "处理完成的字幕文件数", ("mode", "status"))
+        self.subtitles = r.counter(
+            "srt_translator_subtitles_total", "处理完成的字幕条数", ("mode",))
+        self.file_duration = r.histogram(
+            "srt_translator_file_duration_seconds", "单个文件的处理耗时", ("mode",),
+            buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200))
+        self.file_throughput = r.gauge(
+            "srt_translator_last_file_subtitles_per_second", "最近一个文件的吞吐（条/秒）", ("mode",))
+
+    def observe_request(self, kind, latency, ok=True, retries=0, provider="unknown",
+                        prompt_tokens=None, completion_tokens=None):
+        self.requests.inc(kind=kind, status="ok" if ok else "failed")
+        self.request_duration.observe(latency, kind=kind)
+        if retries:
+            self.retries.inc(retries, kind=kind)
+        if prompt_tokens:
+            self.tokens.inc(prompt_tokens, provider=provider, type="prompt")
+        if completion_tokens:
+            self.tokens.inc(completion_tokens, provider=provider, type="completion")
+
+    def observe_error(self, error):
+        self.errors.inc(type=type(error).__name__)
+
+    def observe_file(self, mode, subtitles, seconds, ok=True):
+        self.files.inc(mode=mode, status="ok" if ok else "failed")
+        if ok:
+            self.subtitles.inc(subtitles, mode=mode)
+            self.file_duration.observe(seconds, mode=mode)
+            if seconds > 0:
+                self.file_throughput.set(round(subtitles / seconds, 4), mode=mode)
+        self.flush()
+
+    def flush(self):
+        """如果配置了文本文件导出，写入当前指标"""
+        if not self.textfile:
+            return
+        try:
+            self.registry.write_textfile(self.textfile)
+        except OSError as e:
+            logger.warning("指标文件写入失败: %s", e)
+
+
+_default_metrics = None
+_default_lock = threading.Lock()
+
+
+def get_default_metrics():
+    """
+    按环境变量创建进程级的指标对象；两个变量都未设置时返回 None。
+    多次调用返回同一个对象，HTTP 服务只启动一次。
+    """
+    global _default_metrics
+
+    port = os.environ.get("SRT_METRICS_PORT")
+    textfile = os.environ.get("SRT_METRICS_TEXTFILE")
+    if not port and not textfile:
+        return None
+
+    with _default_lock:
+        if _default_metrics is None:
+            metrics = TranslationMetrics(textfile=textfile)
+            if port:
+                try:
+                    metrics.registry.start_http_server(
+                        int(port), os.environ.get("SRT_METRICS_ADDR", "127.0.0.1")
+                    )
+                except (OSError, ValueError) as e:
+                    logger.warning("指标服务启动失败: %s", e)
+            _default_metrics = metrics
+        return _default_metrics
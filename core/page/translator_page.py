@@ -9,6 +9,8 @@ import customtkinter as ctk
 from config import config_manager
 from core.translator import Translator
 from core.subtitle_translator import SmartSubtitleTranslator
+from core.metrics import get_default_metrics
+from core.budget import BudgetManager, BudgetExceededError
 
 class TranslatorPage(ctk.CTkFrame):
     def __init__(self, master):
@@ -392,13 +394,24 @@ class TranslatorPage(ctk.CTkFrame):
                 messagebox.showwarning("警告", "并发数和温度必须是数字")
                 return
 
+            # 预算管理：统计本次所有文件的 token 和费用
+            budget = BudgetManager.from_settings(
+                config_manager.get_budget_settings(),
+                pricing=config_manager.get_pricing(),
+                models=api_config.get('models', []),
+                # pause 模式达到上限时弹窗，让用户提高上限继续或停止翻译
+                on_pause=lambda: self.after(0, self.show_budget_paused_dialog, budget)
+            )
+
             # 创建字幕翻译器，添加进度回调
             subtitle_translator = SmartSubtitleTranslator(
                 translator=translator, 
                 max_workers=max_workers,
                 custom_vocab=self.custom_vocab,
                 progress_callback=self.update_translation_progress,  # 只添加这一行
-                temperature=temperature  # 新增
+                temperature=temperature,  # 新增
+                metrics=get_default_metrics(),
+                budget=budget
             )
 
             # 准备处理文件
@@ -431,15 +444,36 @@ class TranslatorPage(ctk.CTkFrame):
                             'report': f.read()
                         })
 
+                except BudgetExceededError as e:
+                    # 预算用完，剩余文件不再处理
+                    self.update_status("已达到预算上限，停止翻译", "red")
+                    messagebox.showwarning("警告", f"{e}\n剩余文件未处理")
+                    break
                 except Exception as e:
                     print(f"处理 {file_path} 时出错: {e}")
                     self.update_status(f"处理 {os.path.basename(file_path)} 时出错", "red")
                     messagebox.showwarning("警告", f"处理 {os.path.basename(file_path)} 时出错: {e}")
 
+            # 保存费用汇总
+            summary_path = os.path.join(
+                os.path.dirname(self.file_paths[0]), "translation_cost_summary.json"
+            )
+            try:
+                budget.write_summary(summary_path)
+            except OSError as e:
+                # 文件已经翻译完成，汇总写不出（如目录只读）不应让整个任务失败
+                print(f"写入费用汇总失败: {e}")
+            run_cost = budget.summary()["run"]
+
             # 完成处理
             self.progress.set(1)
             self.status_label.configure(text="翻译完成", text_color="green")
             self.detail_label.configure(text="所有文件处理完成")
+            self.stats_label.configure(
+                text=f"token: {run_cost['prompt_tokens'] + run_cost['completion_tokens']}，"
+                     f"估算费用: ${run_cost['cost']:.4f}",
+                text_color="gray"
+            )
             
             # 显示分析报告
             self.show_analysis_reports(analysis_reports)
@@ -450,6 +484,54 @@ class TranslatorPage(ctk.CTkFrame):
             messagebox.showerror("错误", str(e))
             traceback.print_exc()
 
+    def show_budget_paused_dialog(self, budget):
+        """预算 pause 时弹窗：提高上限继续，或停止翻译"""
+        run = budget.summary()["run"]
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("已达到预算上限")
+        dialog.geometry("400x300")
+
+        ctk.CTkLabel(
+            dialog,
+            text=f"翻译已暂停\n已用 token: {run['prompt_tokens'] + run['completion_tokens']}，"
+                 f"估算费用: ${run['cost']:.4f}",
+            wraplength=350
+        ).pack(pady=10)
+
+        ctk.CTkLabel(dialog, text="新的费用上限（美元，留空不变）:").pack(pady=5)
+        cost_entry = ctk.CTkEntry(dialog, width=200)
+        cost_entry.pack(pady=5)
+        if budget.max_cost is not None:
+            cost_entry.insert(0, str(budget.max_cost * 2))
+
+        ctk.CTkLabel(dialog, text="新的 token 上限（留空不变）:").pack(pady=5)
+        tokens_entry = ctk.CTkEntry(dialog, width=200)
+        tokens_entry.pack(pady=5)
+        if budget.max_tokens is not None:
+            tokens_entry.insert(0, str(budget.max_tokens * 2))
+
+        def resume():
+            try:
+                max_cost = float(cost_entry.get()) if cost_entry.get().strip() else None
+                max_tokens = int(tokens_entry.get()) if tokens_entry.get().strip() else None
+            except ValueError:
+                messagebox.showwarning("警告", "上限必须是数字", parent=dialog)
+                return
+            self.update_status("已提高预算上限，继续翻译", "blue")
+            dialog.destroy()
+            budget.resume(max_cost=max_cost, max_tokens=max_tokens)
+
+        def cancel():
+            dialog.destroy()
+            budget.cancel()
+
+        ctk.CTkButton(dialog, text="提高上限并继续", command=resume,
+                      fg_color="#4CAF50", hover_color="#45a049").pack(pady=5)
+        ctk.CTkButton(dialog, text="停止翻译", command=cancel,
+                      fg_color="#F44336", hover_color="#D32F2F").pack(pady=5)
+        # 直接关闭窗口视为停止，否则翻译线程会一直等待
+        dialog.protocol("WM_DELETE_WINDOW", cancel)
+
     def update_file_progress(self, current_file, total_files, file_path):
         """更新文件级别进度"""
         try:
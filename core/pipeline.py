@@ -0,0 +1,215 @@
+"""
+分割—翻译—合并流水线
+
+长剧集不再需要先用 split_srt.py 手动分割、逐个片段在界面中翻译、
+再用 merge_srt_interactive.py 合并：
+1. 整个文件只做一次内容分析，所有片段共用同一份摘要和术语表
+2. 按说话人切换分割（core.split_srt），多个片段同时翻译
+3. 按原顺序合并译文，可选整篇修复断句，写出一个翻译文件
+
+用法：
+    python -m core.pipeline episode.srt --api DeepSeek --model deepseek-chat --chunk-workers 4
+"""
+
+import os
+import time
+import argparse
+import concurrent.futures
+from typing import Tuple
+
+from core.logger import get_logger, setup_logging
+from core.run_report import RunReport
+from core.srt_io import read_srt
+from core.split_srt import iter_chunks
+
+logger = get_logger("pipeline")
+
+DEFAULT_SUMMARY = "这是一个需要翻译的字幕文件。请保持原文的语气和风格。"
+
+class TranslationPipeline:
+    def __init__(self, subtitle_translator, chunk_workers=2, chunk_size=400, token_budget=None,
+                 mode="context"):
+        """
+        Args:
+            subtitle_translator: SmartSubtitleTranslator，所有片段共用（术语表、预算、指标、断句修复器）
+            chunk_workers: 同时翻译的片段数；每个片段内部仍按 subtitle_translator.max_workers 并发
+            chunk_size: 按字幕数量分割时每个片段的字幕数
+            token_budget: 设置后改为按 token 数分割
+            mode: "context" 逐条上下文翻译，"grouped" 按说话人分组翻译
+        """
+        if mode not in ("context", "grouped"):
+            raise ValueError(f"未知的翻译模式: {mode}")
+        self.subtitle_translator = subtitle_translator
+        self.chunk_workers = chunk_workers
+        self.chunk_size = chunk_size
+        self.token_budget = token_budget
+        self.mode = mode
+
+    def split(self, subtitles):
+        """分割为 [(起始下标, 片段字幕列表)]"""
+        return [(start, chunk) for start, chunk, _ in
+                iter_chunks(subtitles, self.chunk_size, self.token_budget)]
+
+    def translate_chunk(self, chunk):
+        """翻译一个片段，返回译文列表"""
+        if self.mode == "grouped":
+            return self.subtitle_translator.translate_subtitles_by_speaker(chunk)
+        return self.subtitle_translator.translate_with_context(chunk)
+
+    def translate_chunks(self, chunks):
+        """并发翻译所有片段，按原顺序拼接译文"""
+        results = [None] * len(chunks)
+        total = sum(len(chunk) for _, chunk in chunks)
+        completed = 0
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.chunk_workers) as executor:
+            futures = {
+                executor.submit(self.translate_chunk, chunk): n
+                for n, (_, chunk) in enumerate(chunks)
+            }
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    n = futures[future]
+                    results[n] = future.result()
+                    completed += len(chunks[n][1])
+                    logger.info("片段 %d/%d 翻译完成（字幕 %d-%d）", n + 1, len(chunks),
+                                chunks[n][0] + 1, chunks[n][0] + len(chunks[n][1]))
+                    self.subtitle_translator._update_progress(
+                        "chunk_completed", completed, total, f"片段 {n+1}/{len(chunks)} 完成"
+                    )
+            except Exception:
+                # 一个片段失败（如预算用完）时不再开始剩余片段
+                for pending in futures:
+                    pending.cancel()
+                raise
+
+        translated_texts = []
+        for (_, chunk), texts in zip(chunks, results):
+            if len(texts) != len(chunk):
+                logger.warning("片段译文数量(%d)与字幕数量(%d)不符", len(texts), len(chunk))
+                texts = (list(texts) + [""] * len(chunk))[:len(chunk)]
+            translated_texts.extend(texts)
+        return translated_texts
+
+    def run(self, file_path, target_language) -> Tuple[str, str]:
+        """完整流程，返回 (译文路径, 分析报告路径)，文件名与 SmartSubtitleTranslator 相同"""
+        translator = self.subtitle_translator
+        translator.run_report = RunReport()
+        file_start = time.perf_counter()
+        subtitles = []
+        if translator.budget:
+            translator.budget.start_file(os.path.basename(file_path))
+        try:
+            with translator.run_report.span("read_file"):
+                subtitles = read_srt(file_path)
+            if not subtitles:
+                raise ValueError(f"文件 {file_path} 中没有可翻译的字幕")
+
+            translator.target_language = target_language
+
+            # 整个文件只分析一次，所有片段共用摘要
+            logger.info("正在分析内容...")
+            with translator.run_report.span("analyze_content"):
+                context_summary = translator.analyze_content("\n".join(sub.text for sub in subtitles))
+            translator.context_summary = context_summary or DEFAULT_SUMMARY
+
+            with translator.run_report.span("split"):
+                chunks = self.split(subtitles)
+            logger.info("共 %d 条字幕，分割为 %d 个片段，%d 个片段同时翻译",
+                        len(subtitles), len(chunks), self.chunk_workers)
+
+            with translator.run_report.span("translate"):
+                translated_texts = self.translate_chunks(chunks)
+
+            # 合并后整篇修复断句，片段边界处的断词也能修复
+            if translator.break_fixer:
+                with translator.run_report.span("fix_breaks"):
+                    translated_texts = translator.fix_translated_breaks(subtitles, translated_texts)
+
+            with translator.run_report.span("rebuild"):
+                output_content = translator.rebuild_subtitles(subtitles, translated_texts)
+
+            output_path = translator._generate_output_path(file_path, target_language)
+            analysis_path = translator._generate_analysis_path(file_path)
+            with translator.run_report.span("write_output"):
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(output_content)
+                with open(analysis_path, 'w', encoding='utf-8') as f:
+                    f.write(f"内容分析报告:\n{translator.context_summary}")
+
+            failed = [text for text in translated_texts if translator._is_failed_text(text)]
+            if failed:
+                logger.warning("%d 个字幕翻译失败", len(failed))
+
+            translator.run_report.set_info(chunks=len(chunks), chunk_workers=self.chunk_workers)
+            translator._write_run_report(file_path, f"pipeline_{self.mode}", subtitles)
+            translator._observe_file(f"pipeline_{self.mode}", subtitles, file_start)
+            return output_path, analysis_path
+        except Exception as e:
+            logger.error("处理字幕文件 %s 时发生错误: %s", file_path, e)
+            translator._observe_file(f"pipeline_{self.mode}", subtitles, file_start, ok=False)
+            raise
+
+def main():
+    from config import config_manager
+    from core.translator import Translator
+    from core.subtitle_translator import SmartSubtitleTranslator
+    from core.budget import BudgetManager
+
+    parser = argparse.ArgumentParser(description="分割、并行翻译并合并一个 SRT 文件")
+    parser.add_argument("file", help="要翻译的 SRT 文件")
+    parser.add_argument("--api", default=config_manager.get_last_used_api(), help="config.json 中的 API 名称")
+    parser.add_argument("--model", help="模型（默认为该 API 的第一个模型）")
+    parser.add_argument("--target", default="Chinese", help="目标语言")
+    parser.add_argument("--mode", choices=["context", "grouped"], default="context", help="翻译模式")
+    parser.add_argument("--chunk-size", type=int, default=400, help="每个片段的字幕数量")
+    parser.add_argument("--tokens", type=int, help="每个片段的 token 数（按 token 预算分割）")
+    parser.add_argument("--chunk-workers", type=int, default=2, help="同时翻译的片段数")
+    parser.add_argument("--workers", type=int, default=5, help="每个片段内的并发请求数")
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--vocab", help="术语表文件（同时用于翻译和断句修复）")
+    parser.add_argument("--fix-breaks", action="store_true", help="合并后修复断句")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level)
+
+    api_config = next((api for api in config_manager.get_apis() if api['name'] == args.api), None)
+    if not api_config:
+        parser.error(f"未找到 API 配置: {args.api}")
+    translator = Translator({
+        'base_url': api_config['base_url'],
+        'api_key': api_config.get('api_key', ''),
+        'api_type': api_config['api_type'],
+        'model': args.model or api_config['models'][0],
+    })
+
+    break_fixer = None
+    custom_vocab = []
+    if args.vocab or args.fix_breaks:
+        from fix_breaks import SubtitleBreakFixer
+        fixer = SubtitleBreakFixer(vocab_file=args.vocab)
+        custom_vocab = fixer.custom_vocab if args.vocab else []
+        break_fixer = fixer if args.fix_breaks else None
+
+    budget = BudgetManager.from_settings(
+        config_manager.get_budget_settings(),
+        pricing=config_manager.get_pricing(),
+        models=api_config.get('models', [])
+    )
+    subtitle_translator = SmartSubtitleTranslator(
+        translator=translator,
+        max_workers=args.workers,
+        custom_vocab=custom_vocab,
+        temperature=args.temperature,
+        budget=budget,
+        break_fixer=break_fixer,
+    )
+    pipeline = TranslationPipeline(subtitle_translator, chunk_workers=args.chunk_workers,
+                                   chunk_size=args.chunk_size, token_budget=args.tokens, mode=args.mode)
+    output_path, analysis_path = pipeline.run(args.file, args.target)
+    print(f"翻译完成: {output_path}")
+    print(f"分析报告: {analysis_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+翻译流程的运行报告
+
+记录每个阶段的耗时（span）和每个请求的指标（排队等待、延迟、网络耗时、
+token 用量、重试次数），并生成带 p50/p95/p99 的汇总，写入 JSON 文件。
+"""
+
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+def percentile(values, p):
+    """线性插值百分位数，values 为空时返回 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values):
+    """数值列表的统计摘要"""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "total": round(sum(values), 4),
+        "mean": round(sum(values) / len(values), 4),
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(max(values), 4),
+    }
+
+
+class RunReport:
+    """线程安全的运行指标收集器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans = {}
+        self.requests = []
+        self.info = {}
+
+    @contextmanager
+    def span(self, name):
+        """记录一个阶段的耗时，同名阶段会累计"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, time.perf_counter() - start)
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            self.spans.setdefault(name, []).append(seconds)
+
+    def record_request(self, kind, queue_wait=0.0, latency=0.0, network=0.0,
+                       prompt_tokens=None, completion_tokens=None, retries=0, ok=True):
+        """
+        记录一次逻辑请求（含所有重试）
+
+        Args:
+            kind: 请求类型，如 "analysis" / "line" / "group"
+            queue_wait: 从提交到开始执行的等待时间（秒）
+            latency: 从开始执行到完成的总时间（秒）
+            network: 其中等待 API 响应的时间（秒）
+            prompt_tokens / completion_tokens: API 返回的 usage，没有则为 None
+            retries: 重试次数
+            ok: 是否最终成功
+        """
+        with self._lock:
+            self.requests.append({
+                "kind": kind,
+                "queue_wait": queue_wait,
+                "latency": latency,
+                "network": network,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "retries": retries,
+                "ok": ok,
+            })
+
+    def set_info(self, **info):
+        """记录本次运行的配置信息（文件、模型、并发数等）"""
+        with self._lock:
+            self.info.update(info)
+
+    def summary(self):
+        with self._lock:
+            spans = {name: list(values) for name, values in self.spans.items()}
+            requests = list(self.requests)
+            info = dict(self.info)
+
+        def column(key, rows):
+            return [r[key] for r in rows if r[key] is not None]
+
+        by_kind = {}
+        for kind in sorted({r["kind"] for r in requests}):
+            rows = [r for r in requests if r["kind"] == kind]
+            by_kind[kind] = {
+                "count": len(rows),
+                "failed": sum(1 for r in rows if not r["ok"]),
+                "retries": sum(r["retries"] for r in rows),
+                "queue_wait": summarize(column("queue_wait", rows)),
+                "latency": summarize(column("latency", rows)),
+                "network": summarize(column("network", rows)),
+                "prompt_tokens": summarize(column("prompt_tokens", rows)),
+                "completion_tokens": summarize(column("completion_tokens", rows)),
+            }
+
+        return {
+            "info": info,
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "wall_time": round(time.perf_counter() - self._start, 4),
+            "stages": {name: summarize(values) for name, values in spans.items()},
+            "requests": {
+                "count": len(requests),
+                "failed": sum(1 for r in requests if not r["ok"]),
+                "retries": sum(r["retries"] for r in requests),
+                "prompt_tokens": sum(column("prompt_tokens", requests)),
+                "completion_tokens": sum(column("completion_tokens", requests)),
+                "without_usage": sum(1 for r in requests if r["prompt_tokens"] is None),
+                "by_kind": by_kind,
+            },
+        }
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return path
@@ -1,31 +1,25 @@
+"""
+SRT 字幕分割
+
+逐条读取字幕、边读边决定分割点，每个片段确定后立即写出，
+内存中只保留当前片段，适合分割很大的合并字幕文件。
+命令行入口见项目根目录的 split_srt.py。
+"""
+
 import re
 import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from core.budget import estimate_tokens
+from core.srt_io import iter_srt_file, read_srt, format_subtitle
+
+# 写出片段时的文件缓冲区大小
+WRITE_BUFFER_SIZE = 1024 * 1024
 
 def parse_srt_file(file_path):
-    """解析SRT文件，返回字幕条目列表"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 分割字幕块
-    subtitle_blocks = re.split(r'\n\s*\n', content.strip())
-    subtitles = []
-    
-    for block in subtitle_blocks:
-        if block.strip():
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                subtitle_id = lines[0].strip()
-                time_line = lines[1].strip()
-                text_lines = lines[2:]
-                text = '\n'.join(text_lines)
-                
-                subtitles.append({
-                    'id': subtitle_id,
-                    'time': time_line,
-                    'text': text
-                })
-    
-    return subtitles
+    """解析SRT文件，返回字幕条目列表（core.srt_io.Subtitle）"""
+    return read_srt(file_path)
 
 def extract_speaker(text):
     """提取说话人姓名"""
@@ -35,128 +29,252 @@ def extract_speaker(text):
         return match.group(1).strip()
     return None
 
-def find_split_points(subtitles, chunk_size=400):
-    """找到合适的分割点，确保不在对话中间分割"""
-    split_points = [0]
-    current_speaker = None
-    speaker_start = 0
-    
-    for i, subtitle in enumerate(subtitles):
-        speaker = extract_speaker(subtitle['text'])
-        
+class CountSplitPlanner:
+    """按字幕数量分割：达到 chunk_size 后在说话人切换处分割"""
+
+    def __init__(self, chunk_size=400):
+        self.chunk_size = chunk_size
+        self.last_split = 0
+        self.current_speaker = None
+
+    def feed(self, i, text, tokens=0):
+        """读入第 i 条字幕，返回在它之前（含）新确定的分割点列表"""
+        speaker = extract_speaker(text)
+        points = []
+
         if speaker:
-            # 如果发现新的说话人
-            if current_speaker and speaker != current_speaker:
-                # 前一个说话人结束了
-                # 检查是否应该在这里分割
-                if i >= split_points[-1] + chunk_size:
-                    split_points.append(i)
-                speaker_start = i
-            elif not current_speaker:
-                # 第一次遇到说话人
-                speaker_start = i
-            
-            current_speaker = speaker
+            # 如果发现新的说话人，前一个说话人结束了，检查是否应该在这里分割
+            if self.current_speaker and speaker != self.current_speaker:
+                if i >= self.last_split + self.chunk_size:
+                    points.append(i)
+            self.current_speaker = speaker
         else:
             # 没有说话人标识的字幕，可能是同一人继续说话
             # 检查是否需要强制分割（如果距离上次分割太远）
-            if i >= split_points[-1] + chunk_size * 1.5:  # 允许一定的溢出
-                split_points.append(i)
-                current_speaker = None
-    
+            if i >= self.last_split + self.chunk_size * 1.5:  # 允许一定的溢出
+                points.append(i)
+                self.current_speaker = None
+
+        if points:
+            self.last_split = points[-1]
+        return points
+
+class TokenSplitPlanner:
+    """
+    按 token 预算分割，仍然只在说话人切换处分割
+
+    超过预算后在下一个说话人切换处分割；如果上一个切换点更接近预算则用上一个。
+    长时间没有说话人切换（超过预算的 1.5 倍）时强制分割，优先退回到上一个切换点。
+    """
+
+    def __init__(self, token_budget=8000):
+        self.token_budget = token_budget
+        self.current_speaker = None
+        self.total = 0            # 已读入字幕的 token 总数
+        self.start = 0            # 当前片段的起点
+        self.start_total = 0
+        self.candidate = None     # 上次分割后最近的一个说话人切换点
+        self.candidate_total = 0
+
+    def _split(self, point, point_total):
+        self.start = point
+        self.start_total = point_total
+
+    def feed(self, i, text, tokens):
+        """读入第 i 条字幕（tokens 为它的 token 数），返回新确定的分割点列表"""
+        budget = self.token_budget
+        speaker = extract_speaker(text)
+        is_speaker_change = bool(speaker and self.current_speaker and speaker != self.current_speaker)
+        if speaker:
+            self.current_speaker = speaker
+
+        points = []
+        size = self.total - self.start_total
+        if i > self.start:
+            if is_speaker_change:
+                if size < budget:
+                    self.candidate, self.candidate_total = i, self.total
+                else:
+                    split_here = True
+                    # 上一个切换点离预算更近时在那里分割
+                    if self.candidate and budget - (self.candidate_total - self.start_total) < size - budget:
+                        points.append(self.candidate)
+                        self._split(self.candidate, self.candidate_total)
+                        if self.total - self.start_total < budget:
+                            self.candidate, self.candidate_total = i, self.total
+                            split_here = False
+                    if split_here:
+                        points.append(i)
+                        self._split(i, self.total)
+                        self.candidate = None
+            elif size >= budget * 1.5:
+                if self.candidate and self.candidate_total - self.start_total >= budget * 0.5:
+                    points.append(self.candidate)
+                    self._split(self.candidate, self.candidate_total)
+                else:
+                    points.append(i)
+                    self._split(i, self.total)
+                    self.current_speaker = None
+                self.candidate = None
+
+        self.total += tokens
+        return points
+
+def find_split_points(subtitles, chunk_size=400):
+    """找到合适的分割点，确保不在对话中间分割"""
+    planner = CountSplitPlanner(chunk_size)
+    split_points = [0]
+    for i, subtitle in enumerate(subtitles):
+        split_points.extend(planner.feed(i, subtitle.text))
     return split_points
 
+def find_split_points_by_tokens(subtitles, token_budget=8000, token_counts=None):
+    """
+    按 token 预算寻找分割点，规则见 TokenSplitPlanner
+
+    Args:
+        subtitles: 字幕列表
+        token_budget: 每个片段的目标 token 数
+        token_counts: 每条字幕的 token 数（不提供则用 tiktoken 计算）
+    """
+    if token_counts is None:
+        token_counts = [estimate_tokens(subtitle.text) for subtitle in subtitles]
+    planner = TokenSplitPlanner(token_budget)
+    split_points = [0]
+    for i, (subtitle, tokens) in enumerate(zip(subtitles, token_counts)):
+        split_points.extend(planner.feed(i, subtitle.text, tokens))
+    return split_points
+
+def iter_chunks(subtitles, chunk_size=400, token_budget=None):
+    """
+    流式分块：逐条读入字幕，分割点确定后立即产出前面的片段
+
+    Args:
+        subtitles: 字幕的可迭代对象（如 core.srt_io.iter_srt_file 的结果）
+        chunk_size: 按字幕数量分割时每个片段的字幕数
+        token_budget: 设置后改为按 token 数分割
+
+    Yields:
+        (起始下标, 片段字幕列表, 片段 token 数)；按字幕数量分割时 token 数为 None
+    """
+    planner = TokenSplitPlanner(token_budget) if token_budget else CountSplitPlanner(chunk_size)
+    buffer = []
+    buffer_tokens = []
+    base = 0
+
+    for i, subtitle in enumerate(subtitles):
+        tokens = estimate_tokens(subtitle.text) if token_budget else 0
+        for point in planner.feed(i, subtitle.text, tokens):
+            n = point - base
+            yield base, buffer[:n], sum(buffer_tokens[:n]) if token_budget else None
+            buffer = buffer[n:]
+            buffer_tokens = buffer_tokens[n:]
+            base = point
+        buffer.append(subtitle)
+        buffer_tokens.append(tokens)
+
+    if buffer:
+        yield base, buffer, sum(buffer_tokens) if token_budget else None
+
+def chunk_filename(start_idx, end_idx):
+    """片段文件名：保留原始序号范围，如 1-400.srt、401-812.srt"""
+    return f"{start_idx+1}-{end_idx}.srt"
+
+def write_manifest(output_folder, input_file, chunks, token_budget=None, chunk_size=None):
+    """
+    写出 manifest.json：每个片段的文件名、字幕范围和 token 数
+
+    Args:
+        chunks: [{'file', 'start', 'end', 'cues', 'tokens'}]，start/end 为从 1 开始的字幕序号
+    """
+    manifest = {
+        'source': os.path.basename(input_file),
+        'token_budget': token_budget,
+        'chunk_size': chunk_size,
+        'total_cues': sum(chunk['cues'] for chunk in chunks),
+        'total_tokens': sum(chunk['tokens'] for chunk in chunks),
+        'chunks': chunks,
+    }
+    manifest_path = os.path.join(output_folder, "manifest.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest_path
+
 def save_subtitle_chunk(subtitles, start_idx, end_idx, output_path):
     """保存字幕片段到文件，保留原始编号"""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for subtitle in subtitles[start_idx:end_idx]:
-            f.write(f"{subtitle['id']}\n")
-            f.write(f"{subtitle['time']}\n")
-            f.write(f"{subtitle['text']}\n\n")
-
-def split_srt_file(input_file, chunk_size=400):
-    """分割SRT文件"""
-    # 获取脚本所在目录和文件信息
-    input_dir = os.path.dirname(os.path.abspath(input_file))
-    base_name = os.path.splitext(os.path.basename(input_file))[0]
-    
-    # 创建输出目录（固定为split）
-    output_folder = os.path.join(input_dir, "split")
+    write_chunk(subtitles[start_idx:end_idx], output_path)
+
+def write_chunk(subtitles, output_path):
+    """整块格式化后一次写出"""
+    content = "".join(format_subtitle(subtitle) for subtitle in subtitles)
+    with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(content)
+
+def split_srt_file(input_file, chunk_size=400, token_budget=None, output_folder=None,
+                   write_workers=1, verbose=True):
+    """
+    分割SRT文件
+
+    Args:
+        chunk_size: 按字幕数量分割时每个文件的字幕数
+        token_budget: 设置后改为按 token 数分割（每个文件的目标 token 数）
+        output_folder: 输出目录（默认为输入文件所在目录下的 split）
+        write_workers: 写文件的线程数，大于 1 时边分割边并行写出
+        verbose: 是否打印进度
+
+    Returns:
+        manifest 字典（另含 'path'：manifest.json 的路径，'output_folder'：输出目录）
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    if output_folder is None:
+        output_folder = os.path.join(os.path.dirname(os.path.abspath(input_file)), "split")
     os.makedirs(output_folder, exist_ok=True)
-    
-    # 解析字幕文件
-    print("正在解析字幕文件...")
-    subtitles = parse_srt_file(input_file)
-    print(f"总共找到 {len(subtitles)} 条字幕")
-    
-    # 找到分割点
-    print("正在寻找合适的分割点...")
-    split_points = find_split_points(subtitles, chunk_size)
-    split_points.append(len(subtitles))  # 添加结束点
-    
-    print(f"将分割为 {len(split_points)-1} 个文件")
-    
-    # 分割并保存文件
-    for i in range(len(split_points)-1):
-        start_idx = split_points[i]
-        end_idx = split_points[i+1]
-        
-        # 生成文件名
-        if i == 0:
-            filename = f"1-{end_idx}.srt"
-        else:
-            filename = f"{start_idx+1}-{end_idx}.srt"
-        
-        output_path = os.path.join(output_folder, filename)
-        save_subtitle_chunk(subtitles, start_idx, end_idx, output_path)
-        
-        print(f"已保存: {filename} (字幕 {start_idx+1}-{end_idx}, 共 {end_idx-start_idx} 条)")
-    
-    print(f"\n分割完成！文件保存在: {output_folder}")
-
-def main():
-    # 让用户输入目录
-    input_dir = input("请输入包含SRT文件的目录（留空则为当前脚本目录）: ").strip()
-    if not input_dir:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-    else:
-        script_dir = os.path.abspath(input_dir)
-    
-    # 在同文件夹搜索SRT文件
-    srt_files = [f for f in os.listdir(script_dir) if f.lower().endswith('.srt')]
-    
-    if not srt_files:
-        print("在当前目录没有找到SRT文件！")
-        return
-    
-    if len(srt_files) == 1:
-        input_file = os.path.join(script_dir, srt_files[0])
-        print(f"找到SRT文件: {srt_files[0]}")
-    else:
-        print("找到多个SRT文件:")
-        for i, file in enumerate(srt_files, 1):
-            print(f"{i}. {file}")
-        
-        try:
-            choice = int(input("请选择要处理的文件编号: ")) - 1
-            if 0 <= choice < len(srt_files):
-                input_file = os.path.join(script_dir, srt_files[choice])
-            else:
-                print("无效的选择！")
-                return
-        except ValueError:
-            print("请输入有效的数字！")
-            return
-    
-    # 询问分割大小
+
+    log("正在分割字幕文件...")
+    chunks = []
+    pool = ThreadPoolExecutor(max_workers=write_workers) if write_workers > 1 else None
+    pending = []
+
     try:
-        chunk_size = int(input("请输入每个文件的字幕数量 (默认400): ") or "400")
-    except ValueError:
-        chunk_size = 400
-        print("使用默认值: 400")
-    
-    # 执行分割
-    split_srt_file(input_file, chunk_size)
-
-if __name__ == "__main__":
-    main()
+        for start_idx, chunk, tokens in iter_chunks(iter_srt_file(input_file), chunk_size, token_budget):
+            end_idx = start_idx + len(chunk)
+            filename = chunk_filename(start_idx, end_idx)
+            output_path = os.path.join(output_folder, filename)
+            if tokens is None:
+                # 按数量分割时整块计算一次 token，用于 manifest
+                tokens = estimate_tokens("\n".join(subtitle.text for subtitle in chunk))
+
+            if pool:
+                pending.append(pool.submit(write_chunk, chunk, output_path))
+                # 限制排队中的片段数，保持内存占用有界
+                if len(pending) >= write_workers * 2:
+                    pending.pop(0).result()
+            else:
+                write_chunk(chunk, output_path)
+
+            chunks.append({
+                'file': filename,
+                'start': start_idx + 1,
+                'end': end_idx,
+                'cues': len(chunk),
+                'tokens': tokens,
+            })
+            log(f"已保存: {filename} (字幕 {start_idx+1}-{end_idx}, 共 {len(chunk)} 条, 约 {tokens} tokens)")
+
+        for future in pending:
+            future.result()
+    finally:
+        if pool:
+            pool.shutdown()
+
+    manifest_path = write_manifest(output_folder, input_file, chunks, token_budget,
+                                   None if token_budget else chunk_size)
+    log(f"\n共 {sum(chunk['cues'] for chunk in chunks)} 条字幕，分割为 {len(chunks)} 个文件")
+    log(f"分割完成！文件保存在: {output_folder}（片段信息见 manifest.json）")
+
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['path'] = manifest_path
+    manifest['output_folder'] = output_folder
+    return manifest
@@ -0,0 +1,121 @@
+"""
+SRT 字幕读写
+
+逐行解析、逐条写出，不需要把整个文件读成一个字符串再用正则切分。
+保留原始编号和时间轴文本，字幕内容的多行结构（如双语字幕的中文首行 + 英文原文）原样保留。
+"""
+
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+TIMESTAMP_LINE = re.compile(r'^\s*(\d+:\d{2}:\d{2}[,.]\d{3})\s*-->\s*(\d+:\d{2}:\d{2}[,.]\d{3})')
+
+
+class Subtitle:
+    def __init__(self, index, timestamp_in, timestamp_out, text):
+        self.index = index
+        self.timestamp_in = timestamp_in
+        self.timestamp_out = timestamp_out
+        self.text = text
+
+
+def iter_subtitles(lines: Iterable[str]) -> Iterator[Subtitle]:
+    """
+    从逐行输入中解析字幕（可以是打开的文件，也可以是 str.splitlines() 的结果）
+
+    每条字幕为：编号行、时间轴行、若干行文本，以空行结束。
+    缺少编号或时间轴的块会被跳过；只有时间轴没有文本的字幕保留为空文本。
+    """
+    index = None
+    timestamps = None
+    text_lines = []
+
+    for line in lines:
+        line = line.rstrip('\r\n').lstrip('\ufeff')
+
+        if timestamps is not None:
+            if line.strip():
+                text_lines.append(line)
+                continue
+            yield Subtitle(index, timestamps[0], timestamps[1], '\n'.join(text_lines).strip())
+            index = None
+            timestamps = None
+            text_lines = []
+            continue
+
+        if not line.strip():
+            continue
+        match = TIMESTAMP_LINE.match(line)
+        if match and index is not None:
+            timestamps = match.groups()
+        elif line.strip().isdigit():
+            index = line.strip()
+        else:
+            # 不符合格式的行，丢弃直到下一个编号
+            index = None
+
+    if timestamps is not None:
+        yield Subtitle(index, timestamps[0], timestamps[1], '\n'.join(text_lines).strip())
+
+
+def parse_srt(content: str) -> List[Subtitle]:
+    """解析 SRT 文本"""
+    return list(iter_subtitles(content.splitlines()))
+
+
+def iter_srt_file(file_path: str, encoding: str = 'utf-8') -> Iterator[Subtitle]:
+    """逐条读取 SRT 文件（utf-8 文件自动去掉 BOM）"""
+    if encoding.lower().replace('_', '-') == 'utf-8':
+        encoding = 'utf-8-sig'
+    with open(file_path, 'r', encoding=encoding) as f:
+        yield from iter_subtitles(f)
+
+
+def read_srt(file_path: str, encoding: str = 'utf-8') -> List[Subtitle]:
+    """读取整个 SRT 文件"""
+    return list(iter_srt_file(file_path, encoding))
+
+
+def sniff_srt_format(file_path: str) -> Tuple[str, str]:
+    """
+    检测文件是否带 BOM 以及使用的换行符，用于按原格式写回
+
+    Returns:
+        (encoding, newline)：带 BOM 时为 'utf-8-sig'，换行符为 '\r\n' 或 '\n'
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(4096)
+    encoding = 'utf-8-sig' if head.startswith(b'\xef\xbb\xbf') else 'utf-8'
+    newline = '\r\n' if b'\r\n' in head else '\n'
+    return encoding, newline
+
+
+def format_subtitle(subtitle: Subtitle, text: str = None) -> str:
+    """格式化单条字幕；text 不为 None 时替换字幕内容"""
+    if text is None:
+        text = subtitle.text
+    return f"{subtitle.index}\n{subtitle.timestamp_in} --> {subtitle.timestamp_out}\n{text}\n\n"
+
+
+def format_srt(subtitles: Iterable[Subtitle]) -> str:
+    """把字幕列表格式化为 SRT 文本"""
+    return "".join(format_subtitle(subtitle) for subtitle in subtitles)
+
+
+def write_srt(subtitles: Iterable[Subtitle], file_path: str, encoding: str = 'utf-8',
+              newline: str = '\n') -> int:
+    """
+    逐条写出 SRT 文件
+
+    Args:
+        newline: 换行符，可用 sniff_srt_format 检测的值保持与输入文件一致
+
+    Returns:
+        写出的字幕条数
+    """
+    count = 0
+    with open(file_path, 'w', encoding=encoding, newline=newline) as f:
+        for subtitle in subtitles:
+            f.write(format_subtitle(subtitle))
+            count += 1
+    return count
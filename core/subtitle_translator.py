@@ -2,22 +2,25 @@ import os
 import re
 import time
 import random
-import traceback
 import concurrent.futures  # 添加这个导入
 from typing import List, Tuple, Optional
 
-import tiktoken
+from core.logger import get_logger
+from core.run_report import RunReport
+from core.budget import BudgetExceededError, estimate_tokens
+from core.srt_io import Subtitle, parse_srt, format_subtitle
 
-class Subtitle:
-    def __init__(self, index, timestamp_in, timestamp_out, text):
-        self.index = index
-        self.timestamp_in = timestamp_in
-        self.timestamp_out = timestamp_out
-        self.text = text
+logger = get_logger("subtitle_translator")
 
 class SmartSubtitleTranslator:
+    # 重试前的等待时间（秒）
+    TIMEOUT_RETRY_DELAY = 10
+    ERROR_RETRY_DELAY = 60
+    GROUP_RETRY_DELAY = 10
+
     def __init__(self, translator, max_workers=5, max_tokens=2000, 
-                 max_retries=3, retry_delay_base=30, custom_vocab=None, progress_callback=None, temperature=0.7):
+                 max_retries=3, retry_delay_base=30, custom_vocab=None, progress_callback=None, temperature=0.7,
+                 write_report=True, metrics=None, budget=None, break_fixer=None, max_group_lines=None):
         self.translator = translator
         self.max_workers = max_workers
         self.max_tokens = max_tokens
@@ -29,6 +32,20 @@ class SmartSubtitleTranslator:
         self.custom_vocab = custom_vocab or []
         self.progress_callback = progress_callback  # 只添加这一行
         self.temperature = temperature
+        # 运行指标：每次处理文件时重置，完成后写入 _run_report.json
+        self.write_report = write_report
+        self.run_report = RunReport()
+        self.last_report_path = None
+        # 可选的 Prometheus 指标（core.metrics.TranslationMetrics）
+        self.metrics = metrics
+        # 可选的预算管理（core.budget.BudgetManager）
+        self.budget = budget
+        # 可选的断句修复器（需提供 fix_subtitles(subtitles)，如 fix_breaks.SubtitleBreakFixer），
+        # 翻译完成后直接在内存中修复，不需要先写文件再读回
+        self.break_fixer = break_fixer
+        # 分组翻译时每组最多的字幕条数（None 不限）。没有说话人标记的字幕（如语音转录）
+        # 会全部落在一组，限制后每个请求打包固定条数
+        self.max_group_lines = max_group_lines
 
     def _update_progress(self, stage, current=0, total=0, extra_info=""):
         """内部进度更新方法"""
@@ -36,40 +53,101 @@ class SmartSubtitleTranslator:
             try:
                 self.progress_callback(stage, current, total, extra_info)
             except Exception as e:
-                print(f"进度回调出错: {e}")
+                logger.warning("进度回调出错: %s", e)
 
-    def count_tokens(self, text):
+    def _check_budget(self):
+        """
+        预算检查（pause 时会阻塞），返回这次请求使用的模型（None 表示 translator.model）
+
+        要在发出请求的线程之外的等待（如 translate_with_timeout 的超时）开始之前调用，
+        否则暂停期间超时重试，恢复后超时的线程和重试会各发一次请求。
+        """
+        if self.budget:
+            return self.budget.before_request(self.translator)
+        return None
+
+    def _call_translator(self, text, system_prompt, temperature, stats=None, model=None, budget_checked=False):
+        """
+        调用底层翻译器，并把网络耗时和 usage 累加到 stats
+        （stats 为 _new_request_stats() 返回的字典）
+
+        budget_checked 为 True 时调用方已经用 _check_budget() 取得了 model
+        """
+        if not budget_checked:
+            model = self._check_budget()
+        if self.metrics:
+            self.metrics.in_flight.inc()
+        start = time.perf_counter()
         try:
-            tokenizer = tiktoken.get_encoding("cl100k_base")
-            return len(tokenizer.encode(text))
-        except ImportError:
-            return len(text.split())
+            # 只有降级时才传 model，不支持该参数的翻译器照常工作
+            kwargs = {"model": model} if model else {}
+            result = self.translator.translate(
+                text=text,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                **kwargs
+            )
+            if self.budget:
+                self.budget.record_response(self.translator, f"{system_prompt}\n{text}", result, model)
+            return result
+        except Exception as e:
+            if self.metrics:
+                self.metrics.observe_error(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.metrics:
+                self.metrics.in_flight.dec()
+            self.run_report.add_span("network", elapsed)
+            if stats is not None:
+                stats['network'] += elapsed
+                usage = getattr(self.translator, 'last_usage', None)
+                if usage:
+                    stats['prompt_tokens'] = (stats['prompt_tokens'] or 0) + usage.get('prompt_tokens', 0)
+                    stats['completion_tokens'] = (stats['completion_tokens'] or 0) + usage.get('completion_tokens', 0)
+
+    @staticmethod
+    def _new_request_stats():
+        return {'network': 0.0, 'prompt_tokens': None, 'completion_tokens': None, 'retries': 0}
+
+    @staticmethod
+    def _is_failed_text(text):
+        return text.startswith(("[翻译失败]", "[翻译错误", "[超时跳过]", "[处理失败]"))
+
+    def _record_request(self, kind, stats, started, submitted=None, ok=True):
+        """把一次逻辑请求（含重试）写入运行报告"""
+        latency = time.perf_counter() - started
+        if self.metrics:
+            self.metrics.observe_request(
+                kind, latency, ok=ok, retries=stats['retries'],
+                provider=getattr(self.translator, 'api_type', 'unknown'),
+                prompt_tokens=stats['prompt_tokens'],
+                completion_tokens=stats['completion_tokens']
+            )
+        self.run_report.record_request(
+            kind,
+            queue_wait=(started - submitted) if submitted is not None else 0.0,
+            latency=latency,
+            network=stats['network'],
+            prompt_tokens=stats['prompt_tokens'],
+            completion_tokens=stats['completion_tokens'],
+            retries=stats['retries'],
+            ok=ok
+        )
+
+    def count_tokens(self, text):
+        # 与预算统计共用同一个编码器（第一次调用时才导入 tiktoken）
+        return estimate_tokens(text)
 
     def parse_subtitles(self, content):
         """解析SRT文件"""
-        # 处理不同的换行符和编码问题
-        content = content.replace('\r\n', '\n')
-        
-        pattern = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\n|\Z)'
-        matches = re.findall(pattern, content, re.DOTALL | re.MULTILINE)
-        
-        subtitles = []
-        for match in matches:
-            index, timestamp_in, timestamp_out, text = match
-            subtitles.append(Subtitle(
-                index=index, 
-                timestamp_in=timestamp_in, 
-                timestamp_out=timestamp_out, 
-                text=text.strip()
-            ))
-        
-        return subtitles
+        return parse_srt(content)
 
     def analyze_content(self, full_text):
         """第一阶段：分析整体内容，生成上下文摘要"""
         # 如果文本太短，直接返回None
         if len(full_text.strip()) < 50:
-            print("文本内容过短，无法进行分析")
+            logger.info("文本内容过短，无法进行分析")
             return None
     
         # 准备专用词汇部分
@@ -95,33 +173,37 @@ class SmartSubtitleTranslator:
         {full_text[:2500]}
         """
         
+        stats = self._new_request_stats()
+        started = time.perf_counter()
         try:
-            context_summary = self.translator.translate(
+            context_summary = self._call_translator(
                 text=full_text[:2500],  # 只分析前2500字
                 system_prompt=analysis_prompt,
-                temperature=0.3 
+                temperature=0.3,
+                stats=stats
             )
             
             # 检查返回内容是否为空
             if not context_summary or context_summary.strip() == '':
-                print("内容分析返回为空")
+                logger.warning("内容分析返回为空")
+                self._record_request("analysis", stats, started, ok=False)
                 return None
             
+            self._record_request("analysis", stats, started)
             return context_summary
         except Exception as e:
-            print(f"内容分析失败: {e}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.error("内容分析失败: %s", e, exc_info=True)
+            self._record_request("analysis", stats, started, ok=False)
             return None
 
 
-    def translate_with_timeout(self, text, system_prompt, temperature=0.7, timeout_seconds=60):
+    def translate_with_timeout(self, text, system_prompt, temperature=0.7, timeout_seconds=60, stats=None):
         """带超时的翻译方法"""
+        # 预算检查在超时计时之外进行：暂停等待不算超时，也不会留下恢复后仍会发请求的线程
+        model = self._check_budget()
+
         def translate_task():
-            return self.translator.translate(
-                text=text,
-                system_prompt=system_prompt,
-                temperature=temperature
-            )
+            return self._call_translator(text, system_prompt, temperature, stats, model, budget_checked=True)
         
         # 使用线程池执行翻译，带超时
         with concurrent.futures.ThreadPoolExecutor() as executor:
@@ -134,23 +216,24 @@ class SmartSubtitleTranslator:
     def translate_with_context(self, subtitles):
         """第二阶段：基于上下文进行批量翻译"""
         if not self.context_summary:
-            print("警告：未进行内容分析，将使用默认翻译")
+            logger.warning("未进行内容分析，将使用默认翻译")
             self.context_summary = f"这是一个需要翻译的字幕文件。请保持原文的语气和风格。"
 
         # 创建一个用于存储已翻译结果的共享列表
         translated_texts = [None] * len(subtitles)
 
-        def safe_translate_subtitle(subtitle, context_summary, subtitles, translated_texts):
+        def safe_translate_subtitle(current_index, subtitle, context_summary, subtitles, translated_texts, stats):
             """
             安全的字幕翻译方法，支持部分并发翻译
             
+            :param current_index: 当前字幕在列表中的位置
             :param subtitle: 当前字幕对象
             :param context_summary: 上下文摘要
             :param subtitles: 所有字幕列表
             :param translated_texts: 共享的翻译结果列表
+            :param stats: 请求指标（网络耗时、token、重试次数）
             :return: 翻译结果或错误信息
             """
-            current_index = subtitles.index(subtitle)
             
             # 获取已翻译的前文（如果有）
             prev_context = []
@@ -168,10 +251,15 @@ class SmartSubtitleTranslator:
             timeout_seconds = 60  # 1分钟超时
             
             for retry in range(max_retries):
+                stats['retries'] = retry
                 try:
-                    print(f"正在翻译字幕 {subtitle.index}，尝试 {retry+1}/{max_retries}")
+                    logger.info(
+                        "正在翻译字幕 %s，尝试 %d/%d", subtitle.index, retry + 1, max_retries,
+                        extra={'sampled': True}
+                    )
                     
                     # 构建翻译提示
+                    prompt_start = time.perf_counter()
                     translation_prompt = f"""
                     你是一个专业的字幕翻译专家。以下是关于这个视频/内容的背景信息：
 
@@ -217,13 +305,15 @@ class SmartSubtitleTranslator:
 
                     请只返回待翻译文本的翻译结果。
                     """
+                    self.run_report.add_span("prompt_assembly", time.perf_counter() - prompt_start)
                     
                     # 使用带超时的翻译方法 - 这里是关键修改
                     translated_text = self.translate_with_timeout(
                         text=subtitle.text,
                         system_prompt=translation_prompt,
                         temperature=0.7,
-                        timeout_seconds=timeout_seconds
+                        timeout_seconds=timeout_seconds,
+                        stats=stats
                     )
                     
                     # 检查翻译结果
@@ -235,12 +325,14 @@ class SmartSubtitleTranslator:
                     
                     return translated_text
                 
+                except BudgetExceededError:
+                    raise
                 except Exception as e:
                     # 记录错误
                     if "翻译超时" in str(e):
-                        print(f"翻译字幕 {subtitle.index} 超时（第 {retry + 1} 次尝试）: {e}")
+                        logger.warning("翻译字幕 %s 超时（第 %d 次尝试）: %s", subtitle.index, retry + 1, e)
                     else:
-                        print(f"翻译字幕 {subtitle.index} 失败（第 {retry + 1} 次尝试）: {e}")
+                        logger.warning("翻译字幕 %s 失败（第 %d 次尝试）: %s", subtitle.index, retry + 1, e)
                     
                     # 最后一次重试仍失败
                     if retry == max_retries - 1:
@@ -256,25 +348,34 @@ class SmartSubtitleTranslator:
                     
                     # 等待后重试
                     if "翻译超时" in str(e):
-                        time.sleep(10)  # 超时后等待10秒
+                        time.sleep(self.TIMEOUT_RETRY_DELAY)  # 超时后等待10秒
                     else:
-                        time.sleep(60)  # 其他错误等待60秒
+                        time.sleep(self.ERROR_RETRY_DELAY)  # 其他错误等待60秒
             
             # 理论上不会执行到这里，但保险起见
             return f"[翻译失败] {subtitle.text}"
 
+        def timed_translate_subtitle(current_index, subtitle, submitted):
+            """记录排队等待、延迟、token 和重试次数"""
+            started = time.perf_counter()
+            stats = self._new_request_stats()
+            result = safe_translate_subtitle(
+                current_index, subtitle, self.context_summary, subtitles, translated_texts, stats
+            )
+            self._record_request("line", stats, started, submitted, ok=not self._is_failed_text(result))
+            return result
+
         # 使用线程池进行并发翻译
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 准备翻译任务
-            translation_futures = [
+            # 准备翻译任务（future -> 字幕位置）
+            translation_futures = {
                 executor.submit(
-                    safe_translate_subtitle, 
+                    timed_translate_subtitle, 
+                    index, 
                     subtitle, 
-                    self.context_summary, 
-                    subtitles, 
-                    translated_texts
-                ) for subtitle in subtitles
-            ]
+                    time.perf_counter()
+                ): index for index, subtitle in enumerate(subtitles)
+            }
             
             # 🔥 添加：初始化进度
             self._update_progress(
@@ -286,9 +387,10 @@ class SmartSubtitleTranslator:
             
             # 收集翻译结果 - 🔥 添加进度更新
             completed_count = 0
+            budget_error = None
             for future in concurrent.futures.as_completed(translation_futures):
+                index = translation_futures[future]
                 try:
-                    index = translation_futures.index(future)
                     translated_text = future.result()
                     translated_texts[index] = translated_text
             
@@ -301,8 +403,13 @@ class SmartSubtitleTranslator:
                         f"已完成 {completed_count}/{len(subtitles)} 条字幕"
                     )
                     
+                except BudgetExceededError as e:
+                    # 预算用完：取消尚未开始的任务
+                    budget_error = e
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
                 except Exception as e:
-                    print(f"处理字幕翻译任务时发生异常: {e}")
+                    logger.error("处理字幕翻译任务时发生异常: %s", e)
                     translated_texts[index] = "[处理失败]"
                     
                     # 🔥 添加：失败也要更新进度
@@ -314,17 +421,26 @@ class SmartSubtitleTranslator:
                         f"字幕 {index+1} 翻译失败"
                     )
             
-            return translated_texts
+        if budget_error:
+            raise budget_error
+        return translated_texts
 
     def process_subtitle_file(self, file_path, target_language) -> Tuple[str, str]:
         """完整的字幕处理流程，增加全面的错误处理"""
+        self.run_report = RunReport()
+        file_start = time.perf_counter()
+        subtitles = []
+        if self.budget:
+            self.budget.start_file(os.path.basename(file_path))
         try:
             # 读取字幕文件
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with self.run_report.span("read_file"):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
             
             # 解析字幕
-            subtitles = self.parse_subtitles(content)
+            with self.run_report.span("parse"):
+                subtitles = self.parse_subtitles(content)
             
             # 检查是否有可翻译的字幕
             if not subtitles:
@@ -337,38 +453,48 @@ class SmartSubtitleTranslator:
             self.target_language = target_language
             
             # 第一阶段：分析内容
-            print("正在分析内容...")
-            context_summary = self.analyze_content(full_text)
+            logger.info("正在分析内容...")
+            with self.run_report.span("analyze_content"):
+                context_summary = self.analyze_content(full_text)
             
             # 如果内容分析失败，使用默认提示词
             if not context_summary:
                 context_summary = f"这是一个需要翻译的字幕文件。请保持原文的语气和风格。"
             
-            print(f"内容分析完成: \n{context_summary}\n")
+            logger.info("内容分析完成")
+            logger.debug("内容分析结果:\n%s", context_summary)
             
             # 将上下文摘要保存为实例变量
             self.context_summary = context_summary
             
             # 第二阶段：翻译字幕
-            print("开始并发翻译...")
-            translated_texts = self.translate_with_context(subtitles)
+            logger.info("开始并发翻译...")
+            with self.run_report.span("translate"):
+                translated_texts = self.translate_with_context(subtitles)
             
             # 检查翻译结果
             if len(translated_texts) != len(subtitles):
-                print(f"警告：翻译结果数量({len(translated_texts)})与原字幕数量({len(subtitles)})不符")
+                logger.warning("翻译结果数量(%d)与原字幕数量(%d)不符", len(translated_texts), len(subtitles))
+            
+            # 修复断句（可选）
+            if self.break_fixer:
+                with self.run_report.span("fix_breaks"):
+                    translated_texts = self.fix_translated_breaks(subtitles, translated_texts)
             
             # 重建字幕文件
-            output_content = self.rebuild_subtitles(subtitles, translated_texts)
+            with self.run_report.span("rebuild"):
+                output_content = self.rebuild_subtitles(subtitles, translated_texts)
             
             # 保存翻译结果
             output_path = self._generate_output_path(file_path, target_language)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(output_content)
-            
-            # 保存分析报告
             analysis_path = self._generate_analysis_path(file_path)
-            with open(analysis_path, 'w', encoding='utf-8') as f:
-                f.write(f"内容分析报告:\n{context_summary}")
+            with self.run_report.span("write_output"):
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(output_content)
+                
+                # 保存分析报告
+                with open(analysis_path, 'w', encoding='utf-8') as f:
+                    f.write(f"内容分析报告:\n{context_summary}")
             
             # 检查是否有翻译失败的字幕
             failed_subtitles = [
@@ -377,23 +503,37 @@ class SmartSubtitleTranslator:
             ]
             
             if failed_subtitles:
-                print(f"警告：{len(failed_subtitles)} 个字幕翻译失败")
+                logger.warning("%d 个字幕翻译失败", len(failed_subtitles))
             
+            self._write_run_report(file_path, "context", subtitles)
+            self._observe_file("context", subtitles, file_start)
             return output_path, analysis_path
         
         except Exception as e:
-            print(f"处理字幕文件 {file_path} 时发生错误: {e}")
+            logger.error("处理字幕文件 %s 时发生错误: %s", file_path, e)
+            self._observe_file("context", subtitles, file_start, ok=False)
             raise
 
     def rebuild_subtitles(self, original_subtitles, translated_texts):
         """重建SRT文件"""
         rebuilt_content = []
         for (subtitle, translated_text) in zip(original_subtitles, translated_texts):
-            subtitle_block = f"{subtitle.index}\n{subtitle.timestamp_in} --> {subtitle.timestamp_out}\n{translated_text}\n\n"
-            rebuilt_content.append(subtitle_block)
+            rebuilt_content.append(format_subtitle(subtitle, translated_text))
         
         return "".join(rebuilt_content)
 
+    def fix_translated_breaks(self, original_subtitles, translated_texts):
+        """用 break_fixer 在内存中修复译文的断句，返回修复后的译文列表"""
+        if not self.break_fixer:
+            return translated_texts
+        translated_subtitles = [
+            Subtitle(subtitle.index, subtitle.timestamp_in, subtitle.timestamp_out, text)
+            for subtitle, text in zip(original_subtitles, translated_texts)
+        ]
+        fixes = self.break_fixer.fix_subtitles(translated_subtitles)
+        logger.info("断句修复完成，共修复 %d 处", len(fixes))
+        return [subtitle.text for subtitle in translated_subtitles]
+
     def _generate_output_path(self, input_path, target_language):
         """生成输出文件路径"""
         base, ext = os.path.splitext(input_path)
@@ -404,33 +544,73 @@ class SmartSubtitleTranslator:
         base, ext = os.path.splitext(input_path)
         return f"{base}_analysis.txt"
 
+    def _generate_report_path(self, input_path):
+        """生成运行报告文件路径（与分析报告放在一起）"""
+        base, ext = os.path.splitext(input_path)
+        return f"{base}_run_report.json"
+
+    def _write_run_report(self, file_path, mode, subtitles):
+        """写入本次处理的阶段耗时和请求指标"""
+        if not self.write_report:
+            return None
+        self.run_report.set_info(
+            file=os.path.basename(file_path),
+            mode=mode,
+            model=getattr(self.translator, 'model', None),
+            max_workers=self.max_workers,
+            subtitles=len(subtitles),
+        )
+        if self.budget:
+            self.run_report.set_info(cost=self.budget.summary()["files"].get(os.path.basename(file_path)))
+        try:
+            self.last_report_path = self.run_report.write(self._generate_report_path(file_path))
+            logger.info("运行报告已保存: %s", self.last_report_path)
+        except OSError as e:
+            logger.warning("运行报告保存失败: %s", e)
+        return self.last_report_path
+
+    def _observe_file(self, mode, subtitles, started, ok=True):
+        """文件级指标：处理结果、条数和吞吐"""
+        if self.metrics:
+            self.metrics.observe_file(mode, len(subtitles), time.perf_counter() - started, ok=ok)
+
     #从这里开始是按说话人分组翻译的相关方法
     
     #第二阶段变体：按照说话人分组翻译字幕
     def translate_subtitles_by_speaker(self, subtitles, context_window=5):
         """第二阶段-2：按说话人分组翻译字幕，自动支持并发"""
         if not self.context_summary:
-            print("警告：未进行内容分析，将使用默认翻译")
+            logger.warning("未进行内容分析，将使用默认翻译")
             self.context_summary = f"这是一个需要翻译的字幕文件。请保持原文的语气和风格。"
         groups = self.group_subtitles_by_speaker(subtitles)
         translated_texts = [None] * len(groups)
         translated_groups = [None] * len(groups)
 
-        def safe_translate_group(i, group):
+        def safe_translate_group(i, group, stats):
             prev_context = "\n".join([g for g in translated_groups[max(0, i-context_window):i] if g]) if i > 0 else ""
             next_groups = groups[i+1:i+1+context_window]
             next_context = "\n".join(
                 "\n".join([sub.text for sub in g]) for g in next_groups
             ) if next_groups else ""
-            group_text = "\n".join([sub.text for sub in group])
-            group_text = group_text.replace('\n', ' ').replace('\r', ' ')
+            # 限制了每组条数时逐行发送并要求逐行返回，行数对得上就按行对应，
+            # 否则（以及默认的按说话人分组）合成一段后按长度拆分
+            keep_lines = bool(self.max_group_lines) and len(group) > 1
+            if keep_lines:
+                group_text = "\n".join(sub.text.replace('\n', ' ').replace('\r', ' ') for sub in group)
+            else:
+                group_text = "\n".join([sub.text for sub in group])
+                group_text = group_text.replace('\n', ' ').replace('\r', ' ')
+            line_rule = (f"\n                    9. 待翻译分组文本共 {len(group)} 行，每行是一条字幕，请逐行翻译，"
+                         f"输出同样的 {len(group)} 行" if keep_lines else "")
             max_retries = 3
             for retry in range(max_retries):
+                stats['retries'] = retry
                 try:
                     self._update_progress(
                         "group_start", i+1, len(groups),
                         f"开始翻译第{i+1}组（重试{retry+1}/{max_retries}）"
                     )
+                    prompt_start = time.perf_counter()
                     prompt = f"""
                     你是一位专业的中英字幕翻译专家，正在翻译一段具有角色发言结构的视频字幕。以下是关于这个视频/内容的背景信息：
                     {self.context_summary}
@@ -444,7 +624,7 @@ class SmartSubtitleTranslator:
                     5. 上下文信息仅供参考，请勿翻译上下文内容。
                     6. 保持与上文衔接，并为下文留出衔接空间。
                     7. 如果有单独的数字，一般代表着掷骰的点数，不是多少分，不要翻译成xx分，而是xx就行。
-                    8. 请注意相似的人名翻译，例如惠顿 WIL 威尔 WILL，要有区分，名字请一定要翻译
+                    8. 请注意相似的人名翻译，例如惠顿 WIL 威尔 WILL，要有区分，名字请一定要翻译{line_rule}
 
                     
                     已翻译上文（前{context_window}组）：
@@ -458,17 +638,20 @@ class SmartSubtitleTranslator:
                     
                     请只返回待翻译分组文本的翻译结果。
                     """
-                    translated_group = self.translator.translate(
+                    self.run_report.add_span("prompt_assembly", time.perf_counter() - prompt_start)
+                    translated_group = self._call_translator(
                         text=group_text,
                         system_prompt=prompt,
-                        temperature=self.temperature
+                        temperature=self.temperature,
+                        stats=stats
                     )
                     if not translated_group or translated_group.strip() == '':
                         raise ValueError("翻译结果为空")
                     translated_group = translated_group.strip()
-                    translated_group = translated_group.replace('\n', ' ').replace('\r', ' ')
                     lines = [line.strip() for line in translated_group.split('\n') if line.strip()]
-                    if len(lines) == len(group):
+                    translated_group = translated_group.replace('\n', ' ').replace('\r', ' ')
+                    split_start = time.perf_counter()
+                    if keep_lines and len(lines) == len(group):
                         zh_splits = lines
                     else:
                         eng_lens = [len(sub.text) for sub in group]
@@ -476,39 +659,62 @@ class SmartSubtitleTranslator:
                         zh_total = len(translated_group)
                         target_lengths = [max(1, int(zh_total * l / total_eng)) for l in eng_lens]
                         zh_splits = self.smart_split_translatedSubs(translated_group, target_lengths)
-                        if len(zh_splits) != len(group):
-                            print(f"警告：第{i}组拆分数量不符，原组{len(group)}条，拆分后{len(zh_splits)}条")
+                    self.run_report.add_span("split", time.perf_counter() - split_start)
+                    if len(zh_splits) != len(group):
+                        logger.warning("第%d组拆分数量不符，原组%d条，拆分后%d条", i, len(group), len(zh_splits))
                     translated_groups[i] = "".join(zh_splits)
                     self._update_progress(
                         "group_done", i+1, len(groups),
                         f"第{i+1}组翻译完成"
                     )
                     return zh_splits
+                except BudgetExceededError:
+                    raise
                 except Exception as e:
                     self._update_progress(
                         "group_error", i+1, len(groups),
                         f"第{i+1}组翻译失败（第{retry+1}次）：{e}"
                     )
-                    print(f"翻译分组 {i} 失败（第 {retry + 1} 次尝试）: {e}")
+                    logger.warning("翻译分组 %d 失败（第 %d 次尝试）: %s", i, retry + 1, e)
                     if retry == max_retries - 1:
                         if isinstance(e, ValueError):
                             return [f"[翻译失败] {sub.text}" for sub in group]
                         else:
                             return [f"[翻译错误：{str(e)}] {sub.text}" for sub in group]
-                    time.sleep(10)
+                    time.sleep(self.GROUP_RETRY_DELAY)
+
+        def timed_translate_group(i, group, submitted):
+            """记录排队等待、延迟、token 和重试次数"""
+            started = time.perf_counter()
+            stats = self._new_request_stats()
+            result = safe_translate_group(i, group, stats)
+            self._record_request("group", stats, started, submitted, ok=not self._is_failed_text(result[0]))
+            return result
+
         # 自动并发或顺序
         if self.max_workers > 1:
-            print(f"使用并发翻译模式（{self.max_workers}线程）...")
+            logger.info("使用并发翻译模式（%d线程）...", self.max_workers)
             with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = [executor.submit(safe_translate_group, i, group) for i, group in enumerate(groups)]
+                futures = {
+                    executor.submit(timed_translate_group, i, group, time.perf_counter()): i
+                    for i, group in enumerate(groups)
+                }
+                budget_error = None
                 for future in concurrent.futures.as_completed(futures):
+                    idx = futures[future]
                     try:
-                        idx = futures.index(future)
                         result = future.result()
                         translated_texts[idx] = result
+                    except BudgetExceededError as e:
+                        # 预算用完：取消尚未开始的任务
+                        budget_error = e
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        break
                     except Exception as e:
-                        print(f"分组 {idx} 并发任务异常: {e}")
+                        logger.error("分组 %d 并发任务异常: %s", idx, e)
                         translated_texts[idx] = [f"[处理失败]"] * len(groups[idx])
+            if budget_error:
+                raise budget_error
             # 展平结果
             final_texts = []
             for group_result in translated_texts:
@@ -516,9 +722,9 @@ class SmartSubtitleTranslator:
                     final_texts.extend(group_result)
             return final_texts
         else:
-            print("使用顺序翻译模式...")
+            logger.info("使用顺序翻译模式...")
             for i, group in enumerate(groups):
-                result = safe_translate_group(i, group)
+                result = timed_translate_group(i, group, time.perf_counter())
                 translated_texts[i] = result
             final_texts = []
             for group_result in translated_texts:
@@ -554,6 +760,9 @@ class SmartSubtitleTranslator:
         if current:
             groups.append(current)
         
+        if self.max_group_lines:
+            groups = [group[k:k + self.max_group_lines]
+                      for group in groups for k in range(0, len(group), self.max_group_lines)]
         return groups
         
         
@@ -602,15 +811,22 @@ class SmartSubtitleTranslator:
     
     def process_subtitle_file_grouped(self, file_path, target_language, use_concurrent=False) -> Tuple[str, str]:
        """ 处理字幕文件，按说话人分组翻译，并智能分割翻译后的字幕文本。""" 
+       self.run_report = RunReport()
+       file_start = time.perf_counter()
+       subtitles = []
+       if self.budget:
+           self.budget.start_file(os.path.basename(file_path))
        try:
            # 读取字幕文件
             self._update_progress("reading_file", extra_info=f"读取文件: {os.path.basename(file_path)}")
-            with open(file_path, 'r', encoding = 'utf-8') as f:
-               content = f.read()
+            with self.run_report.span("read_file"):
+                with open(file_path, 'r', encoding = 'utf-8') as f:
+                    content = f.read()
                
             # 解析字幕
             self._update_progress("parsing_subtitles", extra_info="解析字幕格式")
-            subtitles = self.parse_subtitles(content)
+            with self.run_report.span("parse"):
+                subtitles = self.parse_subtitles(content)
             
             # 检查是否有可翻译的字幕
             if not subtitles:
@@ -624,47 +840,57 @@ class SmartSubtitleTranslator:
             
             # 第一阶段：分析内容
             self._update_progress("content_analysis", extra_info="分析内容和上下文")
-            print("正在分析内容...")
-            context_summary = self.analyze_content(full_text)
+            logger.info("正在分析内容...")
+            with self.run_report.span("analyze_content"):
+                context_summary = self.analyze_content(full_text)
             
             # 如果内容分析失败，使用默认提示词
             if not context_summary:
                 context_summary = "这是一个需要翻译的字幕文件。请保持原文的语气和风格。"
             
-            print(f"内容分析完成：\n{context_summary}\n")
+            logger.info("内容分析完成")
+            logger.debug("内容分析结果:\n%s", context_summary)
             
             # 将上下文摘要保存为实例变量
             self.context_summary = context_summary
             
             # 第二阶段：按说话人分组翻译字幕
             self._update_progress("translation_start", 0, len(subtitles), "开始按说话人分组翻译")
-            print("开始按照说话人分组进行翻译...")
+            logger.info("开始按照说话人分组进行翻译...")
             
             # 选择翻译方式 - 关键修改
-            if use_concurrent:
-                print("使用并发翻译模式...")
-                translated_texts = self.translate_subtitles_by_speaker_concurrent(subtitles)
-            else:
-                print("使用顺序翻译模式...")
-                translated_texts = self.translate_subtitles_by_speaker(subtitles)
+            with self.run_report.span("translate"):
+                if use_concurrent:
+                    logger.info("使用并发翻译模式...")
+                    translated_texts = self.translate_subtitles_by_speaker_concurrent(subtitles)
+                else:
+                    logger.info("使用顺序翻译模式...")
+                    translated_texts = self.translate_subtitles_by_speaker(subtitles)
             
             # 检查翻译结果
             if len(translated_texts) != len(subtitles):
-                print(f"警告：翻译结果数量({len(translated_texts)})与原字幕数量({len(subtitles)})不符")
+                logger.warning("翻译结果数量(%d)与原字幕数量(%d)不符", len(translated_texts), len(subtitles))
                 
+            # 修复断句（可选）
+            if self.break_fixer:
+                with self.run_report.span("fix_breaks"):
+                    translated_texts = self.fix_translated_breaks(subtitles, translated_texts)
+            
             # 重建字幕文件
             self._update_progress("rebuilding", extra_info="重建SRT文件")
-            output_content = self.rebuild_subtitles(subtitles, translated_texts)
+            with self.run_report.span("rebuild"):
+                output_content = self.rebuild_subtitles(subtitles, translated_texts)
             
             # 保存翻译结果
             output_path = self._generate_output_path(file_path, target_language)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(output_content)
-                
-            # 保存分析报告
             analysis_path = self._generate_analysis_path(file_path)
-            with open(analysis_path, 'w', encoding='utf-8') as f:
-                f.write(f"内容分析报告:\n{context_summary}")
+            with self.run_report.span("write_output"):
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(output_content)
+                    
+                # 保存分析报告
+                with open(analysis_path, 'w', encoding='utf-8') as f:
+                    f.write(f"内容分析报告:\n{context_summary}")
             
             # 检查是否有翻译失败的字幕
             failed_subtitles = [
@@ -673,11 +899,14 @@ class SmartSubtitleTranslator:
             ]
             
             if failed_subtitles:
-                print(f"警告：{len(failed_subtitles)}个字幕翻译失败")
+                logger.warning("%d个字幕翻译失败", len(failed_subtitles))
             
+            self._write_run_report(file_path, "grouped", subtitles)
+            self._observe_file("grouped", subtitles, file_start)
             self._update_progress("completed", len(subtitles), len(subtitles), f"翻译完成: {os.path.basename(output_path)}")
             return output_path, analysis_path
        except Exception as e:
            self._update_progress("error", extra_info=f"处理文件失败: {str(e)}")
-           print(f"处理字幕文件 {file_path} 时发生错误: {e}")
+           logger.error("处理字幕文件 %s 时发生错误: %s", file_path, e)
+           self._observe_file("grouped", subtitles, file_start, ok=False)
            raise
\ No newline at end of file
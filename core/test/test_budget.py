@@ -0,0 +1,178 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from core.budget import BudgetManager, BudgetExceededError
+from core.subtitle_translator import Subtitle, SmartSubtitleTranslator
+
+class UsageMockTranslator:
+    """每次请求固定返回 1000 输入 token、200 输出 token 的模拟翻译器"""
+    api_type = "openai"
+
+    def __init__(self, model="gpt-4o"):
+        self.model = model
+        self.models_used = []
+        self._local = threading.local()
+
+    @property
+    def last_usage(self):
+        return getattr(self._local, 'usage', None)
+
+    def translate(self, text, system_prompt, temperature=0.7, model=None):
+        self.models_used.append(model or self.model)
+        self._local.usage = {"prompt_tokens": 1000, "completion_tokens": 200}
+        return f"译文：{text}"
+
+def make_subtitles(count):
+    speakers = ["ORION", "MATT", "LAURA"]
+    return [
+        Subtitle(str(i + 1), "00:00:01,000", "00:00:02,000", f"{speakers[i % 3]}: line {i}")
+        for i in range(count)
+    ]
+
+def test_tracks_usage_per_file_and_provider():
+    """测试按文件、服务商和整次运行统计"""
+    budget = BudgetManager()
+    budget.start_file("a.srt")
+    budget.record("openai", "gpt-4o", 1_000_000, 0)
+    budget.start_file("b.srt")
+    budget.record("openai", "gpt-4o-2024-08-06", 0, 1_000_000)
+
+    summary = budget.summary()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    assert summary["files"]["a.srt"]["cost"] == 2.5
+    assert summary["files"]["b.srt"]["cost"] == 10.0  # 按前缀 gpt-4o 计价
+    assert summary["run"]["cost"] == 12.5
+    assert summary["providers"]["openai/gpt-4o"]["requests"] == 1
+
+def test_stop_at_ceiling():
+    """测试 stop：达到上限后抛出异常，分组翻译中止"""
+    translator = UsageMockTranslator()
+    # 每次请求约 $0.0045，上限允许 2 次请求
+    budget = BudgetManager(max_cost=0.009, action="stop")
+    subtitle_translator = SmartSubtitleTranslator(translator=translator, max_workers=1, budget=budget)
+    subtitle_translator.context_summary = "测试"
+
+    try:
+        subtitle_translator.translate_subtitles_by_speaker(make_subtitles(6))
+        assert False, "应该抛出 BudgetExceededError"
+    except BudgetExceededError as e:
+        print(f"✓ 预算中止: {e}")
+
+    assert len(translator.models_used) == 2
+    assert budget.exceeded
+
+def test_downgrade_to_cheaper_model():
+    """测试 downgrade：接近上限时切换到模型列表中更便宜的模型"""
+    translator = UsageMockTranslator(model="gpt-4o")
+    budget = BudgetManager(max_cost=0.02, action="downgrade", downgrade_ratio=0.2,
+                           models=["gpt-4o", "gpt-4.1", "gpt-3.5-turbo"])
+    subtitle_translator = SmartSubtitleTranslator(translator=translator, max_workers=1, budget=budget)
+    subtitle_translator.context_summary = "测试"
+    subtitle_translator.translate_subtitles_by_speaker(make_subtitles(3))
+
+    print(f"使用的模型: {translator.models_used}")
+    assert translator.models_used[0] == "gpt-4o"
+    assert translator.models_used[-1] == "gpt-3.5-turbo"
+    assert budget.summary()["downgrades"][0] == {"from": "gpt-4o", "to": "gpt-3.5-turbo", "usage_ratio": 0.225}
+    # 降级通过请求参数生效，不修改多个线程共用的 translator.model
+    assert translator.model == "gpt-4o"
+    assert budget.downgraded_model == "gpt-3.5-turbo"
+
+def test_pause_then_resume():
+    """测试 pause：达到上限后阻塞并通知，提高上限后继续翻译"""
+    translator = UsageMockTranslator()
+    paused = threading.Event()
+    # 上限允许 2 次请求，之后暂停
+    budget = BudgetManager(max_cost=0.009, action="pause", on_pause=paused.set)
+    subtitle_translator = SmartSubtitleTranslator(translator=translator, max_workers=1, budget=budget)
+    subtitle_translator.context_summary = "测试"
+
+    results = []
+    worker = threading.Thread(
+        target=lambda: results.append(subtitle_translator.translate_subtitles_by_speaker(make_subtitles(6))),
+        daemon=True
+    )
+    worker.start()
+    assert paused.wait(5), "应该调用 on_pause"
+    assert worker.is_alive()
+    assert len(translator.models_used) == 2
+
+    budget.resume(max_cost=1.0)
+    worker.join(5)
+    assert not worker.is_alive()
+    print(f"✓ 恢复后完成，共 {len(translator.models_used)} 次请求")
+    assert len(translator.models_used) == 6
+    assert len(results[0]) == 6
+    assert not budget.exceeded
+
+def test_pause_does_not_count_toward_timeout():
+    """测试暂停时间超过请求超时：恢复后只发出一次请求，不会超时重试"""
+    translator = UsageMockTranslator()
+    paused = threading.Event()
+    budget = BudgetManager(max_cost=0.004, action="pause", on_pause=paused.set)
+    budget.record("openai", "gpt-4o", 1000, 200)  # 已经超出上限
+    subtitle_translator = SmartSubtitleTranslator(translator=translator, max_workers=1, budget=budget)
+
+    results = []
+    worker = threading.Thread(
+        target=lambda: results.append(subtitle_translator.translate_with_timeout("hello", "翻译", timeout_seconds=0.2)),
+        daemon=True
+    )
+    worker.start()
+    assert paused.wait(5), "应该调用 on_pause"
+    time.sleep(0.5)
+    assert worker.is_alive()
+    assert translator.models_used == []
+
+    budget.resume(max_cost=1.0)
+    worker.join(5)
+    assert results == ["译文：hello"]
+    assert len(translator.models_used) == 1
+
+def test_pause_then_cancel():
+    """测试 pause 后取消：阻塞的请求抛出 BudgetExceededError"""
+    translator = UsageMockTranslator()
+    budget = BudgetManager(max_cost=0.0045, action="pause", on_pause=lambda: budget.cancel())
+    budget.before_request(translator)
+    budget.record("openai", "gpt-4o", 1000, 200)  # 正好用完上限
+
+    try:
+        budget.before_request(translator)
+        assert False, "应该抛出 BudgetExceededError"
+    except BudgetExceededError as e:
+        print(f"✓ 已取消: {e}")
+    assert budget.cancelled
+
+def test_estimate_without_usage_and_write_summary():
+    """测试没有 usage 时估算 token，并写出费用汇总"""
+    class PlainTranslator:
+        model = "deepseek-chat"
+        api_type = "deepseek"
+
+    budget = BudgetManager()
+    budget.record_response(PlainTranslator(), "请翻译这句话 hello world", "你好世界")
+    run = budget.summary()["run"]
+    assert run["estimated_requests"] == 1
+    assert run["prompt_tokens"] > 0 and run["completion_tokens"] > 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = budget.write_summary(os.path.join(tmp_dir, "cost.json"))
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f)["providers"]["deepseek/deepseek-chat"]["requests"] == 1
+
+if __name__ == "__main__":
+    test_tracks_usage_per_file_and_provider()
+    test_stop_at_ceiling()
+    test_downgrade_to_cheaper_model()
+    test_pause_then_resume()
+    test_pause_does_not_count_toward_timeout()
+    test_pause_then_cancel()
+    test_estimate_without_usage_and_write_summary()
@@ -0,0 +1,57 @@
+import sys
+import os
+import json
+import tempfile
+import subprocess
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from benchmark.mock_llm_server import MockLLMServer
+from core.cli import main
+from core.srt_io import read_srt
+
+def test_cli_does_not_import_gui():
+    """测试命令行入口不导入 tkinter / customtkinter"""
+    code = ("import sys, core.cli; core.cli.build_parser(); "
+            "print(sorted(m for m in ('tkinter', 'customtkinter') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    print(result.stdout.strip())
+    assert result.stdout.strip() == "[]"
+
+def test_cli_translate_folder():
+    """测试无界面翻译整个目录：参数覆盖 config.json，写出译文和费用汇总"""
+    with MockLLMServer(latency="fixed:0.001") as server, tempfile.TemporaryDirectory() as tmp_dir:
+        config_path = os.path.join(tmp_dir, "config.json")
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump({"apis": [{"name": "Mock", "base_url": server.base_url, "api_type": "openai",
+                                 "models": ["mock-model"], "api_key": "test"}]}, f)
+
+        episodes = os.path.join(tmp_dir, "episodes")
+        os.makedirs(episodes)
+        for name in ("ep1.srt", "ep2.srt"):
+            with open(os.path.join(episodes, name), 'w', encoding='utf-8') as f:
+                f.write("1\n00:00:01,000 --> 00:00:02,000\nMATT: Hello there.\n\n"
+                        "2\n00:00:02,000 --> 00:00:03,000\nRoll initiative.\n\n")
+
+        # 在临时目录运行，避免在项目目录生成默认的 config.json
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            code = main(["translate", episodes, "--config", config_path, "--api", "Mock",
+                         "--mode", "context", "--workers", "2", "--log-level", "ERROR"])
+        finally:
+            os.chdir(cwd)
+
+        assert code == 0
+        translated = read_srt(os.path.join(episodes, "ep2_translated_Chinese.srt"))
+        print([sub.text for sub in translated])
+        assert len(translated) == 2
+        assert all(sub.text.startswith("译文：") for sub in translated)
+        assert os.path.exists(os.path.join(episodes, "translation_cost_summary.json"))
+
+if __name__ == "__main__":
+    test_cli_does_not_import_gui()
+    test_cli_translate_folder()
@@ -0,0 +1,45 @@
+import sys
+import os
+import tempfile
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from PIL import Image, ImageChops, ImageStat
+from convert_thumbnail_4x3 import blurred_background, convert_folder, list_thumbnails
+
+def make_thumbnail(path, seed=0):
+    img = Image.effect_mandelbrot((320, 180), (-2 + seed * 0.05, -1, 1, 1), 64).convert('RGB')
+    img.save(path, quality=90)
+
+def test_fast_blur_matches_exact_blur():
+    """测试低分辨率模糊与全分辨率模糊的背景几乎一致"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "thumb.jpg")
+        make_thumbnail(path)
+        img = Image.open(path).convert('RGB')
+
+    exact = blurred_background(img, (320, 240), fast=False)
+    fast = blurred_background(img, (320, 240), fast=True)
+    assert fast.size == exact.size == (320, 240)
+    diff = max(ImageStat.Stat(ImageChops.difference(exact, fast)).mean)
+    print(f"平均像素差: {diff:.2f}")
+    assert diff < 4
+
+def test_convert_folder():
+    """测试批量转换：输出为 4:3，重新运行时跳过已生成的文件"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for i in range(3):
+            make_thumbnail(os.path.join(tmp_dir, f"ep{i}.jpg"), i)
+
+        created, failed = convert_folder(tmp_dir, blur=True, jobs=2)
+        assert not failed
+        assert len(created) == 6
+        with Image.open(os.path.join(tmp_dir, "ep1_4x3_blur.jpg")) as img:
+            assert img.size == (320, 240)
+        assert [os.path.basename(f) for f in list_thumbnails(tmp_dir)] == ["ep0.jpg", "ep1.jpg", "ep2.jpg"]
+
+if __name__ == "__main__":
+    test_fast_blur_matches_exact_blur()
+    test_convert_folder()
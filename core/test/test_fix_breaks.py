@@ -0,0 +1,224 @@
+import sys
+import os
+import tempfile
+
+import jieba
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import fix_breaks
+from fix_breaks import (SubtitleBreakFixer, DocumentSegmentation, fix_files_parallel,
+                        load_jieba_dictionary, jieba_dict_cache_path)
+from core.subtitle_translator import Subtitle, SmartSubtitleTranslator
+
+def test_find_vocab_word():
+    """测试字典树匹配跨断点的专有名词"""
+    fixer = SubtitleBreakFixer(custom_vocab=["维瑟海姆", "维瑟", "杜斯草原", "Vasselheim"])
+
+    # 词汇表靠前的词优先
+    assert fixer.find_vocab_word("我们要去维瑟", "海姆，然后") == ("维瑟海姆", "维瑟")
+    assert fixer.find_vocab_word("穿过杜斯", "草原。") == ("杜斯草原", "杜斯")
+    assert fixer.find_vocab_word("to Vassel", "heim now") == ("Vasselheim", "Vassel")
+    # 两侧都紧贴其他字时不算断词
+    assert fixer.find_vocab_word("穿过，杜斯", "草原里") == ("杜斯草原", "杜斯")
+    assert fixer.find_vocab_word("穿过杜斯", "草原里") == (None, None)
+    assert fixer.find_vocab_word("没有术语", "这里也没有") == (None, None)
+    # text1 整句就是词的前半部分
+    assert fixer.find_vocab_word("维瑟", "海姆到了") == ("维瑟海姆", "维瑟")
+    print("✓ 专有名词匹配正确")
+
+def test_document_segmentation():
+    """测试整篇分词的断点查找，以及修改后局部重新分词"""
+    segmentation = DocumentSegmentation(["我们明天一起去图书", "馆看书吧", "好的没问题"])
+    assert segmentation.find_broken_word(0) == (True, "图书馆", "图书")
+    assert segmentation.find_broken_word(1) == (False, None, None)
+
+    segmentation.update(0, "我们明天一起去")
+    segmentation.update(1, "图书馆看书吧")
+    assert segmentation.find_broken_word(0) == (False, None, None)
+    print("✓ 整篇分词断点查找正确")
+
+def test_document_segmentation_unpunctuated():
+    """测试没有标点的字幕：连续文字跨越多条字幕时，远处的改动也会触发重新分词，且重新分词的长度有上限"""
+    texts = ["命的起源", "中", "华", "人", "民共和国成"]
+    segmentation = DocumentSegmentation(texts)
+    # 第 2 条改动后，断点 3 所在的连续文字从第 0 条一直延伸到第 4 条，不能再用整篇分词结果
+    segmentation.update(1, "们在")
+    expected = DocumentSegmentation(["命的起源", "们在", "华", "人", "民共和国成"])
+    for i in range(len(texts) - 1):
+        assert segmentation.find_broken_word(i) == expected.find_broken_word(i)
+    assert segmentation.find_broken_word(3) == (True, "人民共和国", "人")
+
+    # 有标点隔开时，改动不影响另一侧的断点
+    segmentation = DocumentSegmentation(["起源", "好。的", "中", "华人", "民"])
+    segmentation.update(0, "生命")
+    assert not segmentation._run_is_dirty(3)
+    assert segmentation._run_is_dirty(0)
+
+    # 很长的无标点轨道：每个脏断点只重新分词上限以内的文字
+    texts = ["我们明天一起去图书", "馆看书吧好的没问题"] * 500
+    segmentation = DocumentSegmentation(texts)
+    segmentation.update(0, "他们明天一起去图书")
+    lengths = []
+    original = fix_breaks.find_token_at
+    def recording_find_token_at(text, split_pos, text1, text2):
+        lengths.append(len(text))
+        return original(text, split_pos, text1, text2)
+    fix_breaks.find_token_at = recording_find_token_at
+    try:
+        results = [segmentation.find_broken_word(i) for i in range(len(texts) - 1)]
+    finally:
+        fix_breaks.find_token_at = original
+    assert len(lengths) == len(texts) - 1
+    assert max(lengths) <= 2 * DocumentSegmentation.RESEGMENT_CHARS
+    assert results[0] == results[-1] == (True, "图书馆", "图书")
+    print("✓ 无标点字幕的断点查找正确")
+
+def test_fix_until_fixed_point():
+    """测试修复产生的新断点会被重新检查，以及每条字幕的修复次数上限"""
+    texts = ["我们去维瑟", "海姆", "大教堂。"]
+    fixer = SubtitleBreakFixer(custom_vocab=["维瑟海姆", "海姆大教堂"])
+
+    subtitles = [Subtitle(str(i + 1), "", "", text) for i, text in enumerate(texts)]
+    fixes = fixer.fix_subtitles(subtitles)
+    for fix in fixes:
+        print(fix)
+    # 第二次修复后第 2 条只剩“维瑟”，再移动会把它清空，所以停在这里
+    assert [fix['index'] for fix in fixes] == [1, 2]
+    assert [sub.text for sub in subtitles] == ["我们去", "维瑟", "海姆大教堂。"]
+    assert all(sub.text for sub in subtitles)
+    # 已经是不动点，再运行一次没有新的修复
+    assert fixer.fix_subtitles(subtitles) == []
+
+    fixer.MAX_MOVES_PER_CUE = 1
+    subtitles = [Subtitle(str(i + 1), "", "", text) for i, text in enumerate(texts)]
+    assert len(fixer.fix_subtitles(subtitles)) == 1
+    assert [sub.text for sub in subtitles] == ["我们去", "维瑟海姆", "大教堂。"]
+
+def test_fix_never_empties_a_cue():
+    """测试整条字幕都是被切断的词时不移动（包括双语字幕的中文行），不产生空字幕"""
+    fixer = SubtitleBreakFixer(custom_vocab=["维瑟海姆"])
+    subtitles = [Subtitle("1", "", "", "维瑟\nVassel"), Subtitle("2", "", "", "海姆到了\nheim"),
+                 Subtitle("3", "", "", "去维瑟"), Subtitle("4", "", "", "海姆")]
+    fixes = fixer.fix_subtitles(subtitles)
+    assert [fix['index'] for fix in fixes] == [3]
+    assert [sub.text for sub in subtitles] == ["维瑟\nVassel", "海姆到了\nheim", "去", "维瑟海姆"]
+
+def test_jieba_dictionary_cache():
+    """测试编译后的词典缓存：第一次构建并写入，之后直接加载"""
+    vocab = ["塔尔迪欧斯", "Tal'Dorei"]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        assert load_jieba_dictionary(vocab, tmp_dir) is False
+        assert os.path.exists(jieba_dict_cache_path(vocab, tmp_dir))
+        # 词汇表变化对应不同的缓存文件
+        assert jieba_dict_cache_path(vocab, tmp_dir) != jieba_dict_cache_path(vocab[:1], tmp_dir)
+
+        total = jieba.dt.total
+        jieba.dt.FREQ = {}
+        assert load_jieba_dictionary(list(reversed(vocab)), tmp_dir) is True
+        assert jieba.dt.FREQ["塔尔迪欧斯"] == 999999
+        assert jieba.dt.total == total
+        assert "塔尔迪欧斯" in jieba.lcut("我们到了塔尔迪欧斯")
+    print("✓ 词典缓存加载正确")
+
+def test_jieba_dictionary_cache_write_failure():
+    """测试写入或替换缓存失败时不留下临时文件"""
+    vocab = ["维克斯", "Vex'ahlia"]
+
+    class FailingMarshal:
+        @staticmethod
+        def dump(value, f):
+            f.write(b"partial")
+            raise ValueError("unmarshallable object")
+
+        loads = staticmethod(fix_breaks.marshal.loads)
+
+    def failing_replace(src, dst):
+        raise PermissionError("目标被占用")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        saved_marshal = fix_breaks.marshal
+        fix_breaks.marshal = FailingMarshal
+        try:
+            assert load_jieba_dictionary(vocab, tmp_dir) is False
+        finally:
+            fix_breaks.marshal = saved_marshal
+        assert os.listdir(tmp_dir) == []
+
+        saved_replace = os.replace
+        os.replace = failing_replace
+        try:
+            assert load_jieba_dictionary(vocab, tmp_dir) is False
+        finally:
+            os.replace = saved_replace
+        assert os.listdir(tmp_dir) == []
+    print("✓ 缓存写入失败时已清理临时文件")
+
+def test_fix_subtitle_file():
+    """测试修复整个字幕文件，只修改中文首行"""
+    fixer = SubtitleBreakFixer(custom_vocab=["维瑟海姆"])
+    content = (
+        "1\n00:00:01,000 --> 00:00:02,000\n我们要去维瑟\nWe go to Vassel\n\n"
+        "2\n00:00:02,000 --> 00:00:03,000\n海姆，然后休息\nheim, then rest\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "test.srt")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        output_path = fixer.fix_subtitle_file(input_path)
+        with open(output_path, encoding='utf-8') as f:
+            result = f.read()
+
+    print(result)
+    assert "我们要去\nWe go to Vassel" in result
+    assert "维瑟海姆，然后休息\nheim, then rest" in result
+
+def test_fix_translated_subtitles_in_memory():
+    """测试翻译器直接用 break_fixer 修复内存中的译文"""
+    fixer = SubtitleBreakFixer(custom_vocab=["维瑟海姆"])
+    subtitle_translator = SmartSubtitleTranslator(translator=None, break_fixer=fixer)
+    subtitles = [
+        Subtitle("7", "00:00:01,000", "00:00:02,000", "We go to Vassel"),
+        Subtitle("8", "00:00:02,000", "00:00:03,000", "heim, then rest"),
+    ]
+    translated = subtitle_translator.fix_translated_breaks(subtitles, ["我们要去维瑟", "海姆，然后休息"])
+
+    assert translated == ["我们要去", "维瑟海姆，然后休息"]
+    assert subtitles[0].text == "We go to Vassel"
+    assert len(fixer.last_fixes) == 1
+
+def test_fix_files_parallel():
+    """测试多进程批量修复并按输入顺序汇总结果"""
+    fixer = SubtitleBreakFixer(custom_vocab=["维瑟海姆"])
+    content = (
+        "1\n00:00:01,000 --> 00:00:02,000\n我们要去维瑟\n\n"
+        "2\n00:00:02,000 --> 00:00:03,000\n海姆，然后休息\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_files = []
+        for name in ("1-400.srt", "401-800.srt", "missing.srt"):
+            path = os.path.join(tmp_dir, name)
+            if name != "missing.srt":
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            input_files.append(path)
+
+        results = fix_files_parallel(fixer, input_files, jobs=2)
+        assert [r['input'] for r in results] == input_files
+        assert [len(r['fixes']) for r in results[:2]] == [1, 1]
+        assert results[2]['error']
+        assert os.path.exists(os.path.join(tmp_dir, "[修复分句]401-800.srt"))
+
+if __name__ == "__main__":
+    test_find_vocab_word()
+    test_document_segmentation()
+    test_document_segmentation_unpunctuated()
+    test_fix_until_fixed_point()
+    test_fix_never_empties_a_cue()
+    test_jieba_dictionary_cache()
+    test_jieba_dictionary_cache_write_failure()
+    test_fix_subtitle_file()
+    test_fix_translated_subtitles_in_memory()
+    test_fix_files_parallel()
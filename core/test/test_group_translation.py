@@ -623,6 +623,28 @@ def test_current_smart_split_effectiveness():
     print("- 建议在实际使用中采用比例调整策略")
     print("- 极端情况下可能需要额外的错误处理")
 
+def test_max_group_lines_packs_and_keeps_lines():
+    """测试限制每组条数：没有说话人的字幕按固定条数打包，译文逐行对应"""
+    class LineTranslator:
+        def __init__(self):
+            self.requests = []
+
+        def translate(self, text, system_prompt, temperature=0.7):
+            self.requests.append(text)
+            return "\n".join(f"译：{line}" for line in text.split("\n"))
+
+    translator = LineTranslator()
+    subtitle_translator = SmartSubtitleTranslator(translator, max_workers=1, max_group_lines=4,
+                                                  write_report=False)
+    subtitle_translator.context_summary = "测试"
+    subtitles = [Subtitle(str(i + 1), "00:00:01,000", "00:00:02,000", f"segment number {i}")
+                 for i in range(10)]
+
+    result = subtitle_translator.translate_subtitles_by_speaker(subtitles)
+    print(f"{len(translator.requests)} 个请求: {result[:3]}")
+    assert len(translator.requests) == 3  # 4 + 4 + 2
+    assert result == [f"译：segment number {i}" for i in range(10)]
+
 # 运行所有测试
 if __name__ == "__main__":
     try:
@@ -633,6 +655,7 @@ if __name__ == "__main__":
             test_srt_file_generation()
             test_srt_edge_cases()
             test_current_smart_split_effectiveness()
+            test_max_group_lines_packs_and_keeps_lines()
             print("\n🎉🎉🎉 所有测试完成！分组翻译功能和SRT生成功能正常工作！")
     except Exception as e:
         print(f"\n❌ 测试过程中发生错误: {e}")
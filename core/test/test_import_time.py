@@ -0,0 +1,75 @@
+import sys
+import os
+import tempfile
+import subprocess
+import importlib.util
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+# 导入入口模块时不应加载的重量级依赖（第一次用到时才导入）
+HEAVY_MODULES = ("tiktoken", "requests", "jieba", "chardet", "pysrt", "faster_whisper",
+                 "tkinter", "customtkinter")
+
+# 各入口模块的导入时间上限（毫秒）。本机实测在 100ms 以内，上限留出慢速机器的余量；
+# 超出时通常是又在模块顶层导入了重量级依赖或做了磁盘读写
+IMPORT_BUDGET_MS = {
+    "config": 300,
+    "fix_breaks": 300,
+    "core.cli": 300,
+    "core.pipeline": 300,
+    "split_srt": 300,
+    "merge_srt_interactive": 300,
+    "transcribe_whisper_interactive": 300,
+}
+
+def import_time(module, cwd):
+    """
+    在新进程中用 python -X importtime 导入 module
+
+    Returns:
+        (模块的累计导入时间（毫秒）, 导入过程中加载的所有模块名)
+    """
+    env = dict(os.environ, PYTHONPATH=project_root)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    cumulative_us = None
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        loaded.add(name)
+        if name == module and cumulative.strip().isdigit():
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1000, loaded
+
+def test_entry_points_import_lazily():
+    """测试各入口模块不在导入时加载重量级依赖、不读写磁盘，且导入时间在预算内"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for module, budget_ms in IMPORT_BUDGET_MS.items():
+            elapsed_ms, loaded = import_time(module, tmp_dir)
+            heavy = sorted(name for name in loaded if name.split(".")[0] in HEAVY_MODULES)
+            print(f"{module}: {elapsed_ms:.1f}ms（上限 {budget_ms}ms）")
+            assert not heavy, f"{module} 导入时加载了 {heavy}"
+            assert elapsed_ms < budget_ms, f"{module} 导入耗时 {elapsed_ms:.1f}ms，超过 {budget_ms}ms"
+
+        # 导入 config 不应创建 config.json
+        assert os.listdir(tmp_dir) == []
+
+def test_gui_defers_translation_modules():
+    """测试界面入口只加载主页，翻译页面依赖的 requests / tiktoken 等在打开页面时才导入"""
+    if importlib.util.find_spec("customtkinter") is None:
+        print("未安装 customtkinter，跳过")
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _, loaded = import_time("app", tmp_dir)
+    heavy = sorted(name for name in loaded
+                   if name.split(".")[0] in HEAVY_MODULES and name.split(".")[0] not in ("tkinter", "customtkinter"))
+    assert not heavy, f"app 导入时加载了 {heavy}"
+
+if __name__ == "__main__":
+    test_entry_points_import_lazily()
+    test_gui_defers_translation_modules()
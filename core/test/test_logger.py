@@ -0,0 +1,94 @@
+import sys
+import os
+import json
+import logging
+import logging.handlers
+import tempfile
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from core.logger import (SamplingFilter, StructuredFormatter, get_logger, setup_logging,
+                         shutdown_logging)
+
+def make_record(level=logging.INFO, sampled=False, fields=None, msg="请求完成 %s", args=("ok",)):
+    record = logging.LogRecord("srt_translator.test", level, __file__, 1, msg, args, None)
+    if sampled:
+        record.sampled = True
+    if fields:
+        record.fields = fields
+    return record
+
+def test_sampling_filter_interval():
+    """测试 sampled=True 的记录按固定间隔放行，其余记录和 DEBUG 级别全部放行"""
+    sampling = SamplingFilter(0.25)
+    passed = [sampling.filter(make_record(sampled=True)) for _ in range(20)]
+    print(passed)
+    assert passed == [True, False, False, False] * 5
+
+    # 未标记的记录不参与计数
+    assert all(sampling.filter(make_record()) for _ in range(10))
+    assert sampling.filter(make_record(sampled=True))
+    # DEBUG 级别不采样
+    assert all(sampling.filter(make_record(logging.DEBUG, sampled=True)) for _ in range(5))
+
+    assert all(SamplingFilter(1).filter(make_record(sampled=True)) for _ in range(5))
+    none = SamplingFilter(0)
+    assert not any(none.filter(make_record(sampled=True)) for _ in range(5))
+    assert none.filter(make_record(logging.WARNING))
+
+def test_structured_formatter():
+    """测试文本和 JSON 两种输出格式，以及结构化字段"""
+    record = make_record(fields={"tokens": 12, "latency_ms": 340})
+
+    text = StructuredFormatter().format(record)
+    print(text)
+    assert text.endswith("INFO    srt_translator.test: 请求完成 ok tokens=12 latency_ms=340")
+
+    entry = json.loads(StructuredFormatter(json_format=True).format(record))
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "srt_translator.test"
+    assert entry["msg"] == "请求完成 ok"
+    assert entry["tokens"] == 12 and entry["latency_ms"] == 340
+    assert "exc" not in entry
+
+    try:
+        raise ValueError("坏响应")
+    except ValueError:
+        record = make_record(logging.ERROR)
+        record.exc_info = sys.exc_info()
+    entry = json.loads(StructuredFormatter(json_format=True).format(record))
+    assert "ValueError: 坏响应" in entry["exc"]
+    assert "ValueError: 坏响应" in StructuredFormatter().format(record)
+
+def test_shutdown_logging_flushes_queue():
+    """测试 shutdown_logging 停止后台线程前写完队列中剩余的全部记录"""
+    logger = get_logger()
+    saved = logger.level, logger.propagate
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_file = os.path.join(tmp_dir, "run.log")
+        try:
+            setup_logging("INFO", sample_rate=0.5, json_format=True, log_file=log_file)
+            log = get_logger("test")
+            for n in range(500):
+                log.info("明细 %d", n, extra={'sampled': True, 'fields': {"n": n}})
+            log.debug("不输出")
+            log.warning("完成")
+            shutdown_logging()
+
+            with open(log_file, encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f]
+        finally:
+            shutdown_logging()
+            logger.setLevel(saved[0])
+            logger.propagate = saved[1]
+
+    assert [entry["n"] for entry in entries[:-1]] == list(range(0, 500, 2))
+    assert entries[-1]["msg"] == "完成" and entries[-1]["level"] == "WARNING"
+    assert not [h for h in logger.handlers if isinstance(h, logging.handlers.QueueHandler)]
+
+if __name__ == "__main__":
+    test_sampling_filter_interval()
+    test_structured_formatter()
+    test_shutdown_logging_flushes_queue()
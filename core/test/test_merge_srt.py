@@ -0,0 +1,132 @@
+import sys
+import os
+import random
+import tempfile
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from core.srt_io import Subtitle, read_srt
+from merge_srt_interactive import align_track, merge_tracks, merge_srt_files, timestamp_to_ms
+
+def test_timestamp_to_ms():
+    """测试时间轴转换"""
+    assert timestamp_to_ms("00:00:01,000") == 1000
+    assert timestamp_to_ms("01:02:03.045") == 3723045
+
+def test_merge_tracks_with_count_mismatch():
+    """测试条数不一致时按时间重叠对齐，多个轨道依次排列"""
+    original = [
+        Subtitle("1", "00:00:01,000", "00:00:03,000", "We go to Vasselheim"),
+        Subtitle("2", "00:00:03,000", "00:00:06,000", "and then we rest"),
+        Subtitle("3", "00:00:08,000", "00:00:09,000", "Okay."),
+    ]
+    # 译文条数不同：第一条被拆成两条，最后一条偏移到主字幕之后
+    translated = [
+        Subtitle("1", "00:00:01,000", "00:00:02,100", "我们去维瑟海姆"),
+        Subtitle("2", "00:00:02,100", "00:00:03,100", "出发吧"),
+        Subtitle("3", "00:00:03,100", "00:00:05,900", "然后休息"),
+        Subtitle("4", "00:00:09,200", "00:00:09,800", "好的。"),
+    ]
+    # 注释轨道无序、和第二条重叠更多
+    notes = [
+        Subtitle("2", "00:00:08,000", "00:00:08,500", "（笑）"),
+        Subtitle("1", "00:00:02,500", "00:00:05,000", "维瑟海姆：城市名"),
+    ]
+
+    merged = list(merge_tracks([original, translated, notes]))
+    for sub in merged:
+        print(sub.index, sub.timestamp_in, repr(sub.text))
+
+    assert [sub.index for sub in merged] == ["1", "2", "3"]
+    assert merged[0].text == "We go to Vasselheim\n我们去维瑟海姆 出发吧"
+    assert merged[1].text == "and then we rest\n然后休息\n维瑟海姆：城市名"
+    assert merged[2].text == "Okay.\n好的。\n（笑）"
+
+def test_merge_srt_files():
+    """测试合并文件：输出条数与主轨道一致"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for name, texts in (("en.srt", ["Hello", "World", "Bye"]), ("zh.srt", ["你好", "世界"])):
+            path = os.path.join(tmp_dir, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                for i, text in enumerate(texts):
+                    f.write(f"{i+1}\n00:00:0{i},000 --> 00:00:0{i+1},000\n{text}\n\n")
+            paths.append(path)
+
+        output_path = os.path.join(tmp_dir, "merged.srt")
+        assert merge_srt_files(paths, output_path) == 3
+        merged = read_srt(output_path)
+
+    assert [sub.text for sub in merged] == ["Hello\n你好", "World\n世界", "Bye"]
+
+def align_track_reference(primary, track):
+    """逐条比较全部主字幕的对齐结果（O(n·m)），用来验证 align_track"""
+    assigned = [[] for _ in primary]
+    for start, end, sub in track:
+        overlaps = [(min(end, p_end) - max(start, p_start), -k) for k, (p_start, p_end, _) in enumerate(primary)]
+        overlap, k = max(overlaps)
+        if overlap <= 0:
+            k = -min(range(len(primary)),
+                     key=lambda k: max(primary[k][0] - end, start - primary[k][1]))
+        assigned[-k].append(sub.text)
+    return assigned
+
+def make_track(times):
+    return sorted((start, end, Subtitle("", "", "", f"{start}-{end}")) for start, end in times)
+
+def test_align_track_matches_reference():
+    """测试与逐条比较的结果一致：包括很长的主字幕、互相重叠和没有重叠的字幕"""
+    rng = random.Random(7)
+    for _ in range(200):
+        # 所有时间点互不相同，避免距离相等时的平局
+        points = rng.sample(range(100000), 2 * rng.randint(1, 30) + 2 * rng.randint(1, 30))
+        pairs = [tuple(sorted(points[i:i + 2])) for i in range(0, len(points), 2)]
+        split = rng.randint(1, len(pairs) - 1)
+        primary, track = make_track(pairs[:split]), make_track(pairs[split:])
+        assert align_track(primary, track) == align_track_reference(primary, track)
+
+class CountingList(list):
+    """记录按下标访问的次数"""
+    reads = 0
+
+    def __getitem__(self, index):
+        CountingList.reads += 1
+        return super().__getitem__(index)
+
+def test_align_track_long_primary_cue():
+    """测试一条贯穿全片的主字幕不会让后面每条字幕都重新扫描已经结束的主字幕"""
+    n = 2000
+    times = [(0, 10 * n + 10)] + [(10 * i, 10 * i + 5) for i in range(1, n + 1)]
+    primary = CountingList(make_track(times))
+    track = make_track((10 * i + 1, 10 * i + 4) for i in range(1, n + 1))
+
+    CountingList.reads = 0
+    assigned = align_track(primary, track)
+    print(f"{n} 条字幕，访问主字幕 {CountingList.reads} 次")
+    assert CountingList.reads < 20 * n
+    # 长字幕与每条都重叠 3ms，与对应的短字幕也重叠 3ms，平局时取靠前的长字幕
+    assert len(assigned[0]) == n
+
+def test_align_track_zero_duration_cue():
+    """测试时长为 0 的字幕：落在主字幕之内时分配给这条主字幕，而不是后一条"""
+    primary = make_track([(0, 10000), (20000, 30000)])
+    track = make_track([(5000, 5000), (16000, 16000), (30000, 30000)])
+    assert align_track(primary, track) == [["5000-5000"], ["16000-16000", "30000-30000"]]
+
+def test_align_track_no_following_candidate():
+    """测试主字幕之后没有候选时不出错：唯一的主字幕包含时长为 0 的字幕、所有主字幕之后的字幕"""
+    primary = make_track([(0, 10000)])
+    track = make_track([(5000, 5000), (10000, 10000), (20000, 20000), (30000, 25000)])
+    assert align_track(primary, track) == [["5000-5000", "10000-10000", "20000-20000", "30000-25000"]]
+    assert align_track(make_track([(1000, 1000)]), make_track([(1000, 1000)])) == [["1000-1000"]]
+
+if __name__ == "__main__":
+    test_timestamp_to_ms()
+    test_merge_tracks_with_count_mismatch()
+    test_merge_srt_files()
+    test_align_track_matches_reference()
+    test_align_track_long_primary_cue()
+    test_align_track_zero_duration_cue()
+    test_align_track_no_following_candidate()
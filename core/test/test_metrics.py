@@ -0,0 +1,95 @@
+import sys
+import os
+import tempfile
+import urllib.request
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from core.metrics import MetricsRegistry, TranslationMetrics
+from core.subtitle_translator import Subtitle, SmartSubtitleTranslator
+
+class FlakyMockTranslator:
+    """第一次调用抛出异常的模拟翻译器"""
+    api_type = "mock"
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, text, system_prompt, temperature=0.7):
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionError("模拟网络错误")
+        return f"译文：{text}"
+
+def test_render_prometheus_text():
+    """测试文本格式渲染"""
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_requests_total", "请求数", ("kind",))
+    histogram = registry.histogram("demo_latency_seconds", "延迟", buckets=(1, 5))
+    counter.inc(kind="group")
+    counter.inc(2, kind="group")
+    histogram.observe(0.5)
+    histogram.observe(3)
+
+    text = registry.render()
+    print(text)
+    assert '# TYPE demo_requests_total counter' in text
+    assert 'demo_requests_total{kind="group"} 3' in text
+    assert 'demo_latency_seconds_bucket{le="1"} 1' in text
+    assert 'demo_latency_seconds_bucket{le="5"} 2' in text
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert 'demo_latency_seconds_sum 3.5' in text
+    assert 'demo_latency_seconds_count 2' in text
+
+def test_textfile_and_http_export():
+    """测试文本文件导出和 HTTP 接口"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        textfile = os.path.join(tmp_dir, "srt.prom")
+        metrics = TranslationMetrics(textfile=textfile)
+        metrics.observe_file("grouped", subtitles=100, seconds=20)
+
+        with open(textfile, encoding='utf-8') as f:
+            content = f.read()
+        assert 'srt_translator_files_total{mode="grouped",status="ok"} 1' in content
+        assert 'srt_translator_last_file_subtitles_per_second{mode="grouped"} 5' in content
+        # 没有调用方的指标不导出（永远为 0 的指标会误导看板）
+        assert "cache_hits" not in content
+
+        server = metrics.registry.start_http_server(0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                body = response.read().decode('utf-8')
+            print(body[:300])
+            assert 'srt_translator_subtitles_total{mode="grouped"} 100' in body
+        finally:
+            metrics.registry.stop_http_server()
+
+def test_translator_records_metrics():
+    """测试分组翻译过程中的请求、错误和进行中指标"""
+    metrics = TranslationMetrics()
+    subtitle_translator = SmartSubtitleTranslator(
+        translator=FlakyMockTranslator(), max_workers=1, metrics=metrics
+    )
+    subtitle_translator.context_summary = "测试"
+    # 避免重试等待
+    subtitle_translator.GROUP_RETRY_DELAY = 0
+    subtitles = [
+        Subtitle("1", "00:00:01,000", "00:00:03,000", "ORION: Hello."),
+        Subtitle("2", "00:00:04,000", "00:00:06,000", "MATT: Hi there."),
+    ]
+    subtitle_translator.translate_subtitles_by_speaker(subtitles)
+
+    assert metrics.errors.value(type="ConnectionError") == 1
+    assert metrics.requests.value(kind="group", status="ok") == 2
+    assert metrics.retries.value(kind="group") == 1
+    assert metrics.in_flight.value() == 0
+    assert metrics.request_duration.count(kind="group") == 2
+    print("✓ 翻译指标记录正确")
+
+if __name__ == "__main__":
+    test_render_prometheus_text()
+    test_textfile_and_http_export()
+    test_translator_records_metrics()
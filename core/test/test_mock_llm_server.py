@@ -0,0 +1,35 @@
+import sys
+import os
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from benchmark.mock_llm_server import MockLLMServer
+
+def request(line, context):
+    return {"model": "mock-model", "messages": [
+        {"role": "system", "content": f"上文译文：{context}"},
+        {"role": "user", "content": line},
+    ]}
+
+def test_errors_depend_only_on_user_text():
+    """测试错误序列只由待翻译文本决定：系统提示词里的上下文（随完成顺序变化）不影响结果"""
+    lines = [f"line {i}" for i in range(200)]
+    server = MockLLMServer(latency="fixed:0", error_rate=0.2)
+
+    first = [server.handle(request(line, "A"))[0] for line in lines]
+    server.reset_attempts()
+    # 上下文不同、请求顺序相反
+    second = [server.handle(request(line, f"B {line}"))[0] for line in reversed(lines)][::-1]
+    print(f"错误数: {first.count(500)} / {second.count(500)}")
+    assert 0 < first.count(500) < len(lines)
+    assert first == second
+
+    # 重试使用新的随机序列，出错的请求不会一直出错
+    retried = [server.handle(request(line, "C"))[0] for line, status in zip(lines, first) if status == 500]
+    assert retried.count(200) > 0
+    server.httpd.server_close()
+
+if __name__ == "__main__":
+    test_errors_depend_only_on_user_text()
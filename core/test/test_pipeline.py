@@ -0,0 +1,63 @@
+import sys
+import os
+import threading
+import tempfile
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from core.pipeline import TranslationPipeline
+from core.subtitle_translator import SmartSubtitleTranslator
+from core.srt_io import read_srt
+
+class MockTranslator:
+    """模拟翻译器：记录内容分析次数，译文为 "译:" + 原文"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.analysis_calls = 0
+
+    def translate(self, text, system_prompt, temperature=0.7):
+        if "分析以下字幕文本" in system_prompt:
+            with self.lock:
+                self.analysis_calls += 1
+            return "测试摘要：MATT（马特）"
+        return "译:" + text.strip().splitlines()[-1]
+
+def write_episode(path, count):
+    speakers = ["MATT", "LAURA", "LIAM"]
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            prefix = f"{speakers[(i // 4) % 3]}: " if i % 4 == 0 else ""
+            f.write(f"{i+1}\n00:00:{i // 60:02d},{i % 60:03d} --> 00:00:{i // 60:02d},{i % 60 + 1:03d}\n"
+                    f"{prefix}line {i+1} of the episode\n\n")
+
+def test_pipeline_translates_chunks_in_order():
+    """测试分割后并发翻译，只分析一次，按原顺序合并"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "episode.srt")
+        write_episode(input_path, 60)
+
+        mock = MockTranslator()
+        subtitle_translator = SmartSubtitleTranslator(mock, max_workers=2, write_report=False)
+        pipeline = TranslationPipeline(subtitle_translator, chunk_workers=3, chunk_size=8)
+
+        original = read_srt(input_path)
+        chunks = pipeline.split(original)
+        print(f"分割为 {len(chunks)} 个片段: {[start for start, _ in chunks]}")
+        assert len(chunks) > 3
+
+        output_path, analysis_path = pipeline.run(input_path, "Chinese")
+        translated = read_srt(output_path)
+        with open(analysis_path, encoding='utf-8') as f:
+            assert "测试摘要" in f.read()
+
+    assert mock.analysis_calls == 1
+    assert [sub.index for sub in translated] == [sub.index for sub in original]
+    assert [sub.timestamp_in for sub in translated] == [sub.timestamp_in for sub in original]
+    for sub, orig in zip(translated, original):
+        assert sub.text == "译:" + orig.text, (sub.text, orig.text)
+    print("✓ 60 条字幕按顺序合并")
+
+if __name__ == "__main__":
+    test_pipeline_translates_chunks_in_order()
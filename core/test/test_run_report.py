@@ -0,0 +1,108 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from core.run_report import RunReport, percentile
+from core.subtitle_translator import SmartSubtitleTranslator
+
+class UsageMockTranslator:
+    """模拟返回 usage 的翻译器"""
+    model = "mock-model"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def last_usage(self):
+        return getattr(self._local, 'usage', None)
+
+    def translate(self, text, system_prompt, temperature=0.7):
+        self._local.usage = {"prompt_tokens": len(system_prompt), "completion_tokens": len(text)}
+        if "分析" in system_prompt:
+            return "这是一个DND游戏视频。"
+        return "\n".join(f"译文：{line}" for line in text.split('\n'))
+
+SRT_CONTENT = """1
+00:00:01,000 --> 00:00:03,000
+ORION: Can we use the word liaison?
+
+2
+00:00:04,000 --> 00:00:06,000
+I think it's appropriate.
+
+3
+00:00:07,000 --> 00:00:09,000
+MATT: The price would be quite high.
+
+4
+00:00:10,000 --> 00:00:12,000
+You can find it in the marketplace, which is a long sentence for analysis.
+"""
+
+def test_percentile():
+    """测试百分位数计算"""
+    values = list(range(1, 101))
+    print(f"p50={percentile(values, 50)}, p95={percentile(values, 95)}, p99={percentile(values, 99)}")
+    assert percentile(values, 50) == 50.5
+    assert abs(percentile(values, 95) - 95.05) < 1e-9
+    assert percentile([], 50) is None
+    assert percentile([3.0], 99) == 3.0
+
+def test_run_report_summary():
+    """测试阶段耗时和请求汇总"""
+    report = RunReport()
+    with report.span("parse"):
+        pass
+    report.record_request("group", queue_wait=0.1, latency=1.0, network=0.8,
+                          prompt_tokens=100, completion_tokens=20, retries=1)
+    report.record_request("group", queue_wait=0.2, latency=2.0, network=1.5, ok=False)
+
+    summary = report.summary()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    assert summary["stages"]["parse"]["count"] == 1
+    assert summary["requests"]["count"] == 2
+    assert summary["requests"]["failed"] == 1
+    assert summary["requests"]["retries"] == 1
+    assert summary["requests"]["prompt_tokens"] == 100
+    assert summary["requests"]["without_usage"] == 1
+    assert summary["requests"]["by_kind"]["group"]["latency"]["p50"] == 1.5
+
+def test_report_written_next_to_analysis():
+    """测试分组翻译后运行报告写在分析报告旁边"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        srt_path = os.path.join(tmp_dir, "episode.srt")
+        with open(srt_path, 'w', encoding='utf-8') as f:
+            f.write(SRT_CONTENT)
+
+        subtitle_translator = SmartSubtitleTranslator(translator=UsageMockTranslator(), max_workers=2)
+        output_path, analysis_path = subtitle_translator.process_subtitle_file_grouped(srt_path, "Chinese")
+
+        report_path = os.path.join(tmp_dir, "episode_run_report.json")
+        print(f"输出: {output_path}\n分析: {analysis_path}\n报告: {report_path}")
+        assert subtitle_translator.last_report_path == report_path
+        assert os.path.dirname(analysis_path) == os.path.dirname(report_path)
+
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+
+        assert report["info"]["mode"] == "grouped"
+        assert report["info"]["subtitles"] == 4
+        for stage in ("read_file", "parse", "analyze_content", "translate", "rebuild", "prompt_assembly", "network"):
+            assert stage in report["stages"], f"缺少阶段 {stage}"
+        by_kind = report["requests"]["by_kind"]
+        assert by_kind["analysis"]["count"] == 1
+        assert by_kind["group"]["count"] == 2
+        assert report["requests"]["prompt_tokens"] > 0
+        assert report["requests"]["without_usage"] == 0
+        print("✓ 运行报告内容正确")
+
+if __name__ == "__main__":
+    test_percentile()
+    test_run_report_summary()
+    test_report_written_next_to_analysis()
@@ -0,0 +1,92 @@
+import sys
+import os
+import json
+import tempfile
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from core.split_srt import find_split_points_by_tokens, find_split_points, extract_speaker, split_srt_file, iter_chunks
+from core.srt_io import Subtitle, read_srt
+
+def make_subtitles(lengths):
+    """每个说话人一段，lengths 为每段的字幕条数"""
+    speakers = ["MATT", "LAURA", "LIAM", "SAM"]
+    subtitles = []
+    for n, length in enumerate(lengths):
+        for k in range(length):
+            prefix = f"{speakers[n % len(speakers)]}: " if k == 0 else ""
+            subtitles.append(Subtitle(str(len(subtitles) + 1), "00:00:01,000", "00:00:02,000", prefix + "line"))
+    return subtitles
+
+def test_split_by_token_budget():
+    """测试按 token 预算分割，只在说话人切换处分割"""
+    subtitles = make_subtitles([3, 3, 3, 3, 3, 3])
+    # 前 9 条字幕很长，后面很短
+    token_counts = [100] * 9 + [10] * 9
+
+    split_points = find_split_points_by_tokens(subtitles, token_budget=300, token_counts=token_counts)
+    print(split_points)
+    assert split_points == [0, 3, 6, 9]
+    for point in split_points[1:]:
+        assert extract_speaker(subtitles[point].text)
+
+    # 超过预算后，在离预算更近的切换点分割：300 | 300 | 360（而不是 330 后再切出 30）
+    assert find_split_points_by_tokens(subtitles, token_budget=350, token_counts=token_counts) == [0, 3, 6, 15]
+
+def test_forced_split_without_speaker_change():
+    """测试长时间没有说话人切换时强制分割"""
+    subtitles = make_subtitles([10])
+    assert find_split_points_by_tokens(subtitles, token_budget=20, token_counts=[10] * 10) == [0, 3, 6, 9]
+
+def test_split_file_writes_manifest():
+    """测试分割文件并写出 manifest.json"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "episode.srt")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for subtitle in make_subtitles([5, 5, 5, 5]):
+                f.write(f"{subtitle.index}\n{subtitle.timestamp_in} --> {subtitle.timestamp_out}\n{subtitle.text} hello world\n\n")
+
+        split_srt_file(input_path, token_budget=20)
+        with open(os.path.join(tmp_dir, "split", "manifest.json"), encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    print(json.dumps(manifest, ensure_ascii=False, indent=2))
+    assert manifest['total_cues'] == 20
+    assert manifest['token_budget'] == 20
+    assert [chunk['start'] for chunk in manifest['chunks']] == [1, 6, 11, 16]
+    assert manifest['total_tokens'] == sum(chunk['tokens'] for chunk in manifest['chunks'])
+
+def test_streaming_chunks_match_split_points():
+    """测试流式分块与整表计算的分割点一致，并行写出的文件内容完整"""
+    subtitles = make_subtitles([4, 1, 7, 2, 9, 3, 5, 6, 2, 8] * 5)
+
+    chunks = list(iter_chunks(iter(subtitles), chunk_size=10))
+    assert [start for start, _, _ in chunks] == find_split_points(subtitles, 10)
+    assert sum(len(chunk) for _, chunk, _ in chunks) == len(subtitles)
+
+    chunks = list(iter_chunks(iter(subtitles), token_budget=30))
+    assert [start for start, _, _ in chunks] == find_split_points_by_tokens(subtitles, 30)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "episode.srt")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for subtitle in subtitles:
+                f.write(f"{subtitle.index}\n{subtitle.timestamp_in} --> {subtitle.timestamp_out}\n{subtitle.text}\n\n")
+
+        manifest = split_srt_file(input_path, chunk_size=10, write_workers=4, verbose=False)
+        written = []
+        for chunk in manifest['chunks']:
+            written.extend(read_srt(os.path.join(manifest['output_folder'], chunk['file'])))
+
+    print([chunk['file'] for chunk in manifest['chunks']])
+    assert [sub.index for sub in written] == [sub.index for sub in subtitles]
+    assert [sub.text for sub in written] == [sub.text for sub in subtitles]
+    assert manifest['chunk_size'] == 10 and manifest['token_budget'] is None
+
+if __name__ == "__main__":
+    test_split_by_token_budget()
+    test_forced_split_without_speaker_change()
+    test_split_file_writes_manifest()
+    test_streaming_chunks_match_split_points()
@@ -0,0 +1,54 @@
+import sys
+import os
+import tempfile
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from core.srt_io import parse_srt, read_srt, write_srt, sniff_srt_format, format_srt
+
+SAMPLE = (
+    "1\n00:00:01,000 --> 00:00:03,000\n我们要去维瑟海姆\nWe go to Vasselheim\n\n"
+    "2\n00:00:04,000 --> 00:00:06,000\n\n"
+    "这一块没有编号\n\n"
+    "10\n00:00:07,000 --> 00:00:09,500  X1:10 X2:20\n  MATT: 好的  \n\n\n"
+    "11\n00:00:10,000 --> 00:00:11,000\n42\n"
+)
+
+def test_parse_srt():
+    """测试解析：多行文本、空字幕、不合格式的块、原始编号"""
+    subtitles = parse_srt(SAMPLE)
+    for sub in subtitles:
+        print(sub.index, sub.timestamp_in, sub.timestamp_out, repr(sub.text))
+
+    assert [sub.index for sub in subtitles] == ["1", "2", "10", "11"]
+    assert subtitles[0].text == "我们要去维瑟海姆\nWe go to Vasselheim"
+    assert subtitles[1].text == ""
+    assert subtitles[2].timestamp_out == "00:00:09,500"
+    assert subtitles[2].text == "MATT: 好的"
+    assert subtitles[3].text == "42"
+
+def test_roundtrip_keeps_bom_and_newlines():
+    """测试带 BOM、CRLF 的文件读入后按原格式写回"""
+    content = "1\n00:00:01,000 --> 00:00:03,000\n你好\nHello\n\n2\n00:00:04,000 --> 00:00:06,000\n再见\n\n"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "input.srt")
+        output_path = os.path.join(tmp_dir, "output.srt")
+        with open(input_path, 'w', encoding='utf-8-sig', newline='\r\n') as f:
+            f.write(content)
+
+        subtitles = read_srt(input_path)
+        assert subtitles[0].index == "1"
+        assert format_srt(subtitles) == content
+
+        encoding, newline = sniff_srt_format(input_path)
+        assert (encoding, newline) == ('utf-8-sig', '\r\n')
+        write_srt(subtitles, output_path, encoding=encoding, newline=newline)
+        with open(input_path, 'rb') as f1, open(output_path, 'rb') as f2:
+            assert f1.read() == f2.read()
+    print("✓ 往返读写保持原格式")
+
+if __name__ == "__main__":
+    test_parse_srt()
+    test_roundtrip_keeps_bom_and_newlines()
@@ -0,0 +1,476 @@
+import sys
+import os
+import gzip
+import tempfile
+import time
+import threading
+import concurrent.futures
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import transcribe_whisper_interactive as tw
+from transcribe_whisper_interactive import (TimedSegment, SegmentSubtitleTranslator, plan_vad_chunks,
+                                            stitch_chunk_segments, transcribe_audio_chunks)
+from core.subtitle_translator import SmartSubtitleTranslator
+
+# 测试用的低采样率，音频用列表表示：0 为静音，n > 0 表示第 n 个词
+SR = 100
+
+class Info:
+    language = "en"
+
+class FakeWhisperModel:
+    """把连续相同的非零采样识别为一个词，时间相对于传入的音频片段（与 faster-whisper 相同）"""
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, vad_filter=True, vad_parameters=None, language=None):
+        self.calls += 1
+        segments = []
+        i = 0
+        while i < len(audio):
+            if audio[i]:
+                j = i
+                while j < len(audio) and audio[j] == audio[i]:
+                    j += 1
+                segments.append(TimedSegment(i / SR, j / SR, f" word{audio[i]}"))
+                i = j
+            else:
+                i += 1
+        return iter(segments), Info()
+
+def make_audio(words=20, word_seconds=1.0, gap_seconds=0.5):
+    """每个词 word_seconds 秒，词之间 gap_seconds 秒静音，返回 (音频, VAD 结果)"""
+    audio, speech = [], []
+    for n in range(1, words + 1):
+        audio.extend([0] * int(gap_seconds * SR))
+        speech.append({"start": len(audio), "end": len(audio) + int(word_seconds * SR)})
+        audio.extend([n] * int(word_seconds * SR))
+    audio.extend([0] * int(gap_seconds * SR))
+    return audio, speech
+
+def with_sampling_rate(test):
+    def run():
+        saved = tw.SAMPLING_RATE
+        tw.SAMPLING_RATE = SR
+        try:
+            test()
+        finally:
+            tw.SAMPLING_RATE = saved
+    run.__name__ = test.__name__
+    run.__doc__ = test.__doc__
+    return run
+
+def test_plan_vad_chunks_cut_at_silence():
+    """测试在静音中点切分，块首尾相接覆盖整段音频"""
+    audio, speech = make_audio()
+    chunks = plan_vad_chunks(speech, len(audio), 5 * SR)
+    print(chunks)
+    assert len(chunks) > 3
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    gaps = [(cur["end"] + nxt["start"]) // 2 for cur, nxt in zip(speech, speech[1:])]
+    for _, cut in chunks[:-1]:
+        assert cut in gaps, f"{cut} 不在静音中点"
+
+    # 空音频不产生块；没有语音时整段为一块
+    assert plan_vad_chunks([], 0, 5 * SR) == []
+    assert plan_vad_chunks([], 300, 5 * SR) == [(0, 300)]
+
+@with_sampling_rate
+def test_stitch_midpoint_filter_and_dedup():
+    """测试拼接：只保留中点在本块内的片段，去掉块边界处重复的片段"""
+    chunks = [(0, 5 * SR), (5 * SR, 10 * SR)]
+    first = [TimedSegment(1.0, 2.0, "one"), TimedSegment(4.0, 4.8, "Two."),
+             TimedSegment(4.8, 5.6, "three")]            # 中点 5.2 属于第二块
+    second = [TimedSegment(4.0, 4.8, "two"),              # 中点在第一块，由第一块负责
+              TimedSegment(4.85, 5.6, "three"),           # 与第二块自己识别的重复
+              TimedSegment(4.9, 5.6, "Three!"),           # 文本归一化后相同且时间相接
+              TimedSegment(7.0, 8.0, "four")]
+
+    result = list(stitch_chunk_segments(chunks, [first, second]))
+    print([(s.start, s.text) for s in result])
+    assert [s.text for s in result] == ["one", "Two.", "three", "four"]
+
+@with_sampling_rate
+def test_chunked_transcription_matches_whole_audio():
+    """测试分块并行转录：词的顺序和（换算偏移后的）时间轴与整段转录一致"""
+    audio, speech = make_audio()
+    model = FakeWhisperModel()
+    whole, _ = model.transcribe(audio)
+    whole = list(whole)
+
+    segments, info = transcribe_audio_chunks(model, audio, speech, workers=3, chunk_seconds=5)
+    segments = list(segments)
+    assert info.language == "en"
+    assert model.calls > 3
+    assert [s.text for s in segments] == [s.text for s in whole]
+    for got, expected in zip(segments, whole):
+        assert abs(got.start - expected.start) < 1 / SR and abs(got.end - expected.end) < 1 / SR
+
+@with_sampling_rate
+def test_chunked_transcription_empty_audio():
+    """测试空音频：不分块，不转录空块"""
+    model = FakeWhisperModel()
+    segments, info = transcribe_audio_chunks(model, [], [], workers=2)
+    assert list(segments) == []
+    assert model.calls == 1
+
+def with_cache_home(test):
+    """把 XDG_CACHE_HOME 指向临时目录，测试结束后恢复"""
+    def run():
+        saved = os.environ.get("XDG_CACHE_HOME")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.environ["XDG_CACHE_HOME"] = tmp_dir
+            try:
+                test(tmp_dir)
+            finally:
+                if saved is None:
+                    os.environ.pop("XDG_CACHE_HOME", None)
+                else:
+                    os.environ["XDG_CACHE_HOME"] = saved
+    run.__name__ = test.__name__
+    run.__doc__ = test.__doc__
+    return run
+
+@with_cache_home
+def test_transcript_cache_key(cache_home):
+    """测试缓存键：音频、模型、计算类型、VAD 和分块设置不同时缓存文件不同"""
+    base = tw.transcript_cache_path("a" * 64, "medium", "int8")
+    assert base.startswith(os.path.join(cache_home, "srt_translator", "transcripts"))
+    assert base == tw.transcript_cache_path("a" * 64, "medium", "int8", chunk_workers=1)
+
+    variants = [
+        tw.transcript_cache_path("b" * 64, "medium", "int8"),
+        tw.transcript_cache_path("a" * 64, "large-v3", "int8"),
+        tw.transcript_cache_path("a" * 64, "medium", "float16"),
+        tw.transcript_cache_path("a" * 64, "medium", "int8", chunk_workers=4),
+    ]
+    saved = tw.VAD_PARAMETERS, tw.CHUNK_SECONDS, tw.CHUNK_PADDING
+    try:
+        tw.VAD_PARAMETERS = {"min_silence_duration_ms": 500}
+        variants.append(tw.transcript_cache_path("a" * 64, "medium", "int8"))
+        tw.VAD_PARAMETERS = saved[0]
+
+        chunked = tw.transcript_cache_path("a" * 64, "medium", "int8", chunk_workers=4)
+        tw.CHUNK_SECONDS = 300
+        variants.append(tw.transcript_cache_path("a" * 64, "medium", "int8", chunk_workers=4))
+        tw.CHUNK_SECONDS = saved[1]
+        tw.CHUNK_PADDING = 2.0
+        variants.append(tw.transcript_cache_path("a" * 64, "medium", "int8", chunk_workers=4))
+        # 不分块时切分参数不影响结果，缓存可以共用
+        assert tw.transcript_cache_path("a" * 64, "medium", "int8") == base
+    finally:
+        tw.VAD_PARAMETERS, tw.CHUNK_SECONDS, tw.CHUNK_PADDING = saved
+
+    assert chunked in variants
+    assert len(set(variants + [base])) == len(variants) + 1
+
+@with_cache_home
+def test_transcript_cache_round_trip(cache_home):
+    """测试保存后读取得到相同的语言和片段（时间保留到毫秒）"""
+    path = tw.transcript_cache_path("a" * 64, "medium", "int8")
+    assert tw.load_cached_transcript(path) is None
+
+    segments = [TimedSegment(0.0, 1.23456, " Hello there."), TimedSegment(1.5, 3.0, " 你好")]
+    tw.save_cached_transcript(path, "en", segments)
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+
+    language, loaded = tw.load_cached_transcript(path)
+    print([(s.start, s.end, s.text) for s in loaded])
+    assert language == "en"
+    assert [(s.start, s.end, s.text) for s in loaded] == [(0.0, 1.235, " Hello there."), (1.5, 3.0, " 你好")]
+
+@with_cache_home
+def test_corrupt_transcript_cache_ignored(cache_home):
+    """测试损坏的缓存（非 gzip、内容不是 JSON、字段缺失）被忽略"""
+    path = tw.transcript_cache_path("a" * 64, "medium", "int8")
+    os.makedirs(os.path.dirname(path))
+
+    with open(path, "wb") as f:
+        f.write(b"not a gzip file")
+    assert tw.load_cached_transcript(path) is None
+
+    with open(path, "wb") as f:
+        f.write(gzip.compress(b"[truncated")[:-8])
+    assert tw.load_cached_transcript(path) is None
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write('{"segments": []}')
+    assert tw.load_cached_transcript(path) is None
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write('{"language": "en", "segments": [[0.0, 1.0]]}')
+    assert tw.load_cached_transcript(path) is None
+
+class StubProcessAudio:
+    """代替 process_audio：写出原文字幕（翻译时还有译文和中文字幕）并记录处理过的文件，fail 中的文件返回失败"""
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.processed = []
+
+    def __call__(self, audio_file, whisper_model="medium", ollama_model="qwen3:8b", use_gpu=True,
+                 translate=True, translate_srt=True, chunk_workers=1, use_cache=True):
+        name = os.path.basename(audio_file)
+        self.processed.append(name)
+        if name in self.fail:
+            return False
+        base = os.path.splitext(audio_file)[0]
+        outputs = [".srt"]
+        if translate:
+            outputs.append("_转录.txt")
+            if translate_srt:
+                outputs.append("_中文.srt")
+        for suffix in outputs:
+            with open(base + suffix, "w", encoding="utf-8") as f:
+                f.write("1\n00:00:00,000 --> 00:00:01,000\nhello\n\n")
+        return True
+
+def run_batch(folder, stub, force=False, whisper_model="medium", translate=False, translate_srt=True, jobs=2):
+    """用线程池代替进程池运行批处理，使替换的 process_audio 在同一进程中生效"""
+    saved = tw.process_audio, tw.ProcessPoolExecutor, tw._cpu_threads, tw._ollama_workers
+    tw.process_audio, tw.ProcessPoolExecutor = stub, concurrent.futures.ThreadPoolExecutor
+    try:
+        return tw.process_directory_parallel(folder, jobs=jobs, whisper_model=whisper_model, translate=translate,
+                                             translate_srt=translate_srt, force=force)
+    finally:
+        tw.process_audio, tw.ProcessPoolExecutor, tw._cpu_threads, tw._ollama_workers = saved
+
+def test_batch_manifest_skip_and_rerun():
+    """测试任务清单：重新运行跳过已完成的文件，音频大小/修改时间变化、字幕丢失、失败或 --force 时重新处理"""
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ("a.mp3", "b.wav", "c.m4a"):
+            with open(os.path.join(folder, name), "wb") as f:
+                f.write(b"audio " + name.encode())
+        with open(os.path.join(folder, "notes.txt"), "w") as f:
+            f.write("不是音频")
+
+        stub = StubProcessAudio(fail={"c.m4a"})
+        manifest = run_batch(folder, stub)
+        assert sorted(stub.processed) == ["a.mp3", "b.wav", "c.m4a"]
+        assert manifest["files"]["a.mp3"]["status"] == "done"
+        assert manifest["files"]["c.m4a"]["status"] == "failed"
+        assert tw.load_batch_manifest(folder) == manifest
+        assert tw.is_done(manifest, folder, "a.mp3", "medium", translate=False)
+        assert not tw.is_done(manifest, folder, "c.m4a", "medium", translate=False)
+
+        # 再次运行：只重试失败的文件
+        stub = StubProcessAudio()
+        run_batch(folder, stub)
+        assert stub.processed == ["c.m4a"]
+        stub = StubProcessAudio()
+        run_batch(folder, stub)
+        assert stub.processed == []
+
+        # 大小变化
+        with open(os.path.join(folder, "a.mp3"), "ab") as f:
+            f.write(b" more")
+        # 大小不变、修改时间变化
+        b_path = os.path.join(folder, "b.wav")
+        stat = os.stat(b_path)
+        os.utime(b_path, (stat.st_atime, stat.st_mtime + 10))
+        # 字幕被删除
+        os.remove(os.path.join(folder, "c.srt"))
+        stub = StubProcessAudio()
+        run_batch(folder, stub)
+        assert sorted(stub.processed) == ["a.mp3", "b.wav", "c.m4a"]
+
+        stub = StubProcessAudio()
+        run_batch(folder, stub)
+        assert stub.processed == []
+
+        # --force 全部重新处理
+        stub = StubProcessAudio()
+        run_batch(folder, stub, force=True)
+        assert sorted(stub.processed) == ["a.mp3", "b.wav", "c.m4a"]
+
+        # 清单损坏时全部重新处理
+        with open(os.path.join(folder, tw.BATCH_MANIFEST), "w") as f:
+            f.write("{broken")
+        stub = StubProcessAudio()
+        run_batch(folder, stub)
+        assert sorted(stub.processed) == ["a.mp3", "b.wav", "c.m4a"]
+        assert not os.path.exists(os.path.join(folder, tw.BATCH_MANIFEST + ".tmp"))
+
+def test_batch_manifest_respects_options():
+    """测试换了 Whisper 模型、本次需要翻译或中文字幕被删除时重新处理"""
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ("a.mp3", "b.wav"):
+            with open(os.path.join(folder, name), "wb") as f:
+                f.write(b"audio " + name.encode())
+
+        run_batch(folder, StubProcessAudio())
+        stub = StubProcessAudio()
+        run_batch(folder, stub, whisper_model="large-v3")
+        assert sorted(stub.processed) == ["a.mp3", "b.wav"]
+        assert tw.load_batch_manifest(folder)["files"]["a.mp3"]["model"] == "large-v3"
+
+        # 上次只转录，本次需要翻译
+        stub = StubProcessAudio()
+        run_batch(folder, stub, whisper_model="large-v3", translate=True)
+        assert sorted(stub.processed) == ["a.mp3", "b.wav"]
+        stub = StubProcessAudio()
+        run_batch(folder, stub, whisper_model="large-v3", translate=True)
+        assert stub.processed == []
+        # 已经翻译过的文件只转录时也跳过
+        stub = StubProcessAudio()
+        run_batch(folder, stub, whisper_model="large-v3")
+        assert stub.processed == []
+
+        # 中文字幕被删除：需要中文字幕时重新处理，不需要时跳过
+        os.remove(os.path.join(folder, "b_中文.srt"))
+        stub = StubProcessAudio()
+        run_batch(folder, stub, whisper_model="large-v3", translate=True, translate_srt=False)
+        assert stub.processed == []
+        stub = StubProcessAudio()
+        run_batch(folder, stub, whisper_model="large-v3", translate=True)
+        assert stub.processed == ["b.wav"]
+
+def test_batch_translation_concurrency_is_shared():
+    """测试批处理时各进程平分 Ollama 请求数，合计不超过 OLLAMA_WORKERS"""
+    saved = tw._ollama_workers, tw._cpu_threads
+    try:
+        assert tw.translation_concurrency() == (2, 2)
+        for jobs in (1, 2, 3, 4):
+            tw._init_batch_worker(1, max(1, tw.OLLAMA_WORKERS // jobs))
+            chunk_workers, per_chunk = tw.translation_concurrency()
+            print(f"{jobs} 个进程：每个进程 {chunk_workers} × {per_chunk} 个请求")
+            assert jobs * chunk_workers * per_chunk <= tw.OLLAMA_WORKERS
+        translator = SegmentSubtitleTranslator(MockSubtitleTranslator())
+        assert translator.executor._max_workers == 1
+        assert translator.close() == []
+    finally:
+        tw._ollama_workers, tw._cpu_threads = saved
+
+class MockSubtitleTranslator:
+    """
+    代替 SmartSubtitleTranslator：译文为 "译文：" + 原文
+
+    delays: {片段第一条的文本: 秒}，用来让片段乱序完成；
+    fail: 包含这些文本的片段抛出异常；"坏" 开头的字幕返回失败标记
+    """
+    _is_failed_text = staticmethod(SmartSubtitleTranslator._is_failed_text)
+
+    def __init__(self, delays=None, fail=(), gate=None):
+        self.context_summary = None
+        self.delays = delays or {}
+        self.fail = set(fail)
+        self.gate = gate
+        self.analyzed = []
+        self.started = []
+        self.finished = []
+        self.lock = threading.Lock()
+
+    def analyze_content(self, text):
+        self.analyzed.append(text)
+        return "摘要"
+
+    def translate_subtitles_by_speaker(self, subtitles):
+        first = subtitles[0].text
+        with self.lock:
+            self.started.append(first)
+        if self.gate:
+            self.gate.wait(5)
+        time.sleep(self.delays.get(first, 0))
+        with self.lock:
+            self.finished.append(first)
+        if any(sub.text in self.fail for sub in subtitles):
+            raise RuntimeError("模拟请求失败")
+        return ["[翻译失败] " + sub.text if sub.text.startswith("坏") else "译文：" + sub.text
+                for sub in subtitles]
+
+def with_analysis_chars(chars):
+    """临时修改 ANALYSIS_CHARS，让内容分析在第一段送入后就开始"""
+    def decorate(test):
+        def run():
+            saved = tw.ANALYSIS_CHARS
+            tw.ANALYSIS_CHARS = chars
+            try:
+                test()
+            finally:
+                tw.ANALYSIS_CHARS = saved
+        run.__name__ = test.__name__
+        run.__doc__ = test.__doc__
+        return run
+    return decorate
+
+def feed_words(translator, words):
+    for n, word in enumerate(words):
+        translator.feed(TimedSegment(float(n), n + 0.5, " " + word))
+
+@with_analysis_chars(1)
+def test_segment_translator_keeps_order():
+    """测试片段乱序完成时，译文仍按原顺序返回"""
+    mock = MockSubtitleTranslator(delays={"w0": 0.3, "w2": 0.15})
+    translator = SegmentSubtitleTranslator(mock, chunk_size=2, chunk_workers=3)
+    words = [f"w{n}" for n in range(6)]
+    feed_words(translator, words)
+    result = translator.close()
+
+    print(mock.finished)
+    assert mock.finished != sorted(mock.finished), "片段应当乱序完成"
+    assert [r["text"] for r in result] == ["译文：" + w for w in words]
+    assert [r["start"] for r in result] == [float(n) for n in range(6)]
+    assert translator.summary == "摘要"
+
+@with_analysis_chars(1)
+def test_segment_translator_failed_chunk_keeps_source():
+    """测试片段请求失败或单条返回失败标记时保留原文"""
+    mock = MockSubtitleTranslator(fail={"w3"})
+    translator = SegmentSubtitleTranslator(mock, chunk_size=2, chunk_workers=2)
+    feed_words(translator, ["w0", "坏w1", "w2", "w3", "w4"])
+    result = translator.close()
+    print([r["text"] for r in result])
+    assert [r["text"] for r in result] == ["译文：w0", "坏w1", "w2", "w3", "译文：w4"]
+
+@with_analysis_chars(1)
+def test_segment_translator_backpressure():
+    """测试正在翻译和排队的片段达到上限时 feed() 阻塞，翻译完成后继续"""
+    gate = threading.Event()
+    mock = MockSubtitleTranslator(gate=gate)
+    translator = SegmentSubtitleTranslator(mock, chunk_size=1, chunk_workers=1, max_pending=2)
+    feeder = threading.Thread(target=feed_words, args=(translator, [f"w{n}" for n in range(5)]))
+    feeder.start()
+    time.sleep(0.3)
+    # 两个片段占满名额，第三个片段提交时阻塞
+    assert feeder.is_alive()
+    assert len(translator.segments) == 3 and len(translator.futures) == 2
+    assert mock.started == ["w0"]
+
+    gate.set()
+    feeder.join(5)
+    assert not feeder.is_alive()
+    result = translator.close()
+    assert [r["text"] for r in result] == [f"译文：w{n}" for n in range(5)]
+
+def test_segment_translator_close_before_analysis():
+    """测试字数不够、内容分析还没开始时 close()：先分析已有文本再翻译；没有字幕时返回空列表"""
+    mock = MockSubtitleTranslator()
+    translator = SegmentSubtitleTranslator(mock, chunk_size=2)
+    feed_words(translator, ["w0", "w1", "w2"])
+    assert translator.analysis is None and translator.futures == []
+    result = translator.close()
+    assert mock.analyzed == ["w0\nw1\nw2"]
+    assert [r["text"] for r in result] == ["译文：w0", "译文：w1", "译文：w2"]
+
+    mock = MockSubtitleTranslator()
+    assert SegmentSubtitleTranslator(mock).close() == []
+    assert mock.analyzed == [] and mock.started == []
+
+if __name__ == "__main__":
+    test_plan_vad_chunks_cut_at_silence()
+    test_stitch_midpoint_filter_and_dedup()
+    test_chunked_transcription_matches_whole_audio()
+    test_chunked_transcription_empty_audio()
+    test_transcript_cache_key()
+    test_transcript_cache_round_trip()
+    test_corrupt_transcript_cache_ignored()
+    test_batch_manifest_skip_and_rerun()
+    test_batch_manifest_respects_options()
+    test_batch_translation_concurrency_is_shared()
+    test_segment_translator_keeps_order()
+    test_segment_translator_failed_chunk_keeps_source()
+    test_segment_translator_backpressure()
+    test_segment_translator_close_before_analysis()
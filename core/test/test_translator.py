@@ -0,0 +1,57 @@
+import sys
+import os
+
+# 获取项目根目录
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from benchmark.mock_llm_server import MockLLMServer
+from core.translator import Translator, OllamaTranslator
+from core.budget import estimate_tokens
+
+def test_translator_reuses_connection():
+    """测试同一线程的请求复用同一个 HTTP 连接"""
+    with MockLLMServer(latency="fixed:0.001") as server:
+        translator = Translator({'base_url': server.base_url, 'api_key': 'test', 'model': 'mock-model'})
+        for i in range(5):
+            assert translator.translate(f"line {i}", system_prompt="翻译") == f"译文：line {i}"
+        print(f"5 个请求，{server.connections} 个连接")
+        assert server.connections == 1
+        assert translator.last_usage["completion_tokens"] > 0
+
+def test_ollama_translator_keep_alive():
+    """测试 Ollama 使用原生 /api/chat：带 keep_alive，读取 usage，去掉 <think> 块"""
+    with MockLLMServer(latency="fixed:0.001") as server:
+        # 传入 OpenAI 兼容地址也可以
+        translator = OllamaTranslator("qwen3:8b", base_url=server.base_url, keep_alive="1h")
+        assert translator.translate("<think>x</think>hello", system_prompt="翻译") == "译文：hello"
+
+        payload = server.last_payload
+        print(payload)
+        assert payload["keep_alive"] == "1h"
+        assert payload["stream"] is False
+        assert payload["options"]["temperature"] == 0.7
+        assert translator.last_usage["prompt_tokens"] > 0
+
+def test_translate_model_override():
+    """测试 model 参数只对这次请求生效（预算降级），不修改 translator.model"""
+    with MockLLMServer(latency="fixed:0.001") as server:
+        translator = Translator({'base_url': server.base_url, 'api_key': 'test', 'model': 'mock-model'})
+        translator.translate("hello", system_prompt="翻译", model="cheap-model")
+        assert server.last_payload["model"] == "cheap-model"
+        translator.translate("hello", system_prompt="翻译")
+        assert server.last_payload["model"] == "mock-model"
+        assert translator.model == "mock-model"
+
+def test_count_tokens_uses_budget_estimate():
+    """测试 count_tokens 与预算统计使用同一种估算（中文没有空格时不能按单词计数）"""
+    translator = Translator({'base_url': "http://localhost:1/v1", 'api_key': 'test'})
+    for text in ("你好世界，今天天气很好。", "Roll for initiative, everyone.", ""):
+        assert translator.count_tokens(text) == estimate_tokens(text)
+    assert translator.count_tokens("你好世界，今天天气很好。") > 5
+
+if __name__ == "__main__":
+    test_translator_reuses_connection()
+    test_ollama_translator_keep_alive()
+    test_translate_model_override()
+    test_count_tokens_uses_budget_estimate()
@@ -1,7 +1,12 @@
-import requests
+import re
 import json
-import tiktoken
-import traceback
+import logging
+import threading
+
+from core.logger import get_logger
+from core.budget import estimate_tokens
+
+logger = get_logger("translator")
 
 class Translator:
     def __init__(self, config):
@@ -10,20 +15,43 @@ class Translator:
         self.api_key = config.get('api_key')
         self.api_type = config.get('api_type', 'openai')
         self.model = config.get('model', 'gpt-3.5-turbo')
-        
-        # 初始化分词器
-        try:
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
-        except ImportError:
-            print("Warning: tiktoken not installed. Token counting disabled.")
-            self.tokenizer = None
+        # 每个线程最近一次请求的 usage，供上层统计 token
+        self._local = threading.local()
+
+    @property
+    def last_usage(self):
+        """当前线程最近一次成功请求返回的 usage 字段（没有则为 None）"""
+        return getattr(self._local, 'usage', None)
 
     def count_tokens(self, text):
-        if self.tokenizer:
-            return len(self.tokenizer.encode(text))
-        return len(text.split())  # 简单的备选方案
+        # 与预算统计共用同一个编码器（第一次调用时才导入 tiktoken，不可用时按字符估算）
+        return estimate_tokens(text)
+
+    def session(self):
+        """当前线程的 requests.Session，同一线程的请求复用 HTTP 连接"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+        return session
+
+    def build_request(self, messages, temperature, model=None):
+        """返回 (请求 URL, 请求体)，子类可改用其他接口；model 为 None 时使用 self.model"""
+        return f"{self.base_url}/chat/completions", {
+            "model": model or self.model,
+            "messages": messages,
+            "temperature": temperature
+        }
+
+    def parse_response(self, result):
+        """从响应 JSON 取出 (译文, usage)"""
+        return result['choices'][0]['message']['content'], result.get('usage')
+
+    def translate(self, text, source_lang=None, target_lang=None, system_prompt=None, temperature=0.7,
+                  model=None):
+        """model：只对这次请求生效的模型（预算降级时使用），不修改共享的 self.model"""
+        import requests
 
-    def translate(self, text, source_lang=None, target_lang=None, system_prompt=None, temperature=0.7):
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -43,37 +71,91 @@ class Translator:
         # 添加用户消息
         messages.append({"role": "user", "content": text})
 
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature
-        }
+        url, payload = self.build_request(messages, temperature, model)
+
+        self._local.usage = None
 
         try:    
-            response = requests.post(
-                f"{self.base_url}/chat/completions", 
+            response = self.session().post(
+                url, 
                 headers=headers, 
                 json=payload
             )
             
-            # 打印完整的响应内容，帮助诊断问题
-            print(f"Response status: {response.status_code}")
-            print(f"Response content: {response.text}")
+            # 完整响应内容只在 DEBUG 级别输出，避免在请求路径上刷屏
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Response received",
+                    extra={'fields': {'status': response.status_code, 'body': response.text}}
+                )
             
             response.raise_for_status()
             
             # 解析响应
             result = response.json()
-            translated_text = result['choices'][0]['message']['content'].strip()
+            translated_text, self._local.usage = self.parse_response(result)
+            translated_text = translated_text.strip()
             
             return translated_text
         
         except requests.RequestException as e:
-            print(f"Translation error: {e}")
-            print(f"Traceback: {traceback.format_exc()}")
-            print(f"Response content: {e.response.text if hasattr(e, 'response') else 'No response'}")
+            response_text = e.response.text if getattr(e, 'response', None) is not None else 'No response'
+            logger.warning(
+                "Translation error: %s", e,
+                extra={'fields': {'model': model or self.model}}
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Error response", exc_info=True, extra={'fields': {'body': response_text}})
             raise
         except json.JSONDecodeError as e:
-            print(f"JSON Decode error: {e}")
-            print(f"Response content: {response.text}")
+            logger.warning("JSON Decode error: %s", e, extra={'fields': {'model': model or self.model}})
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Undecodable response", extra={'fields': {'body': response.text}})
             raise
+
+
+class OllamaTranslator(Translator):
+    """
+    本地 Ollama 后端（原生接口 /api/chat）
+
+    可以直接交给 SmartSubtitleTranslator 使用；qwen3 等模型输出的 <think> 思考过程会被去掉。
+    使用原生接口是为了传 keep_alive（OpenAI 兼容接口 /v1 不支持），
+    让模型在整次翻译期间常驻显存，不会在请求间隙被卸载后重新加载。
+    """
+    DEFAULT_BASE_URL = "http://localhost:11434"
+    KEEP_ALIVE = "30m"
+    THINK_BLOCK = re.compile(r'<think>.*?</think>', re.S)
+
+    def __init__(self, model="qwen3:8b", base_url=None, keep_alive=None):
+        base_url = (base_url or self.DEFAULT_BASE_URL).rstrip('/')
+        # 兼容传入 OpenAI 兼容地址 http://host:11434/v1
+        if base_url.endswith('/v1'):
+            base_url = base_url[:-3]
+        super().__init__({
+            'base_url': base_url,
+            'api_key': 'ollama',  # Ollama 不校验，但需要有 Authorization 头
+            'api_type': 'ollama',
+            'model': model,
+        })
+        self.keep_alive = keep_alive or self.KEEP_ALIVE
+
+    def build_request(self, messages, temperature, model=None):
+        return f"{self.base_url}/api/chat", {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {"temperature": temperature},
+        }
+
+    def parse_response(self, result):
+        usage = None
+        if 'prompt_eval_count' in result or 'eval_count' in result:
+            usage = {"prompt_tokens": result.get('prompt_eval_count', 0),
+                     "completion_tokens": result.get('eval_count', 0)}
+        return result['message']['content'], usage
+
+    def translate(self, text, source_lang=None, target_lang=None, system_prompt=None, temperature=0.7,
+                  model=None):
+        translated_text = super().translate(text, source_lang, target_lang, system_prompt, temperature, model)
+        return self.THINK_BLOCK.sub('', translated_text).strip()
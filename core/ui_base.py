@@ -1,8 +1,14 @@
+import importlib
+
 import customtkinter as ctk
 
-from core.page.home_page import HomePage
-from core.page.settings_page import SettingsPage
-from core.page.translator_page import TranslatorPage
+# 页面名称 -> (模块, 类名)。页面在第一次显示时才导入和创建，
+# 翻译页面依赖的 requests / tiktoken 等不会拖慢窗口首次显示
+PAGES = {
+    "主页": ("core.page.home_page", "HomePage"),
+    "翻译": ("core.page.translator_page", "TranslatorPage"),
+    "设置": ("core.page.settings_page", "SettingsPage"),
+}
 
 class BaseApp:
     def __init__(self, master):
@@ -34,12 +40,8 @@ class BaseApp:
         self.page_frame = ctk.CTkFrame(master)
         self.page_frame.pack(padx=20, pady=20, fill="both", expand=True)
 
-        # 初始化页面
-        self.pages = {
-            "主页": HomePage(self.page_frame),
-            "翻译": TranslatorPage(self.page_frame),
-            "设置": SettingsPage(self.page_frame)
-        }
+        # 已创建的页面
+        self.pages = {}
 
         # 默认显示主页
         self.show_page("主页")
@@ -50,7 +52,7 @@ class BaseApp:
         nav_frame.pack(fill="x", padx=20, pady=(20, 0))
 
         # 为每个页面创建导航按钮
-        for page_name in ["主页", "翻译", "设置"]:
+        for page_name in PAGES:
             button = ctk.CTkButton(
                 nav_frame, 
                 text=page_name, 
@@ -58,13 +60,23 @@ class BaseApp:
             )
             button.pack(side="left", padx=10)
 
+    def get_page(self, page_name):
+        """取得页面，第一次使用时导入并创建"""
+        if page_name not in self.pages:
+            module_name, class_name = PAGES[page_name]
+            page_class = getattr(importlib.import_module(module_name), class_name)
+            self.pages[page_name] = page_class(self.page_frame)
+        return self.pages[page_name]
+
     def show_page(self, page_name):
+        page = self.get_page(page_name)
+
         # 隐藏所有页面
-        for page in self.pages.values():
-            page.pack_forget()
+        for other in self.pages.values():
+            other.pack_forget()
         
         # 显示选中的页面
-        self.pages[page_name].pack(fill="both", expand=True)
+        page.pack(fill="both", expand=True)
 
 def run_app():
     root = ctk.CTk()
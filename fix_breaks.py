@@ -1,15 +1,32 @@
 """
 SRT 字幕断句修复工具
 专门用于修复中文字幕中被切断的词语，特别是专有名词（人名、地名等）
+
+jieba 在第一次分词时才导入（加载词典较慢），只导入本模块不会加载它
 """
 
-import jieba
-import pysrt
 import re
 import os
 import glob
+import heapq
+import marshal
+import hashlib
+import tempfile
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Tuple, Optional
 
+from core.srt_io import Subtitle, read_srt, write_srt, sniff_srt_format
+
+# 断点两侧出现这些字符时，说明匹配到的不是更长词的一部分
+BOUNDARY_CHARS = '，。！？；：""''、\n '
+
+# 全部由这些字符组成的分词结果不算词
+NON_WORD_CHARS = '，。！？；：""''、·…—（）[]{}'
+
+# 自定义词汇的词频（设置超高频，确保不被切开）
+CUSTOM_WORD_FREQ = 999999
+
 # 添加自然排序函数
 def natural_sort_key(text: str):
     """
@@ -18,14 +35,243 @@ def natural_sort_key(text: str):
     return [int(c) if c.isdigit() else c.lower() 
             for c in re.split(r'(\d+)', text)]
 
+def jieba_dict_cache_path(custom_vocab: List[str], cache_dir: Optional[str] = None) -> str:
+    """
+    编译后词典缓存的路径，由 jieba 版本、主词典和词汇表内容决定
+    
+    术语列表有任何改动都会得到新的缓存文件，旧缓存自然失效。
+    """
+    import jieba
+
+    main_dict = jieba.dt.dictionary or 'default'
+    main_dict_mtime = os.path.getmtime(main_dict) if os.path.isfile(main_dict) else 0
+    digest = hashlib.sha256()
+    digest.update(f"{jieba.__version__}|{main_dict}|{main_dict_mtime}|{CUSTOM_WORD_FREQ}\n".encode('utf-8'))
+    digest.update('\n'.join(sorted(set(custom_vocab))).encode('utf-8'))
+    return os.path.join(cache_dir or tempfile.gettempdir(),
+                        f"srt_translator_jieba_{digest.hexdigest()[:16]}.cache")
+
+def load_jieba_dictionary(custom_vocab: List[str], cache_dir: Optional[str] = None) -> bool:
+    """
+    加载包含自定义词汇的 jieba 词典
+    
+    有缓存时直接读入编译好的前缀词典（jieba.dt.FREQ/total），跳过 jieba 自己的
+    初始化和逐个 add_word；没有缓存或缓存损坏时正常构建并写入缓存。
+    
+    Returns:
+        是否从缓存加载
+    """
+    import jieba
+
+    cache_path = jieba_dict_cache_path(custom_vocab, cache_dir)
+    
+    if os.path.isfile(cache_path):
+        try:
+            # 先整体读入再 marshal.loads，比 marshal.load(文件) 快得多
+            with open(cache_path, 'rb') as f:
+                freq, total = marshal.loads(f.read())
+            with jieba.dt.lock:
+                jieba.dt.FREQ, jieba.dt.total = freq, total
+                jieba.dt.initialized = True
+            return True
+        except Exception:
+            pass
+    
+    jieba.initialize()
+    for word in custom_vocab:
+        jieba.add_word(word, freq=CUSTOM_WORD_FREQ)
+    
+    # 先写临时文件再替换，避免并行进程读到写了一半的缓存
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path))
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump((jieba.dt.FREQ, jieba.dt.total), f)
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+    except (OSError, ValueError) as e:
+        # ValueError：词典中有 marshal 不支持的对象
+        print(f"⚠ 写入分词词典缓存失败: {e}")
+    finally:
+        # 写入或替换失败时删除临时文件，不在缓存目录留下垃圾
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    return False
+
+def check_broken_token(token: str, cut: int, text1: str, text2: str) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    检查在 cut 处被断点切开的分词结果是否是真正被切断的词
+    
+    Returns:
+        (是否有问题, 被切断的完整词, text1中属于该词的部分)
+    """
+    # 词长度至少2，且不是纯标点
+    if len(token) < 2 or all(c in NON_WORD_CHARS for c in token):
+        return False, None, None
+    
+    part_in_text1 = token[:cut]
+    part_in_text2 = token[cut:]
+    
+    # 验证这确实是被切断的词
+    if text1.endswith(part_in_text1) and text2.startswith(part_in_text2):
+        return True, token, part_in_text1
+    return False, None, None
+
+def find_token_at(text: str, split_pos: int, text1: str, text2: str) -> Tuple[bool, Optional[str], Optional[str]]:
+    """对 text 分词，检查跨越 split_pos 的词（分词是惰性的，越过断点即停止）"""
+    import jieba
+
+    token_start = 0
+    for token in jieba.cut(text):
+        token_end = token_start + len(token)
+        if token_start < split_pos < token_end:
+            return check_broken_token(token, split_pos - token_start, text1, text2)
+        if token_end >= split_pos:
+            break
+        token_start = token_end
+    return False, None, None
+
+# jieba 按这些字符组成的连续片段分别分词，片段之外的文本不影响片段内的分词结果
+# （与 jieba.re_han_default 相同，写在这里以免导入本模块时就加载 jieba）
+HAN_RUN_PATTERN = r'([\u4E00-\u9FD5a-zA-Z0-9+#&\._%\-]+)'
+HAN_RUN_END = re.compile(HAN_RUN_PATTERN + '$')
+HAN_RUN_START = re.compile(HAN_RUN_PATTERN)
+
+class DocumentSegmentation:
+    """
+    整条字幕轨道（每条字幕的第一行）拼接后只分词一次，按断点偏移查找跨越断点的词
+    
+    修复改动过的字幕记为脏；跨越断点的那一段连续文字经过脏字幕时，只把这一段
+    （两侧各最多 RESEGMENT_CHARS 字）重新分词，其余断点继续使用整篇分词结果。
+    没有标点时连续文字可以跨越很多条字幕，所以按它实际经过的字幕判断脏，
+    而不是只看相邻几条；判断用有序列表二分查找，重新分词的长度有上限，
+    整个文件的检测仍是线性的。
+    """
+    # 重新分词时断点两侧各取的最大字数
+    RESEGMENT_CHARS = 100
+    
+    def __init__(self, texts: List[str]):
+        self.texts = list(texts)
+        # 改动过的字幕（有序）
+        self.dirty = []
+        # 不是整条都由连续文字组成的字幕（有序），连续文字最多延伸到这些字幕
+        self.stops = [k for k, text in enumerate(self.texts) if not HAN_RUN_START.fullmatch(text)]
+        
+        # 每条字幕在整篇文本中的结束偏移，即它与下一条之间的断点位置
+        self.boundaries = []
+        offset = 0
+        for text in self.texts:
+            offset += len(text)
+            self.boundaries.append(offset)
+        
+        # jieba.cut 比 jieba.tokenize 快，偏移自己累加
+        import jieba
+        self.tokens = list(jieba.cut(''.join(self.texts)))
+        self.token_starts = []
+        offset = 0
+        for token in self.tokens:
+            self.token_starts.append(offset)
+            offset += len(token)
+    
+    def update(self, index: int, text: str):
+        """记录第 index 条字幕被修改后的文本"""
+        self.texts[index] = text
+        k = bisect_left(self.dirty, index)
+        if k == len(self.dirty) or self.dirty[k] != index:
+            self.dirty.insert(k, index)
+        
+        k = bisect_left(self.stops, index)
+        is_stop = k < len(self.stops) and self.stops[k] == index
+        if HAN_RUN_START.fullmatch(text):
+            if is_stop:
+                del self.stops[k]
+        elif not is_stop:
+            self.stops.insert(k, index)
+    
+    def _run_is_dirty(self, index: int) -> bool:
+        """跨越第 index 条之后断点的连续文字经过的字幕中是否有改动过的"""
+        # 向前经过整条连续的字幕，到前面第一条 stop 为止；向后同理
+        k = bisect_right(self.stops, index) - 1
+        first = self.stops[k] if k >= 0 else 0
+        k = bisect_left(self.stops, index + 1)
+        last = self.stops[k] if k < len(self.stops) else len(self.texts) - 1
+        k = bisect_left(self.dirty, first)
+        return k < len(self.dirty) and self.dirty[k] <= last
+    
+    def find_broken_word(self, index: int) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        检查第 index 条和第 index+1 条字幕之间的断点
+        
+        Returns:
+            (是否有问题, 被切断的完整词, text1中属于该词的部分)
+        """
+        text1 = self.texts[index]
+        text2 = self.texts[index + 1]
+        
+        if self._run_is_dirty(index):
+            # 只对跨越断点的连续片段重新分词（片段不超过上限时结果与整篇分词相同）
+            left = self._run_before(index)
+            right = self._run_after(index + 1)
+            if not left or not right:
+                return False, None, None
+            return find_token_at(left + right, len(left), text1, text2)
+        
+        # 断点前最后一个字所在的词
+        split_pos = self.boundaries[index]
+        k = bisect_right(self.token_starts, split_pos - 1) - 1
+        if k < 0:
+            return False, None, None
+        start = self.token_starts[k]
+        token = self.tokens[k]
+        if start + len(token) > split_pos:
+            return check_broken_token(token, split_pos - start, text1, text2)
+        return False, None, None
+    
+    def _run_before(self, index: int) -> str:
+        """第 index 条字幕末尾的连续片段（整条都是时继续向前取），最多 RESEGMENT_CHARS 字"""
+        parts = []
+        length = 0
+        for k in range(index, -1, -1):
+            match = HAN_RUN_END.search(self.texts[k])
+            if not match:
+                break
+            parts.append(match.group(0))
+            length += len(match.group(0))
+            if match.start() > 0 or length >= self.RESEGMENT_CHARS:
+                break
+        return ''.join(reversed(parts))[-self.RESEGMENT_CHARS:]
+    
+    def _run_after(self, index: int) -> str:
+        """第 index 条字幕开头的连续片段（整条都是时继续向后取），最多 RESEGMENT_CHARS 字"""
+        parts = []
+        length = 0
+        for k in range(index, len(self.texts)):
+            text = self.texts[k]
+            match = HAN_RUN_START.match(text)
+            if not match:
+                break
+            parts.append(match.group(0))
+            length += len(match.group(0))
+            if match.end() < len(text) or length >= self.RESEGMENT_CHARS:
+                break
+        return ''.join(parts)[:self.RESEGMENT_CHARS]
+
 class SubtitleBreakFixer:
-    def __init__(self, custom_vocab: Optional[List[str]] = None, vocab_file: Optional[str] = None):
+    # 每条字幕最多参与几次修复，防止词语在字幕之间反复移动
+    MAX_MOVES_PER_CUE = 3
+    
+    def __init__(self, custom_vocab: Optional[List[str]] = None, vocab_file: Optional[str] = None,
+                 dict_cache: bool = True):
         """
         初始化断句修复器
         
         Args:
             custom_vocab: 自定义词汇列表
             vocab_file: 术语列表文件路径（如果为None，自动查找"术语列表.txt"）
+            dict_cache: 是否使用编译后的词典缓存（按词汇表内容区分，存放在临时目录）
         """
         self.custom_vocab = custom_vocab or []
         
@@ -43,8 +289,87 @@ class SubtitleBreakFixer:
                 print("  提示：可以创建 术语列表.txt 文件来添加自定义词汇")
         
         # 把自定义词汇加入 jieba 词典（设置超高频，确保不被切开）
-        for word in self.custom_vocab:
-            jieba.add_word(word, freq=999999)
+        if dict_cache:
+            load_jieba_dictionary(self.custom_vocab)
+        else:
+            import jieba
+            for word in self.custom_vocab:
+                jieba.add_word(word, freq=CUSTOM_WORD_FREQ)
+        
+        self.build_vocab_index()
+    
+    def build_vocab_index(self):
+        """
+        把词汇表编译成两棵字典树，断点检查只需扫描断点附近的字符：
+        - 正向树：词汇 -> 逐字符节点，键 None 记录词汇在词汇表中的序号
+        - 反向前缀树：词汇每个真前缀的倒序 -> 节点，键 None 指向该前缀在正向树中的节点
+        """
+        self._forward_trie = {}
+        self._reverse_prefix_trie = {}
+        self._max_vocab_len = 0
+        
+        for rank, word in enumerate(self.custom_vocab):
+            if len(word) < 2:
+                continue
+            self._max_vocab_len = max(self._max_vocab_len, len(word))
+            
+            node = self._forward_trie
+            prefix_nodes = []
+            for char in word:
+                node = node.setdefault(char, {})
+                prefix_nodes.append(node)
+            # 重复的词保留第一次出现的序号
+            node.setdefault(None, rank)
+            
+            # 只登记真前缀（至少留一个字符给 text2）
+            for i in range(1, len(word)):
+                reverse_node = self._reverse_prefix_trie
+                for char in reversed(word[:i]):
+                    reverse_node = reverse_node.setdefault(char, {})
+                reverse_node[None] = prefix_nodes[i - 1]
+    
+    def find_vocab_word(self, text1: str, text2: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        在词汇表中查找跨越 text1/text2 断点的专有名词
+        
+        与逐词逐位置的 endswith/startswith 检查结果一致：
+        多个候选时取词汇表中靠前的词，同一个词取较短的前半部分。
+        
+        Returns:
+            (被切断的完整词, text1中属于该词的部分)，没有则为 (None, None)
+        """
+        best = None
+        
+        # 从 text1 末尾倒着走反向前缀树，得到所有"是某个词前缀"的 text1 后缀
+        reverse_node = self._reverse_prefix_trie
+        for back in range(1, min(len(text1), self._max_vocab_len - 1) + 1):
+            reverse_node = reverse_node.get(text1[-back])
+            if reverse_node is None:
+                break
+            node = reverse_node.get(None)
+            if node is None:
+                continue
+            
+            part1 = text1[-back:]
+            prefix_ok = (len(text1) == len(part1) or 
+                         text1[-(len(part1)+1)] in BOUNDARY_CHARS)
+            
+            # 从该前缀的正向节点继续匹配 text2 开头
+            for j, char in enumerate(text2[:self._max_vocab_len - back]):
+                node = node.get(char)
+                if node is None:
+                    break
+                rank = node.get(None)
+                if rank is None:
+                    continue
+                suffix_ok = (len(text2) == j + 1 or 
+                             text2[j + 1] in BOUNDARY_CHARS)
+                if (prefix_ok or suffix_ok) and (best is None or (rank, back) < best[:2]):
+                    best = (rank, back, part1 + text2[:j + 1])
+        
+        if best is None:
+            return None, None
+        return best[2], text1[-best[1]:]
     
     def load_vocab_from_file(self, file_path: str) -> List[str]:
         """
@@ -65,8 +390,8 @@ class SubtitleBreakFixer:
                     if word and len(word) > 1:
                         vocab.append(word)
         
-        # 去重并按长度排序（长词优先匹配）
-        vocab = list(set(vocab))
+        # 去重并按长度排序（长词优先匹配，同长度按字典序，保证每次顺序一致）
+        vocab = sorted(set(vocab))
         vocab.sort(key=len, reverse=True)
         return vocab
     
@@ -83,88 +408,104 @@ class SubtitleBreakFixer:
         """
         # 方法1：专有名词匹配（针对自定义词汇表）
         # 检查 text1 的结尾 + text2 的开头是否匹配某个专有名词
-        for vocab_word in self.custom_vocab:
-            if len(vocab_word) < 2:
-                continue
-            
-            # 尝试不同的切分位置
-            for i in range(1, len(vocab_word)):
-                part1 = vocab_word[:i]
-                part2 = vocab_word[i:]
-                
-                # 检查是否匹配
-                if text1.endswith(part1) and text2.startswith(part2):
-                    # 确保不是更长词的一部分
-                    prefix_ok = (len(text1) < len(part1) or 
-                               text1[-(len(part1)+1)] in '，。！？；：""''、\n ')
-                    suffix_ok = (len(text2) == len(part2) or 
-                               text2[len(part2)] in '，。！？；：""''、\n ')
-                    
-                    if prefix_ok or suffix_ok:
-                        return True, vocab_word, part1
+        vocab_word, part1 = self.find_vocab_word(text1, text2)
+        if vocab_word:
+            return True, vocab_word, part1
         
         # 方法2：jieba 分词检测（扩大窗口）
+        return self.find_broken_word_by_jieba(text1, text2)
+    
+    def find_broken_word_by_jieba(self, text1: str, text2: str) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        对断点前后各 30 个字的窗口分词，检查是否有词跨越断点
+        
+        单独检查一对字幕时使用；处理整个文件时用 DocumentSegmentation 只分词一次。
+        """
         window_size = 30
         boundary = text1[-window_size:] + text2[:window_size]
         split_pos = len(text1[-window_size:])
-        
-        # 分词
-        tokens = list(jieba.cut(boundary))
-        
-        # 找到跨越断点的词
-        char_pos = 0
-        for token in tokens:
-            token_start = char_pos
-            token_end = char_pos + len(token)
-            
-            # 如果断点在词中间（词长度至少2，且不是纯标点）
-            if (token_start < split_pos < token_end and 
-                len(token) >= 2 and 
-                not all(c in '，。！？；：""''、·…—（）[]{}' for c in token)):
-                
-                part_in_text1 = token[:(split_pos - token_start)]
-                part_in_text2 = token[(split_pos - token_start):]
-                
-                # 验证这确实是被切断的词
-                if text1.endswith(part_in_text1) and text2.startswith(part_in_text2):
-                    return True, token, part_in_text1
-            
-            char_pos += len(token)
-        
-        return False, None, None
+        return find_token_at(boundary, split_pos, text1, text2)
     
-    def fix_subtitle_file(self, input_srt: str, output_srt: Optional[str] = None) -> str:
+    def fix_subtitle_file(self, input_srt: str, output_srt: Optional[str] = None,
+                          verbose: bool = True) -> str:
         """
         修复整个字幕文件的断句
         
         Args:
             input_srt: 输入文件路径
             output_srt: 输出文件路径（默认为 _fixed.srt）
+            verbose: 是否打印进度和修复详情（并行批量处理时关闭）
         
         Returns:
-            输出文件路径
+            输出文件路径；修复详情保存在 self.last_fixes
         """
+        log = print if verbose else (lambda *args, **kwargs: None)
+        
         if output_srt is None:
             output_srt = input_srt.replace('.srt', '_fixed.srt')
         
         # 加载字幕
-        subs = pysrt.open(input_srt, encoding='utf-8')
+        subs = read_srt(input_srt)
+        
+        log(f"\n{'='*60}")
+        log(f"开始优化字幕断句")
+        log(f"{'='*60}")
+        log(f"输入: {os.path.basename(input_srt)}")
+        log(f"字幕数: {len(subs)} 条")
+        log(f"词汇表: {len(self.custom_vocab)} 个术语")
+        log(f"检测中...")
+        
+        fixes = self.fix_subtitles(subs, log=log)
+        
+        # 保存文件（保持原文件的 BOM 和换行符）
+        encoding, newline = sniff_srt_format(input_srt)
+        write_srt(subs, output_srt, encoding=encoding, newline=newline)
+        
+        # 输出报告
+        if verbose:
+            print_fix_report(fixes)
+        
+        log(f"\n输出: {os.path.basename(output_srt)}")
+        return output_srt
+    
+    def fix_subtitles(self, subs: List[Subtitle], log=None) -> List[dict]:
+        """
+        直接修复内存中的字幕（只修改每条字幕的第一行），不读写文件
+        
+        可以用于翻译器的输出：SmartSubtitleTranslator(break_fixer=fixer)
+        
+        Args:
+            subs: 字幕列表（需要有 text 属性），会被原地修改
+            log: 进度输出函数，None 表示不输出
+        
+        Returns:
+            修复详情列表；同时保存在 self.last_fixes
+        """
         fixes = []
         
-        print(f"\n{'='*60}")
-        print(f"开始优化字幕断句")
-        print(f"{'='*60}")
-        print(f"输入: {os.path.basename(input_srt)}")
-        print(f"字幕数: {len(subs)} 条")
-        print(f"词汇表: {len(self.custom_vocab)} 个术语")
-        print(f"检测中...")
+        # 整个中文轨道只分词一次
+        segmentation = DocumentSegmentation([sub.text.split('\n')[0] for sub in subs])
         
-        # 滑动窗口遍历，显示进度
+        # 待检查的断点（第 i 条与第 i+1 条之间），总是先处理编号最小的，
+        # 修复后把受影响的相邻断点重新放回，直到没有新的修复（不动点）
         total = len(subs) - 1
-        for i in range(total):
+        pending = list(range(max(total, 0)))
+        queued = set(pending)
+        moves = [0] * len(subs)
+        next_progress = 100
+        
+        while pending:
+            i = heapq.heappop(pending)
+            queued.discard(i)
+            
             # 显示进度（每100条）
-            if i % 100 == 0 and i > 0:
-                print(f"  进度: {i}/{total} ({i*100//total}%)")
+            if log and i >= next_progress:
+                log(f"  进度: {i}/{total} ({i*100//total}%)")
+                next_progress = (i // 100 + 1) * 100
+            
+            # 这两条字幕已经被移动太多次
+            if moves[i] >= self.MAX_MOVES_PER_CUE or moves[i + 1] >= self.MAX_MOVES_PER_CUE:
+                continue
             
             current = subs[i]
             next_sub = subs[i + 1]
@@ -181,16 +522,19 @@ class SubtitleBreakFixer:
             current_text = current_lines[0] if current_lines else current.text
             next_text = next_lines[0] if next_lines else next_sub.text
             
-            # 检查断句
-            is_bad, broken_word, part_in_current = self.find_broken_word(
-                current_text, 
-                next_text
-            )
+            # 检查断句：先查专有名词，再查整篇分词结果
+            broken_word, part_in_current = self.find_vocab_word(current_text, next_text)
+            is_bad = broken_word is not None
+            if not is_bad:
+                is_bad, broken_word, part_in_current = segmentation.find_broken_word(i)
             
             if is_bad and broken_word:
                 # 修复：把整个词推给第二句
                 new_current = current_text[:-len(part_in_current)].rstrip()
                 new_next = broken_word + next_text[len(broken_word) - len(part_in_current):]
+                if not new_current:
+                    # 整条字幕（或双语字幕的中文行）都是被切断的词时不移动，避免屏幕上出现空字幕
+                    continue
                 
                 # 保存修复信息
                 fixes.append({
@@ -210,30 +554,100 @@ class SubtitleBreakFixer:
                     next_sub.text = new_next + '\n' + '\n'.join(next_lines[1:])
                 else:
                     next_sub.text = new_next
+                
+                segmentation.update(i, new_current)
+                segmentation.update(i + 1, new_next)
+                
+                # 只重新检查被这次修复改动的断点
+                moves[i] += 1
+                moves[i + 1] += 1
+                for j in (i - 1, i, i + 1):
+                    if 0 <= j < total and j not in queued:
+                        heapq.heappush(pending, j)
+                        queued.add(j)
         
-        # 保存文件
-        subs.save(output_srt, encoding='utf-8')
-        
-        # 输出报告
-        print(f"\n{'='*60}")
-        print(f"✓ 完成！共修复 {len(fixes)} 处断句问题")
-        print(f"{'='*60}\n")
-        
-        if fixes:
-            print(f"修复详情（显示前 15 个）：\n")
-            for idx, fix in enumerate(fixes[:15], 1):
-                print(f"{idx}. #{fix['index']}: '{fix['word']}'")
-                print(f"   前: ...{fix['before']}...")
-                print(f"   后: ...{fix['after']}...")
-                print()
-            
-            if len(fixes) > 15:
-                print(f"... 还有 {len(fixes) - 15} 处修复未显示")
-        else:
-            print("✓ 未发现需要修复的断句（翻译质量很好！）")
+        self.last_fixes = fixes
+        return fixes
+
+def print_fix_report(fixes: List[dict], limit: int = 15):
+    """打印修复报告（只显示前 limit 个）"""
+    print(f"\n{'='*60}")
+    print(f"✓ 完成！共修复 {len(fixes)} 处断句问题")
+    print(f"{'='*60}\n")
+    
+    if fixes:
+        print(f"修复详情（显示前 {limit} 个）：\n")
+        for idx, fix in enumerate(fixes[:limit], 1):
+            label = f"{fix['file']} " if 'file' in fix else ""
+            print(f"{idx}. {label}#{fix['index']}: '{fix['word']}'")
+            print(f"   前: ...{fix['before']}...")
+            print(f"   后: ...{fix['after']}...")
+            print()
         
-        print(f"\n输出: {os.path.basename(output_srt)}")
-        return output_srt
+        if len(fixes) > limit:
+            print(f"... 还有 {len(fixes) - limit} 处修复未显示")
+    else:
+        print("✓ 未发现需要修复的断句（翻译质量很好！）")
+
+def output_path_for(input_file: str) -> str:
+    """修复后的输出路径：同目录下加 [修复分句] 前缀"""
+    input_dir = os.path.dirname(input_file)
+    input_name = os.path.basename(input_file)
+    return os.path.join(input_dir, "[修复分句]" + input_name)
+
+# 并行批量处理时子进程使用的修复器
+_worker_fixer = None
+
+def _init_worker(custom_vocab: List[str]):
+    """
+    子进程初始化：每个进程只加载一次词汇表和 jieba 词典
+    
+    fork 启动（Linux/macOS）时直接沿用父进程已预热的修复器，不再重复加载。
+    """
+    global _worker_fixer
+    if _worker_fixer is None:
+        _worker_fixer = SubtitleBreakFixer(custom_vocab=custom_vocab)
+        import jieba
+        jieba.initialize()
+
+def _fix_file_in_worker(input_file: str, output_file: str) -> dict:
+    try:
+        _worker_fixer.fix_subtitle_file(input_file, output_file, verbose=False)
+        return {'input': input_file, 'output': output_file,
+                'fixes': _worker_fixer.last_fixes, 'error': None}
+    except Exception as e:
+        return {'input': input_file, 'output': output_file,
+                'fixes': [], 'error': f"{type(e).__name__}: {e}"}
+
+def fix_files_parallel(fixer: SubtitleBreakFixer, input_files: List[str], jobs: int) -> List[dict]:
+    """
+    多进程并行修复多个文件
+    
+    Args:
+        fixer: 父进程中已初始化的修复器（提供词汇表，fork 时直接被子进程复用）
+        input_files: 输入文件列表
+        jobs: 进程数
+    
+    Returns:
+        按输入顺序排列的结果：{'input', 'output', 'fixes', 'error'}
+    """
+    global _worker_fixer
+    _worker_fixer = fixer
+    
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(fixer.custom_vocab,)) as pool:
+        futures = {
+            pool.submit(_fix_file_in_worker, input_file, output_path_for(input_file)): input_file
+            for input_file in input_files
+        }
+        results = {}
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results[futures[future]] = result
+            status = f"⚠ {result['error']}" if result['error'] else f"修复 {len(result['fixes'])} 处"
+            print(f"  [{done}/{len(input_files)}] {os.path.basename(result['input'])}: {status}")
+    
+    return [results[input_file] for input_file in input_files]
 
 def select_directory() -> str:
     """选择要处理的文件夹"""
@@ -336,11 +750,17 @@ def select_srt_file(directory: str):
 
 def main():
     """主程序"""
-    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="SRT 字幕断句修复工具")
+    parser.add_argument("files", nargs="*", help="要处理的 SRT 文件（不填则进入交互模式）")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="处理多个文件时的并行进程数（1 表示逐个处理）")
+    args = parser.parse_args()
     
     # 命令行模式
-    if len(sys.argv) > 1:
-        input_files = [sys.argv[1]]
+    if args.files:
+        input_files = args.files
     else:
         # 交互式模式
         while True:
@@ -364,6 +784,30 @@ def main():
     print("\n初始化分词引擎...")
     fixer = SubtitleBreakFixer()
     
+    missing = [f for f in input_files if not os.path.exists(f)]
+    for input_file in missing:
+        print(f"⚠ 文件不存在: {input_file}")
+    existing = [f for f in input_files if os.path.exists(f)]
+    jobs = min(args.jobs, len(existing))
+    
+    # 多个文件并行处理，汇总修复报告
+    if jobs > 1:
+        print(f"\n并行处理 {len(existing)} 个文件（{jobs} 个进程）...\n")
+        results = fix_files_parallel(fixer, existing, jobs)
+        all_fixes = [
+            dict(fix, file=os.path.basename(result['input']))
+            for result in results for fix in result['fixes']
+        ]
+        print_fix_report(all_fixes)
+        
+        success_count = sum(1 for result in results if not result['error'])
+        print(f"\n{'='*60}")
+        print(f"所有文件处理完成！({success_count}/{len(input_files)} 成功)")
+        print(f"{'='*60}")
+        if not args.files:
+            input("\n按回车键退出...")
+        return
+    
     # 批量处理
     success_count = 0
     for idx, input_file in enumerate(input_files, 1):
@@ -376,9 +820,7 @@ def main():
             print(f"处理文件 {idx}/{len(input_files)}")
             print(f"{'='*60}")
         
-        input_dir = os.path.dirname(input_file)
-        input_name = os.path.basename(input_file)
-        output_file = os.path.join(input_dir, "[修复分句]" + input_name)
+        output_file = output_path_for(input_file)
         
         try:
             fixer.fix_subtitle_file(input_file, output_file)
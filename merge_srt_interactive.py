@@ -1,5 +1,25 @@
+"""
+合并多个 SRT 字幕（原文、译文、注释……）为一个多行字幕
+
+以第一个文件的时间轴为准，其余文件的每条字幕按时间重叠分配到重叠最多的那条主字幕，
+没有重叠时分配到时间最近的一条。字幕条数不一致（翻译或断句修复后常见）也能合并。
+
+用法：
+    python merge_srt_interactive.py                      # 交互式选择
+    python merge_srt_interactive.py 原文.srt 译文.srt 注释.srt -o 合并.srt
+"""
+
 import os
 import re
+import heapq
+import argparse
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Tuple
+
+from core.srt_io import Subtitle, iter_srt_file, format_subtitle
+
+# 写出合并结果时的文件缓冲区大小
+WRITE_BUFFER_SIZE = 1024 * 1024
 
 def natural_key(s):
     # 提取字符串中的数字用于排序
@@ -9,28 +29,96 @@ def list_srt_files(folder):
     files = [f for f in os.listdir(folder) if f.lower().endswith('.srt')]
     return sorted(files, key=natural_key)
 
-def parse_srt_blocks(filepath):
-    with open(filepath, encoding='utf-8') as f:
-        content = f.read()
-    blocks = [b.strip() for b in content.strip().split('\n\n') if b.strip()]
-    return [block.split('\n') for block in blocks]
-
-def merge_srt_blocks(blocks1, blocks2):
-    if len(blocks1) != len(blocks2):
-        raise ValueError("两个文件的字幕条数不一致，无法合并！")
-    merged = []
-    for b1, b2 in zip(blocks1, blocks2):
-        # 保持编号和时间轴
-        idx = b1[0]
-        time = b1[1]
-        # 合并正文内容
-        text1 = '\n'.join(b1[2:])
-        text2 = '\n'.join(b2[2:])
-        merged_block = f"{idx}\n{time}\n{text1}\n{text2}"
-        merged.append(merged_block)
-    return merged
+def timestamp_to_ms(timestamp):
+    """00:01:02,345（或 00:01:02.345）转换为毫秒"""
+    hours, minutes, seconds = timestamp[:-4].split(':')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(timestamp[-3:])
 
-def main():
+def load_track(subtitles: Iterable[Subtitle]) -> List[Tuple[int, int, Subtitle]]:
+    """转换为按开始时间排序的 (开始毫秒, 结束毫秒, 字幕) 列表"""
+    track = [(timestamp_to_ms(sub.timestamp_in), timestamp_to_ms(sub.timestamp_out), sub)
+             for sub in subtitles]
+    track.sort(key=lambda item: item[0])
+    return track
+
+def align_track(primary, track) -> List[List[str]]:
+    """
+    把 track 的每条字幕分配给 primary 中的一条，返回与 primary 等长的文本列表
+
+    两个列表都按开始时间排序后扫描一遍。在这条字幕开始前已经开始的主字幕放在
+    按结束时间排序的堆里，已结束的弹出，堆里剩下的都与它重叠；在它播放期间开始的
+    主字幕用二分查找取得。一条很长的主字幕不会让后面的字幕重复扫描已经结束的主字幕，
+    整体为 O((n + m) log n + 重叠的字幕对数)。
+    """
+    assigned = [[] for _ in primary]
+    if not primary:
+        return assigned
+    starts = [item[0] for item in primary]
+    active = []          # (结束时间, 编号)：已经开始、尚未结束的主字幕
+    next_primary = 0     # 下一条还没放进堆的主字幕
+    last_ended = None    # 最后结束的主字幕（没有重叠时的前一条候选）
+    for start, end, sub in track:
+        while next_primary < len(primary) and primary[next_primary][0] < start:
+            heapq.heappush(active, (primary[next_primary][1], next_primary))
+            next_primary += 1
+        # 后续字幕开始得更晚，已经结束的主字幕也不会与它们重叠
+        while active and active[0][0] <= start:
+            last_ended = heapq.heappop(active)[1]
+
+        best, best_overlap = None, 0
+        following = bisect_left(starts, end, next_primary)
+        candidates = [k for _, k in active]
+        candidates.extend(range(next_primary, following))
+        for k in sorted(candidates):
+            overlap = min(end, primary[k][1]) - max(start, primary[k][0])
+            if overlap > best_overlap:
+                best, best_overlap = k, overlap
+
+        if best is None:
+            # 时长为 0 的字幕重叠也为 0：落在某条主字幕之内时算作匹配（取最靠前的一条）
+            contained = [k for _, k in active if primary[k][0] <= start <= primary[k][1]]
+            if contained:
+                best = min(contained)
+        if best is None:
+            # 没有重叠：分配给前后最近的一条主字幕，都没有时分配给最后一条
+            nearest = [k for k in (last_ended, following) if k is not None and k < len(primary)]
+            if nearest:
+                best = min(nearest, key=lambda k: max(primary[k][0] - end, start - primary[k][1]))
+            else:
+                best = len(primary) - 1
+        if sub.text:
+            assigned[best].append(sub.text)
+    return assigned
+
+def merge_tracks(tracks: List[Iterable[Subtitle]], separator=" ") -> Iterator[Subtitle]:
+    """
+    按时间对齐合并多个字幕轨道，逐条产出合并后的字幕
+
+    对齐需要按开始时间排序，所以各轨道会先全部读入内存（load_track），只有输出是逐条产出的。
+
+    Args:
+        tracks: 第一个为主轨道（决定编号和时间轴），其余按顺序排在下面
+        separator: 同一条主字幕对应多条字幕时的连接符
+    """
+    primary = load_track(tracks[0])
+    aligned = [align_track(primary, load_track(track)) for track in tracks[1:]]
+
+    for n, (_, _, sub) in enumerate(primary):
+        lines = [sub.text] if sub.text else []
+        lines.extend(separator.join(texts[n]) for texts in aligned if texts[n])
+        yield Subtitle(sub.index, sub.timestamp_in, sub.timestamp_out, "\n".join(lines))
+
+def merge_srt_files(input_files: List[str], output_path: str, separator=" ") -> int:
+    """合并多个 SRT 文件并写出，返回写出的字幕条数"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        for sub in merge_tracks([iter_srt_file(path) for path in input_files], separator):
+            f.write(format_subtitle(sub))
+            count += 1
+    return count
+
+def choose_files_interactive():
+    """交互式选择文件夹和要合并的文件，返回 (文件路径列表, 输出路径)"""
     # 默认输入路径为脚本所在目录下的 split 文件夹
     script_dir = os.path.dirname(os.path.abspath(__file__))
     subfolder = input(f"请输入存放split文件夹的路径（留空则为本目录）：").strip('"')
@@ -38,39 +126,59 @@ def main():
         default_input = os.path.join(script_dir, subfolder, "split")
     else:
         default_input = os.path.join(script_dir, "split")
-    
+
     folder_input = input(f"请输入要合并字幕的文件夹路径（留空则为 {default_input}）：").strip('"')
     folder = folder_input if folder_input else default_input
-    
+
     if not os.path.exists(folder):
         print(f"文件夹不存在：{folder}")
-        return
-    
+        return None, None
+
     files = list_srt_files(folder)
     if len(files) < 2:
         print("该文件夹下没有足够的SRT文件。")
-        return
+        return None, None
     print("可选的SRT文件：")
     for i, f in enumerate(files):
         print(f"{i+1}: {f}")
-    idx1 = int(input("请选择第一个文件编号（在上）：")) - 1
-    idx2 = int(input("请选择第二个文件编号（在下）：")) - 1
-    file1 = os.path.join(folder, files[idx1])
-    file2 = os.path.join(folder, files[idx2])
-    blocks1 = parse_srt_blocks(file1)
-    blocks2 = parse_srt_blocks(file2)
-    merged = merge_srt_blocks(blocks1, blocks2)
-    
+    choice = input("请按从上到下的顺序输入要合并的文件编号，用空格分隔（第一个文件的时间轴为准，如 1 2）：")
+    try:
+        indices = [int(part) - 1 for part in re.split(r'[\s,，]+', choice.strip()) if part]
+    except ValueError:
+        print("请输入有效的数字！")
+        return None, None
+    if len(indices) < 2 or not all(0 <= i < len(files) for i in indices):
+        print("至少选择两个有效的文件编号！")
+        return None, None
+
     # 默认输出到源文件所在目录
     out_dir = input(f"请输入输出目录（留空则为源文件所在目录 {folder}）：").strip('"')
     if not out_dir:
         out_dir = folder
-    
-    out_name = f"【合并】{files[idx1]}"
-    out_path = os.path.join(out_dir, out_name)
-    with open(out_path, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(merged))
-    print(f"合并完成，输出文件：{out_path}")
+
+    out_name = f"【合并】{files[indices[0]]}"
+    return [os.path.join(folder, files[i]) for i in indices], os.path.join(out_dir, out_name)
+
+def main():
+    parser = argparse.ArgumentParser(description="按时间轴合并多个 SRT 字幕")
+    parser.add_argument("files", nargs="*", help="要合并的文件，第一个为主轨道（不指定则交互式选择）")
+    parser.add_argument("-o", "--output", help="输出文件（默认为第一个文件旁的【合并】文件）")
+    args = parser.parse_args()
+
+    if args.files:
+        if len(args.files) < 2:
+            parser.error("至少需要两个文件")
+        input_files = args.files
+        output_path = args.output or os.path.join(
+            os.path.dirname(os.path.abspath(input_files[0])), f"【合并】{os.path.basename(input_files[0])}"
+        )
+    else:
+        input_files, output_path = choose_files_interactive()
+        if not input_files:
+            return
+
+    count = merge_srt_files(input_files, output_path)
+    print(f"合并完成，共 {count} 条字幕，输出文件：{output_path}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
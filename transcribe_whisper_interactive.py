@@ -1,6 +1,17 @@
-from faster_whisper import WhisperModel
-import requests, json, os
+# faster_whisper 和翻译模块在第一次用到时才导入，--help、参数错误和缓存命中时不需要加载它们
+import json, os
+import re
 import sys
+import gzip
+import hashlib
+import tempfile
+import time
+import argparse
+import threading
+import concurrent.futures
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from core.srt_io import Subtitle
 
 def format_timestamp(seconds):
     """将秒数转换为SRT时间格式 HH:MM:SS,mmm"""
@@ -14,116 +25,457 @@ def generate_srt(segments, output_file):
     """生成SRT字幕文件"""
     with open(output_file, "w", encoding="utf-8") as f:
         for i, segment in enumerate(segments, 1):
-            f.write(f"{i}\n")
-            f.write(f"{format_timestamp(segment.start)} --> {format_timestamp(segment.end)}\n")
-            f.write(f"{segment.text.strip()}\n\n")
+            write_srt_segment(f, i, segment)
+
+def write_srt_segment(f, index, segment):
+    """写出一条字幕"""
+    f.write(f"{index}\n{format_timestamp(segment.start)} --> {format_timestamp(segment.end)}\n{segment.text.strip()}\n\n")
+
+# 已加载的模型，按 (模型大小, 设备, 计算类型) 缓存，同一会话处理多个文件时只加载一次
+_model_cache = {}
+_model_lock = threading.Lock()
+# GPU 加载或转录失败过一次后，后续文件直接使用CPU
+_gpu_failed = False
+
+# CPU 推理线程数，0 表示由 CTranslate2 决定（批处理子进程中按进程数平分CPU核心）
+_cpu_threads = 0
 
-def transcribe_audio(audio_file, model_size="medium", use_gpu=True, generate_subtitle=True):
+def get_whisper_model(model_size, device="cpu", compute_type="int8", num_workers=1):
     """
-    使用 faster-whisper 转录音频
-    不需要 PyTorch，支持 CUDA/CPU
+    取得缓存的模型，没有则加载
+
+    num_workers > 1 时模型可以被多个线程同时调用（分块并行转录），
+    CPU 线程在这些调用之间平分。
     """
-    print(f"加载 faster-whisper {model_size} 模型...")
-    
-    # 尝试GPU,失败则自动切换CPU
-    model = None
-    force_cpu = False
-    
-    if use_gpu:
+    key = (model_size, device, compute_type, num_workers)
+    with _model_lock:
+        model = _model_cache.get(key)
+        if model is None:
+            from faster_whisper import WhisperModel
+            cpu_threads = _cpu_threads
+            if num_workers > 1:
+                cpu_threads = max(1, (cpu_threads or os.cpu_count() or 1) // num_workers)
+            model = WhisperModel(model_size, device=device, compute_type=compute_type,
+                                 cpu_threads=cpu_threads, num_workers=num_workers)
+            _model_cache[key] = model
+        return model
+
+def mark_gpu_failed(model_size):
+    """记录GPU不可用，释放已缓存的GPU模型"""
+    global _gpu_failed
+    _gpu_failed = True
+    with _model_lock:
+        for key in [key for key in _model_cache if key[:3] == (model_size, "cuda", "float16")]:
+            del _model_cache[key]
+
+def load_whisper_model(model_size, use_gpu, num_workers=1):
+    """加载模型：尝试GPU,失败则自动切换CPU；返回 (模型, 是否为GPU)"""
+    if use_gpu and not _gpu_failed:
         try:
             print("尝试使用GPU...")
-            model = WhisperModel(model_size, device="cuda", compute_type="float16")
+            model = get_whisper_model(model_size, "cuda", "float16", num_workers)
             print("✅ GPU模式")
+            return model, True
         except Exception as e:
             print(f"⚠️  GPU加载失败: {e}")
             print("切换到CPU模式...")
-            model = None
-            force_cpu = True
-    
-    if model is None or force_cpu:
-        if not force_cpu:
-            print("使用CPU模式...")
-        model = WhisperModel(model_size, device="cpu", compute_type="int8")
-        print("✅ CPU模式")
-    
-    print(f"正在转录: {audio_file}")
-    
-    # 尝试转录
+            mark_gpu_failed(model_size)
+    else:
+        print("使用CPU模式...")
+    model = get_whisper_model(model_size, "cpu", "int8", num_workers)
+    print("✅ CPU模式")
+    return model, False
+
+# 长音频分块并行转录：每块的目标长度（秒）、两侧多截取的音频（秒）
+CHUNK_SECONDS = 600
+CHUNK_PADDING = 1.0
+SAMPLING_RATE = 16000
+# Silero VAD 参数（faster_whisper.vad.VadOptions 的字段），空字典为默认值
+VAD_PARAMETERS = {}
+
+class TimedSegment:
+    """时间轴已换算到整段音频的转录片段"""
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+def plan_vad_chunks(speech_timestamps, total_samples, chunk_samples):
+    """
+    在静音处切分音频：累计到 chunk_samples 后，在当前语音段与下一段之间的静音中点切开
+
+    Args:
+        speech_timestamps: VAD 结果 [{'start': 采样, 'end': 采样}]
+    Returns:
+        [(起始采样, 结束采样)]，首尾相接覆盖整段音频；空音频返回 []
+    """
+    if total_samples <= 0:
+        return []
+    cuts = [0]
+    for current, following in zip(speech_timestamps, speech_timestamps[1:]):
+        if current["end"] - cuts[-1] >= chunk_samples:
+            cuts.append((current["end"] + following["start"]) // 2)
+    cuts.append(total_samples)
+    return list(zip(cuts, cuts[1:]))
+
+def normalize_text(text):
+    return re.sub(r"[\W_]+", "", text.lower())
+
+def stitch_chunk_segments(chunks, chunk_segments):
+    """
+    按顺序拼接各块的转录结果
+
+    每块只保留中点落在本块范围内的片段（两侧多截取的部分交给相邻块），
+    并去掉与上一段文本相同且时间相接的重复片段。
+
+    Args:
+        chunks: plan_vad_chunks 的结果（采样）
+        chunk_segments: 与 chunks 对应的、时间轴已换算到整段音频的片段列表（可以是生成器）
+    """
+    last = None
+    for (start, end), segments in zip(chunks, chunk_segments):
+        for segment in segments:
+            middle = (segment.start + segment.end) / 2
+            if not start / SAMPLING_RATE <= middle < end / SAMPLING_RATE:
+                continue
+            if (last and segment.start < last.end + CHUNK_PADDING
+                    and normalize_text(segment.text) == normalize_text(last.text)):
+                continue
+            last = segment
+            yield segment
+
+def transcribe_chunked(model, audio_file, workers, chunk_seconds=None):
+    """
+    在 VAD 静音处把长音频切成若干块，多个线程同时转录，按顺序拼接
+
+    Returns:
+        (按顺序产出 TimedSegment 的生成器, 第一块的转录信息)
+    """
+    from faster_whisper.audio import decode_audio
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    audio = decode_audio(audio_file, sampling_rate=SAMPLING_RATE)
+    speech = get_speech_timestamps(audio, VadOptions(**VAD_PARAMETERS))
+    return transcribe_audio_chunks(model, audio, speech, workers, chunk_seconds)
+
+def transcribe_audio_chunks(model, audio, speech_timestamps, workers, chunk_seconds=None):
+    """
+    transcribe_chunked 的主体：audio 为已解码的采样，speech_timestamps 为 VAD 结果
+
+    每块两侧多截取 CHUNK_PADDING 秒，避免切到词，再由 stitch_chunk_segments 拼接。
+    """
+    chunks = plan_vad_chunks(speech_timestamps, len(audio),
+                             int((chunk_seconds or CHUNK_SECONDS) * SAMPLING_RATE))
+    if not chunks:
+        # 空音频：不分块，直接交给模型（得到空结果和转录信息）
+        segments, info = model.transcribe(audio, vad_filter=True, vad_parameters=dict(VAD_PARAMETERS))
+        return iter(list(segments)), info
+
+    padding = int(CHUNK_PADDING * SAMPLING_RATE)
+    print(f"音频时长 {len(audio) / SAMPLING_RATE / 60:.1f} 分钟，分为 {len(chunks)} 块，{workers} 个线程并行转录")
+
+    # 先确定语言，所有块使用同一种语言
+    _, info = model.transcribe(audio[chunks[0][0]:chunks[0][1]], vad_filter=True,
+                                vad_parameters=dict(VAD_PARAMETERS))
+
+    def transcribe_chunk(start, end):
+        start, end = max(0, start - padding), min(len(audio), end + padding)
+        segments, _ = model.transcribe(audio[start:end], vad_filter=True,
+                                       vad_parameters=dict(VAD_PARAMETERS), language=info.language)
+        offset = start / SAMPLING_RATE
+        return [TimedSegment(seg.start + offset, seg.end + offset, seg.text) for seg in segments]
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    futures = [executor.submit(transcribe_chunk, start, end) for start, end in chunks]
+
+    def stitch():
+        try:
+            yield from stitch_chunk_segments(chunks, (future.result() for future in futures))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return stitch(), info
+
+# 转录结果缓存：按音频内容哈希 + 模型、计算类型、VAD 设置区分，只重新翻译时不需要再跑 Whisper
+TRANSCRIPT_CACHE_VERSION = 1
+
+def transcript_cache_dir():
+    """缓存目录：$XDG_CACHE_HOME（默认 ~/.cache）/srt_translator/transcripts"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "srt_translator", "transcripts")
+
+def audio_content_hash(audio_file):
+    digest = hashlib.sha256()
+    with open(audio_file, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def transcript_cache_path(audio_hash, model_size, compute_type, chunk_workers=1):
+    settings = json.dumps({
+        "version": TRANSCRIPT_CACHE_VERSION,
+        "model": model_size,
+        "compute_type": compute_type,
+        "vad_filter": True,
+        "vad_parameters": VAD_PARAMETERS,
+        # 分块转录的切分方式会影响块边界处的结果
+        "chunk_seconds": CHUNK_SECONDS if chunk_workers > 1 else None,
+        "chunk_padding": CHUNK_PADDING if chunk_workers > 1 else None,
+    }, sort_keys=True)
+    key = hashlib.sha256(f"{audio_hash}\n{settings}".encode("utf-8")).hexdigest()[:32]
+    return os.path.join(transcript_cache_dir(), f"{key}.json.gz")
+
+def load_cached_transcript(cache_path):
+    """返回 (语言, [TimedSegment])，没有缓存或缓存损坏时返回 None"""
     try:
-        segments, info = model.transcribe(audio_file, vad_filter=True)
-        segments_list = list(segments)  # 转换为列表以便多次使用
-        text = "".join([seg.text for seg in segments_list])
-        
-        # 生成SRT字幕文件
-        if generate_subtitle:
-            srt_file = os.path.splitext(audio_file)[0] + ".srt"
-            generate_srt(segments_list, srt_file)
-            print(f"📺 字幕已保存到: {srt_file}")
-        
-        return {"text": text, "language": info.language, "segments": segments_list}
-        
-    except Exception as e:
-        error_msg = str(e)
-        # 如果GPU转录失败（包括cuDNN错误），重试CPU
-        if use_gpu and not force_cpu:
-            print(f"\n⚠️  转录失败: {error_msg[:200]}")
-            print("检测到GPU错误，重新尝试CPU模式...")
-            model = WhisperModel(model_size, device="cpu", compute_type="int8")
-            print("✅ 已切换到CPU模式")
-            
-            segments, info = model.transcribe(audio_file, vad_filter=True)
-            segments_list = list(segments)
-            text = "".join([seg.text for seg in segments_list])
-            
-            if generate_subtitle:
-                srt_file = os.path.splitext(audio_file)[0] + ".srt"
-                generate_srt(segments_list, srt_file)
-                print(f"📺 字幕已保存到: {srt_file}")
-            
-            return {"text": text, "language": info.language, "segments": segments_list}
+        with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return data["language"], [TimedSegment(start, end, text) for start, end, text in data["segments"]]
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, KeyError, TypeError) as e:
+        # EOFError：gzip 文件被截断（例如写缓存时进程被终止）
+        print(f"⚠️  转录缓存读取失败，将重新转录: {e}")
+        return None
+
+def save_cached_transcript(cache_path, language, segments):
+    """片段保存为 [开始, 结束, 文本] 数组（gzip 压缩的 JSON），先写临时文件再替换"""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    data = {
+        "language": language,
+        "segments": [[round(seg.start, 3), round(seg.end, 3), seg.text] for seg in segments],
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    try:
+        with gzip.open(os.fdopen(fd, "wb"), "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️  转录缓存保存失败: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def transcribe_audio(audio_file, model_size="medium", use_gpu=True, generate_subtitle=True, on_segment=None,
+                     chunk_workers=1, use_cache=True):
+    """
+    使用 faster-whisper 转录音频
+    不需要 PyTorch，支持 CUDA/CPU
+
+    边转录边处理：每识别出一段就写入原文 SRT，并调用 on_segment(segment)
+    （例如交给翻译线程），不需要等整个文件转录完。
+    chunk_workers > 1 时长音频在静音处分块并行转录（见 transcribe_chunked）。
+    use_cache 时同一音频、同样设置的转录结果直接从缓存读取，不加载模型。
+    """
+    srt_file = os.path.splitext(audio_file)[0] + ".srt"
+    segments_list = []
+    cached = None
+    if use_cache:
+        audio_hash = audio_content_hash(audio_file)
+        # GPU（float16）和CPU（int8）的结果分别缓存，优先使用本次会用到的那种
+        compute_types = ["float16", "int8"] if use_gpu and not _gpu_failed else ["int8"]
+        for compute_type in compute_types:
+            cached = load_cached_transcript(transcript_cache_path(audio_hash, model_size, compute_type, chunk_workers))
+            if cached:
+                print(f"✅ 使用转录缓存（{model_size}/{compute_type}）: {audio_file}")
+                break
+
+    def consume(segments):
+        # GPU 中途失败后用 CPU 重新转录时，跳过已经输出过的部分
+        emitted_until = segments_list[-1].end if segments_list else 0.0
+        for segment in segments:
+            if segment.end <= emitted_until:
+                continue
+            segments_list.append(segment)
+            if srt:
+                write_srt_segment(srt, len(segments_list), segment)
+            if on_segment:
+                on_segment(segment)
+
+    def transcribe(model):
+        if chunk_workers > 1:
+            segments, info = transcribe_chunked(model, audio_file, chunk_workers)
         else:
-            print(f"\n❌ 转录失败: {error_msg}")
-            raise
+            segments, info = model.transcribe(audio_file, vad_filter=True, vad_parameters=dict(VAD_PARAMETERS))
+        consume(segments)
+        return info.language
 
-def translate_with_ollama(text, model="qwen3:8b"):
-    url = "http://localhost:11434/api/generate"
-    prompt = f"请将以下文本翻译成中文,只输出翻译结果,不要解释:\n\n{text}"
-    payload = {"model": model, "prompt": prompt, "stream": False}
-    print(f"使用 {model} 翻译中...")
-    response = requests.post(url, json=payload)
-    result = response.json()
-    return result["response"].strip()
-
-def translate_segments_with_ollama(segments, model="qwen3:8b"):
-    """逐段翻译字幕"""
-    url = "http://localhost:11434/api/generate"
-    translated_segments = []
-    
-    print(f"正在翻译 {len(segments)} 个字幕片段...")
-    for i, segment in enumerate(segments, 1):
-        prompt = f"请将以下英文翻译成中文,只输出翻译结果,不要解释:\n\n{segment.text.strip()}"
-        payload = {"model": model, "prompt": prompt, "stream": False}
-        
+    srt = open(srt_file, "w", encoding="utf-8") if generate_subtitle else None
+    try:
+        if cached:
+            language, segments = cached
+            consume(segments)
+        else:
+            print(f"加载 faster-whisper {model_size} 模型...")
+            model, on_gpu = load_whisper_model(model_size, use_gpu, chunk_workers)
+            print(f"正在转录: {audio_file}")
+            try:
+                language = transcribe(model)
+            except Exception as e:
+                # 如果GPU转录失败（包括cuDNN错误），重试CPU
+                if not on_gpu:
+                    print(f"\n❌ 转录失败: {e}")
+                    raise
+                print(f"\n⚠️  转录失败: {str(e)[:200]}")
+                print("检测到GPU错误，重新尝试CPU模式...")
+                mark_gpu_failed(model_size)
+                model = get_whisper_model(model_size, "cpu", "int8", chunk_workers)
+                on_gpu = False
+                print("✅ 已切换到CPU模式")
+                language = transcribe(model)
+            if use_cache:
+                compute_type = "float16" if on_gpu else "int8"
+                save_cached_transcript(transcript_cache_path(audio_hash, model_size, compute_type, chunk_workers),
+                                       language, segments_list)
+    finally:
+        if srt:
+            srt.close()
+
+    if generate_subtitle:
+        print(f"📺 字幕已保存到: {srt_file}")
+    text = "".join([seg.text for seg in segments_list])
+    return {"text": text, "language": language, "segments": segments_list}
+
+# 翻译：本地 Ollama（core.translator.OllamaTranslator，keep_alive 常驻模型、复用连接），
+# 交给 core.subtitle_translator 的分组翻译（内容分析 + 术语表 + 多段打包 + 并发）
+OLLAMA_WORKERS = 4            # 同时发给 Ollama 的请求总数（批处理时为所有进程合计）
+SEGMENTS_PER_REQUEST = 8      # 每个请求打包的字幕段数
+TRANSLATE_CHUNK_SIZE = 50     # 每次提交翻译的字幕段数
+TRANSLATE_CHUNK_WORKERS = 2   # 同时翻译的片段数
+ANALYSIS_CHARS = 2500         # analyze_content 只分析前 2500 字，攒够即可开始
+
+def load_glossary(vocab_file=None):
+    """读取术语表（每行一条，如“连姆 LIAM”，# 开头为注释），默认使用脚本目录下的 术语列表.txt"""
+    if vocab_file is None:
+        vocab_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "术语列表.txt")
+    if not os.path.exists(vocab_file):
+        return []
+    with open(vocab_file, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+# 本进程可以同时发给 Ollama 的请求数；批处理子进程中为 OLLAMA_WORKERS 按进程数平分
+_ollama_workers = OLLAMA_WORKERS
+
+def translation_concurrency():
+    """返回 (同时翻译的片段数, 每个片段内的并发)，两者相乘不超过本进程的 Ollama 请求数"""
+    total = max(1, _ollama_workers)
+    chunk_workers = min(TRANSLATE_CHUNK_WORKERS, total)
+    return chunk_workers, max(1, total // chunk_workers)
+
+def make_subtitle_translator(model="qwen3:8b", custom_vocab=None, base_url=None):
+    """使用本地 Ollama 的 SmartSubtitleTranslator"""
+    from core.translator import OllamaTranslator
+    from core.subtitle_translator import SmartSubtitleTranslator
+
+    return SmartSubtitleTranslator(
+        OllamaTranslator(model, base_url),
+        # 每个片段内的并发 × 同时翻译的片段数 = 本进程的 Ollama 请求数
+        max_workers=translation_concurrency()[1],
+        custom_vocab=custom_vocab,
+        write_report=False,
+        max_group_lines=SEGMENTS_PER_REQUEST,
+    )
+
+class SegmentSubtitleTranslator:
+    """
+    边转录边翻译：feed() 逐段送入转录片段，close() 时按原顺序返回译文
+
+    攒够 ANALYSIS_CHARS 字后做一次内容分析（摘要和术语表供所有片段共用），
+    之后每凑满 chunk_size 段就提交给后台线程，用 SmartSubtitleTranslator 分组翻译
+    （每个请求打包 max_group_lines 段）。
+    正在翻译和排队的片段数有上限，翻译跟不上时 feed() 会阻塞，内存占用有界。
+    """
+
+    def __init__(self, subtitle_translator, chunk_size=TRANSLATE_CHUNK_SIZE,
+                 chunk_workers=None, max_pending=None):
+        self.subtitle_translator = subtitle_translator
+        self.chunk_size = chunk_size
+        chunk_workers = chunk_workers or translation_concurrency()[0]
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=chunk_workers)
+        self.slots = threading.BoundedSemaphore(max_pending or chunk_workers * 2)
+        self.lock = threading.Lock()
+        self.segments = []
+        self.subtitles = []
+        self.translated_texts = []
+        self.pending = []
+        self.futures = []
+        self.analysis = None
+        self.analysis_chars = 0
+        self.done = 0
+
+    @property
+    def summary(self):
+        return self.subtitle_translator.context_summary
+
+    def feed(self, segment):
+        n = len(self.segments)
+        self.segments.append(segment)
+        self.subtitles.append(Subtitle(str(n + 1), format_timestamp(segment.start),
+                                       format_timestamp(segment.end), segment.text.strip()))
+        self.translated_texts.append(None)
+        self.pending.append(n)
+        if self.analysis is None:
+            self.analysis_chars += len(segment.text)
+            if self.analysis_chars >= ANALYSIS_CHARS:
+                self._start_analysis()
+        if self.analysis is not None and len(self.pending) >= self.chunk_size:
+            self._submit()
+
+    def _start_analysis(self):
+        # 先于所有片段提交，线程池按顺序执行，片段任务只需等待它完成
+        text = "\n".join(sub.text for sub in self.subtitles)
+        self.analysis = self.executor.submit(self.subtitle_translator.analyze_content, text)
+
+    def _submit(self):
+        batch, self.pending = self.pending, []
+        self.slots.acquire()
+        self.futures.append(self.executor.submit(self._translate, batch))
+
+    def _translate(self, batch):
         try:
-            response = requests.post(url, json=payload)
-            result = response.json()
-            translated_text = result["response"].strip()
-            translated_segments.append({
-                "start": segment.start,
-                "end": segment.end,
-                "text": translated_text
-            })
-            print(f"  进度: {i}/{len(segments)}", end="\r")
+            translator = self.subtitle_translator
+            summary = self.analysis.result()
+            if summary and translator.context_summary is None:
+                translator.context_summary = summary
+            texts = translator.translate_subtitles_by_speaker([self.subtitles[i] for i in batch])
+            for i, text in zip(batch, texts):
+                # 翻译失败的字幕保留原文
+                self.translated_texts[i] = self.subtitles[i].text if translator._is_failed_text(text) else text
         except Exception as e:
-            print(f"\n⚠️  翻译片段 {i} 失败: {e}")
-            translated_segments.append({
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text  # 保留原文
-            })
-    
-    print()  # 换行
-    return translated_segments
+            print(f"\n⚠️  翻译片段 {batch[0]+1}-{batch[-1]+1} 失败: {e}")
+            for i in batch:
+                self.translated_texts[i] = self.subtitles[i].text  # 保留原文
+        finally:
+            self.slots.release()
+        with self.lock:
+            self.done += len(batch)
+            print(f"  翻译进度: {self.done}/{len(self.segments)}", end="\r")
+
+    def abort(self):
+        """放弃尚未开始的翻译（转录失败或用户中断时）"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """翻译剩余的段并等待全部完成，返回 [{start, end, text}]"""
+        if self.analysis is None and self.segments:
+            self._start_analysis()
+        if self.pending:
+            self._submit()
+        for future in self.futures:
+            future.result()
+        self.executor.shutdown()
+        print()  # 换行
+        return [
+            {"start": segment.start, "end": segment.end, "text": text or segment.text.strip()}
+            for segment, text in zip(self.segments, self.translated_texts)
+        ]
+
+def translate_segments_with_ollama(segments, model="qwen3:8b", custom_vocab=None):
+    """翻译全部字幕段，结果按原顺序返回"""
+    print(f"正在翻译 {len(segments)} 个字幕片段...")
+    translator = SegmentSubtitleTranslator(make_subtitle_translator(model, custom_vocab))
+    for segment in segments:
+        translator.feed(segment)
+    return translator.close()
 
 def generate_translated_srt(translated_segments, output_file):
     """生成翻译后的SRT字幕文件"""
@@ -133,19 +485,32 @@ def generate_translated_srt(translated_segments, output_file):
             f.write(f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n")
             f.write(f"{segment['text']}\n\n")
 
-def process_audio(audio_file, whisper_model="medium", ollama_model="qwen3:8b", use_gpu=True, translate=True, translate_srt=True):
+def process_audio(audio_file, whisper_model="medium", ollama_model="qwen3:8b", use_gpu=True, translate=True, translate_srt=True,
+                  chunk_workers=1, use_cache=True):
     try:
-        result = transcribe_audio(audio_file, whisper_model, use_gpu, generate_subtitle=True)
+        # 需要翻译时，转录出的每一段立即送去翻译，转录和翻译同时进行
+        segment_translator = None
+        if translate:
+            segment_translator = SegmentSubtitleTranslator(make_subtitle_translator(ollama_model, load_glossary()))
+        try:
+            result = transcribe_audio(audio_file, whisper_model, use_gpu, generate_subtitle=True,
+                                      on_segment=segment_translator.feed if segment_translator else None,
+                                      chunk_workers=chunk_workers, use_cache=use_cache)
+        except BaseException:
+            if segment_translator:
+                segment_translator.abort()
+            raise
         original_text = result["text"]
         detected_language = result["language"]
-        segments = result["segments"]
         
         print(f"\n✅ 检测到的语言: {detected_language}")
         print(f"\n📝 原文:\n{original_text[:500]}...\n")  # 只显示前500字符
 
         if translate:
-            print("🔄 正在翻译全文...")
-            translated_text = translate_with_ollama(original_text, ollama_model)
+            print(f"🔄 正在等待 {ollama_model} 翻译完成...")
+            translated_segments = segment_translator.close()
+            # 全文译文由逐段译文拼接，不再把整篇原文放进一个请求
+            translated_text = "\n".join(segment["text"] for segment in translated_segments)
             print(f"\n🇨🇳 中文翻译:\n{translated_text[:500]}...\n")
 
             output_file = os.path.splitext(audio_file)[0] + "_转录.txt"
@@ -153,15 +518,17 @@ def process_audio(audio_file, whisper_model="medium", ollama_model="qwen3:8b", u
                 f.write(f"原文 ({detected_language}):\n{original_text}\n\n")
                 f.write("=" * 50 + "\n\n")
                 f.write(f"中文翻译:\n{translated_text}\n")
+                if segment_translator.summary:
+                    f.write("\n" + "=" * 50 + "\n\n")
+                    f.write(f"内容分析:\n{segment_translator.summary}\n")
             print(f"💾 结果已保存到: {output_file}")
             
             # 生成翻译字幕
             if translate_srt:
-                print("\n🔄 正在生成中文字幕...")
-                translated_segments = translate_segments_with_ollama(segments, ollama_model)
                 translated_srt_file = os.path.splitext(audio_file)[0] + "_中文.srt"
                 generate_translated_srt(translated_segments, translated_srt_file)
                 print(f"📺 中文字幕已保存到: {translated_srt_file}")
+        return True
     except KeyboardInterrupt:
         print("\n\n⚠️  用户中断操作")
         sys.exit(0)
@@ -169,6 +536,13 @@ def process_audio(audio_file, whisper_model="medium", ollama_model="qwen3:8b", u
         print(f"\n❌ 处理失败: {e}")
         import traceback
         traceback.print_exc()
+        return False
+
+AUDIO_EXTENSIONS = ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.mp4']
+
+def list_audio_files(folder_path):
+    """文件夹中的音频文件名（按名称排序）"""
+    return sorted(f for f in os.listdir(folder_path) if os.path.splitext(f)[1].lower() in AUDIO_EXTENSIONS)
 
 def interactive_mode():
     """交互式模式"""
@@ -199,8 +573,7 @@ def interactive_mode():
         return None
     
     # 列出文件夹中的音频文件
-    audio_extensions = ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.mp4']
-    audio_files = [f for f in os.listdir(folder_path) if os.path.splitext(f)[1].lower() in audio_extensions]
+    audio_files = list_audio_files(folder_path)
     
     if not audio_files:
         print(f"\n❌ 在 {folder_path} 中没有找到音频文件")
@@ -212,22 +585,20 @@ def interactive_mode():
         size_mb = os.path.getsize(file_path) / (1024 * 1024)
         print(f"  {i}. {f} ({size_mb:.1f} MB)")
     
-    choice = input("\n请输入文件编号 (按q退出): ").strip()
+    choice = input("\n请输入文件编号 (a=全部处理, 按q退出): ").strip()
     
     if choice.lower() == 'q':
         print("退出程序")
         return None
     
-    if choice.isdigit() and 1 <= int(choice) <= len(audio_files):
-        audio_file = os.path.join(folder_path, audio_files[int(choice) - 1])
+    if choice.lower() == 'a':
+        selected_files = [os.path.join(folder_path, f) for f in audio_files]
+    elif choice.isdigit() and 1 <= int(choice) <= len(audio_files):
+        selected_files = [os.path.join(folder_path, audio_files[int(choice) - 1])]
     else:
         print("❌ 无效的选择")
         return None
     
-    if not os.path.exists(audio_file):
-        print(f"❌ 找不到文件: {audio_file}")
-        return None
-    
     # 选择模型大小
     print("\n" + "=" * 60)
     print("选择Whisper模型 (影响准确度和速度):")
@@ -253,12 +624,12 @@ def interactive_mode():
     # 选择是否生成中文字幕
     translate_srt = False
     if translate:
-        srt_choice = input("是否生成中文字幕? (需要逐段翻译,较慢) [Y/n]: ").strip().lower()
+        srt_choice = input("是否生成中文字幕? [Y/n]: ").strip().lower()
         translate_srt = srt_choice in ['', 'y', 'yes']
     
     # 确认开始处理
     print("\n" + "=" * 60)
-    print(f"📁 文件: {audio_file}")
+    print(f"📁 文件: {selected_files[0] if len(selected_files) == 1 else f'{folder_path} 中的 {len(selected_files)} 个文件'}")
     print(f"🤖 模型: {whisper_model}")
     print(f"⚡ 设备: {'GPU(自动回退CPU)' if use_gpu else 'CPU'}")
     print(f"📺 字幕: 原文SRT + {'中文SRT' if translate_srt else '无中文字幕'}")
@@ -267,44 +638,189 @@ def interactive_mode():
     
     confirm = input("\n开始处理? [Y/n]: ").strip().lower()
     if confirm in ['', 'y', 'yes']:
-        return audio_file, whisper_model, use_gpu, translate, translate_srt
+        return selected_files, whisper_model, use_gpu, translate, translate_srt
     else:
         print("取消处理")
         return None
 
-if __name__ == "__main__":
-    try:
-        if len(sys.argv) > 1:
-            # 命令行模式
-            audio_file = sys.argv[1]
-            whisper_model = sys.argv[2] if len(sys.argv) > 2 else "medium"
-            
-            if os.path.exists(audio_file):
-                process_audio(audio_file, whisper_model, use_gpu=False)  # 命令行默认CPU
-            else:
-                print(f"❌ 找不到文件: {audio_file}")
+def process_files(audio_files, whisper_model="medium", use_gpu=True, translate=True, translate_srt=True,
+                  chunk_workers=1, use_cache=True):
+    """依次处理多个文件，模型只在第一个文件时加载"""
+    for index, audio_file in enumerate(audio_files, 1):
+        if len(audio_files) > 1:
+            print(f"\n{'=' * 60}\n[{index}/{len(audio_files)}] {os.path.basename(audio_file)}\n{'=' * 60}")
+        process_audio(audio_file, whisper_model, use_gpu=use_gpu, translate=translate, translate_srt=translate_srt,
+                      chunk_workers=chunk_workers, use_cache=use_cache)
+
+BATCH_MANIFEST = "_transcribe_manifest.json"
+
+def file_signature(path):
+    """用大小和修改时间判断文件是否变化"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+def load_batch_manifest(folder):
+    manifest_path = os.path.join(folder, BATCH_MANIFEST)
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  任务清单读取失败，将重新处理全部文件: {e}")
+    return {"files": {}}
+
+def save_batch_manifest(folder, manifest):
+    """先写临时文件再替换，中途中断也不会留下损坏的清单"""
+    manifest_path = os.path.join(folder, BATCH_MANIFEST)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def is_done(manifest, folder, name, whisper_model="medium", translate=True, translate_srt=True):
+    """
+    清单中已完成、音频没有变化、输出文件仍在，且上次运行的设置满足本次要求时跳过
+
+    换了 Whisper 模型要重新转录；上次没有翻译（或没有生成中文字幕）而本次需要时也要重新处理。
+    """
+    entry = manifest["files"].get(name)
+    audio_file = os.path.join(folder, name)
+    base = os.path.splitext(audio_file)[0]
+    if not (entry and entry.get("status") == "done"
+            and {"size": entry.get("size"), "mtime": entry.get("mtime")} == file_signature(audio_file)
+            and entry.get("model") == whisper_model
+            and os.path.exists(base + ".srt")):
+        return False
+    if translate and not (entry.get("translate") and os.path.exists(base + "_转录.txt")):
+        return False
+    if translate and translate_srt and not (entry.get("translate_srt") and os.path.exists(base + "_中文.srt")):
+        return False
+    return True
+
+def _init_batch_worker(cpu_threads, ollama_workers=OLLAMA_WORKERS):
+    """
+    子进程初始化：限制每个进程的推理线程数，使所有进程合计约等于CPU核心数；
+    Ollama 请求数同样平分，所有进程合计约为 OLLAMA_WORKERS
+    """
+    global _cpu_threads, _ollama_workers
+    _cpu_threads = cpu_threads
+    _ollama_workers = ollama_workers
+
+def _process_in_worker(audio_file, options):
+    start = time.perf_counter()
+    ok = process_audio(audio_file, options["whisper_model"], use_gpu=False,
+                       translate=options["translate"], translate_srt=options["translate_srt"],
+                       chunk_workers=options["chunk_workers"], use_cache=options["use_cache"])
+    return ok, time.perf_counter() - start
+
+def process_directory_parallel(folder, jobs, whisper_model="medium", translate=True, translate_srt=True,
+                               force=False, chunk_workers=1, use_cache=True):
+    """
+    多进程批量转录文件夹（仅CPU）
+
+    每个进程加载一份模型，cpu_threads = CPU核心数 // jobs；
+    每个进程的翻译请求数为 OLLAMA_WORKERS // jobs（至少 1），jobs 超过 OLLAMA_WORKERS 时
+    Ollama 同时收到的请求数为 jobs。
+    进度记录在文件夹下的 _transcribe_manifest.json，已完成、未变化且设置相同的文件再次运行时跳过。
+    """
+    audio_files = list_audio_files(folder)
+    manifest = load_batch_manifest(folder)
+    translate_srt = translate and translate_srt
+    pending = [name for name in audio_files
+               if force or not is_done(manifest, folder, name, whisper_model, translate, translate_srt)]
+    skipped = len(audio_files) - len(pending)
+    cpu_threads = max(1, (os.cpu_count() or 1) // jobs)
+    ollama_workers = max(1, OLLAMA_WORKERS // jobs)
+
+    print(f"在 {folder} 中找到 {len(audio_files)} 个音频文件，跳过已完成的 {skipped} 个")
+    print(f"使用 {jobs} 个进程，每个进程 {cpu_threads} 个线程")
+    if not pending:
+        return manifest
+
+    options = {"whisper_model": whisper_model, "translate": translate, "translate_srt": translate_srt,
+               "chunk_workers": chunk_workers, "use_cache": use_cache}
+    manifest.update(model=whisper_model, jobs=jobs, cpu_threads=cpu_threads)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                             initargs=(cpu_threads, ollama_workers)) as pool:
+        futures = {pool.submit(_process_in_worker, os.path.join(folder, name), options): name
+                   for name in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            name = futures[future]
+            entry = dict(file_signature(os.path.join(folder, name)),
+                         model=whisper_model, translate=translate, translate_srt=translate_srt)
+            try:
+                ok, seconds = future.result()
+                entry.update(status="done" if ok else "failed", seconds=round(seconds, 1))
+            except Exception as e:
+                entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+            manifest["files"][name] = entry
+            save_batch_manifest(folder, manifest)
+            print(f"  [{done}/{len(pending)}] {name}: {'✅' if entry['status'] == 'done' else '❌'} "
+                  f"{entry.get('seconds', '')}")
+
+    failed = [name for name, entry in manifest["files"].items() if entry.get("status") != "done"]
+    print(f"\n批量处理完成，失败 {len(failed)} 个，任务清单: {os.path.join(folder, BATCH_MANIFEST)}")
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="音频转录+翻译+字幕工具（不带参数运行进入交互模式）")
+    parser.add_argument("path", nargs="?", help="音频文件")
+    parser.add_argument("model", nargs="?", default="medium", help="Whisper模型 (默认medium)")
+    parser.add_argument("-m", "--model", dest="model_option", help="Whisper模型（与位置参数相同，--batch 时使用）")
+    parser.add_argument("--batch", metavar="DIR", help="处理文件夹中的全部音频文件")
+    parser.add_argument("--gpu", action="store_true", help="尝试使用GPU（命令行默认CPU）")
+    parser.add_argument("--no-translate", action="store_true", help="只转录，不翻译")
+    parser.add_argument("--no-srt", action="store_true", help="不生成中文字幕")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="--batch 时的进程数（仅CPU，默认1）")
+    parser.add_argument("--chunk-workers", type=int, default=1,
+                        help=f"长音频在静音处分块（每块约 {CHUNK_SECONDS // 60} 分钟），多个线程并行转录")
+    parser.add_argument("--no-cache", action="store_true", help="不读取也不保存转录缓存")
+    parser.add_argument("--force", action="store_true", help="--batch 时重新处理任务清单中已完成的文件")
+    args = parser.parse_args()
+    if args.batch and args.path:
+        parser.error("--batch 与音频文件不能同时指定（用 -m 指定模型）")
+
+    options = dict(whisper_model=args.model_option or args.model, use_gpu=args.gpu,
+                   translate=not args.no_translate, translate_srt=not args.no_srt,
+                   chunk_workers=args.chunk_workers, use_cache=not args.no_cache)
+    if args.batch:
+        if not os.path.isdir(args.batch):
+            print(f"❌ 找不到文件夹: {args.batch}")
+            return
+        if not args.gpu:
+            process_directory_parallel(args.batch, args.jobs, options["whisper_model"],
+                                       options["translate"], options["translate_srt"], force=args.force,
+                                       chunk_workers=args.chunk_workers, use_cache=not args.no_cache)
+            return
+        # GPU：单进程依次处理，共用一份模型
+        audio_files = [os.path.join(args.batch, f) for f in list_audio_files(args.batch)]
+        print(f"在 {args.batch} 中找到 {len(audio_files)} 个音频文件")
+        process_files(audio_files, **options)
+    elif args.path:
+        # 命令行模式
+        if os.path.exists(args.path):
+            process_files([args.path], **options)
         else:
-            # 交互式模式
+            print(f"❌ 找不到文件: {args.path}")
+    else:
+        # 交互式模式：同一会话中的文件共用已加载的模型
+        while True:
             result = interactive_mode()
-            if result:
-                audio_file, whisper_model, use_gpu, translate, translate_srt = result
-                print("\n开始处理...\n")
-                process_audio(audio_file, whisper_model, use_gpu=use_gpu, translate=translate, translate_srt=translate_srt)
-                
-                # 询问是否继续处理其他文件
-                while True:
-                    again = input("\n是否继续处理其他文件? [Y/n]: ").strip().lower()
-                    if again in ['', 'y', 'yes']:
-                        result = interactive_mode()
-                        if result:
-                            audio_file, whisper_model, use_gpu, translate, translate_srt = result
-                            print("\n开始处理...\n")
-                            process_audio(audio_file, whisper_model, use_gpu=use_gpu, translate=translate, translate_srt=translate_srt)
-                        else:
-                            break
-                    else:
-                        print("感谢使用!")
-                        break
+            if not result:
+                break
+            audio_files, whisper_model, use_gpu, translate, translate_srt = result
+            print("\n开始处理...\n")
+            process_files(audio_files, whisper_model, use_gpu=use_gpu, translate=translate, translate_srt=translate_srt)
+
+            # 询问是否继续处理其他文件
+            again = input("\n是否继续处理其他文件? [Y/n]: ").strip().lower()
+            if again not in ['', 'y', 'yes']:
+                print("感谢使用!")
+                break
+
+if __name__ == "__main__":
+    try:
+        main()
     except KeyboardInterrupt:
         print("\n\n👋 感谢使用!")
         sys.exit(0)